@@ -6,9 +6,12 @@ import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
-import requests
+from ..utils.http import new_session, reuse_parsed
+
+if TYPE_CHECKING:
+    import requests
 
 
 @dataclass(slots=True)
@@ -25,20 +28,27 @@ class EarningsAdapter:
         self,
         sample_path: str | None = None,
         feed_url: str | None = None,
-        session: Optional[requests.Session] = None,
+        session: Optional["requests.Session"] = None,
+        timeout: float = 15,
     ) -> None:
         base = Path(__file__).resolve().parents[3] / "data" / "sample"
         self.sample_path = Path(sample_path) if sample_path else base / "events.csv"
         self.feed_url = feed_url
-        self.session = session or requests.Session()
+        # Built on the first live fetch, so sample-only runs never import requests.
+        self.session = session
+        self.timeout = timeout
 
-    def _fetch_live(self) -> List[EarningsItem]:
+    def fetch_live(self) -> List[EarningsItem]:
         assert self.feed_url
-        resp = self.session.get(self.feed_url, timeout=15)
+        if self.session is None:
+            self.session = new_session()
+        resp = self.session.get(self.feed_url, timeout=self.timeout)
         resp.raise_for_status()
         if resp.encoding is None:
             resp.encoding = resp.apparent_encoding or "utf-8"
-        raw = resp.text
+        return reuse_parsed(resp, "earnings-json-v1", lambda: self._parse_json(resp.text), EarningsItem)
+
+    def _parse_json(self, raw: str) -> List[EarningsItem]:
         data = json.loads(raw)
         items: List[EarningsItem] = []
         if isinstance(data, list):
@@ -59,11 +69,14 @@ class EarningsAdapter:
     def fetch(self) -> List[EarningsItem]:
         if self.feed_url:
             try:
-                live = self._fetch_live()
+                live = self.fetch_live()
                 if live:
                     return live
             except Exception:
                 pass
+        return self.read_sample()
+
+    def read_sample(self) -> List[EarningsItem]:
         items: List[EarningsItem] = []
         with self.sample_path.open("r", encoding="utf-8") as fp:
             reader = csv.DictReader(fp)
@@ -5,10 +5,14 @@ import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
-import requests
-from bs4 import BeautifulSoup
+from ..rule_engine import rule_set
+from ..utils.html import news_rows
+from ..utils.http import new_session, reuse_parsed
+
+if TYPE_CHECKING:
+    import requests
 
 
 @dataclass(slots=True)
@@ -16,7 +20,7 @@ class NewsItem:
     code: str
     title: str
     summary: str
-    published_at: datetime
+    published_at: datetime  # None only between _parse_html and _fill_published
     polarity: str
     source: str = "news"
 
@@ -26,38 +30,17 @@ class NewsAdapter:
         self,
         sample_path: str | None = None,
         feed_url: str | None = None,
-        session: Optional[requests.Session] = None,
+        session: Optional["requests.Session"] = None,
+        timeout: float = 15,
+        html_backend: str | None = None,
     ) -> None:
         base = Path(__file__).resolve().parents[3] / "data" / "sample"
         self.sample_path = Path(sample_path) if sample_path else base / "news.json"
         self.feed_url = feed_url
-        self.session = session or requests.Session()
-
-    @staticmethod
-    def _infer_polarity(text: str) -> str:
-        normalized = text.lower()
-        positives = [
-            "上方",
-            "増益",
-            "増配",
-            "最高益",
-            "上振れ",
-            "黒字",
-        ]
-        negatives = [
-            "下方",
-            "減益",
-            "減配",
-            "赤字",
-            "下振れ",
-        ]
-        for keyword in positives:
-            if keyword in text:
-                return "pos"
-        for keyword in negatives:
-            if keyword in text:
-                return "neg"
-        return "neu"
+        # Built on the first live fetch, so sample-only runs never import requests.
+        self.session = session
+        self.timeout = timeout
+        self.html_backend = html_backend
 
     def _parse_json(self, raw: str) -> List[NewsItem]:
         data = json.loads(raw)
@@ -65,13 +48,12 @@ class NewsAdapter:
         if isinstance(data, list):
             for entry in data:
                 try:
-                    title = str(entry.get("title") or "").strip()
                     items.append(
                         NewsItem(
                             code=str(entry.get("code") or "").strip(),
-                            title=title,
+                            title=str(entry.get("title") or "").strip(),
                             summary=str(entry.get("summary") or "").strip(),
-                            polarity=str(entry.get("polarity") or self._infer_polarity(title)),
+                            polarity=str(entry.get("polarity") or ""),
                             published_at=datetime.fromisoformat(str(entry.get("date"))),
                         )
                     )
@@ -79,47 +61,59 @@ class NewsAdapter:
                     continue
         return items
 
+    @staticmethod
+    def _fill_polarity(items: List[NewsItem]) -> List[NewsItem]:
+        """Classify every item without a feed-supplied polarity in one batch."""
+        missing = [item for item in items if not item.polarity]
+        for item, rule in zip(missing, rule_set("news").classify([item.title for item in missing])):
+            item.polarity = rule.tag
+        return items
+
+    @staticmethod
+    def _fill_published(items: List[NewsItem]) -> List[NewsItem]:
+        """Date rows without a usable ``<time>`` at fetch time, after any cache replay."""
+        now = datetime.now()
+        for item in items:
+            if item.published_at is None:
+                item.published_at = now
+        return items
+
     def _parse_html(self, html: str) -> List[NewsItem]:
-        soup = BeautifulSoup(html, "html.parser")
-        rows = soup.select("table.s_news_list tr")
+        """Items of the news list; ``published_at`` is ``None`` until ``_fill_published``."""
         items: List[NewsItem] = []
-        for row in rows:
-            code_cell = row.select_one("td.oncodetip_code-data1")
-            link = row.find("a")
-            if not code_cell or not link:
-                continue
-            code = (code_cell.get("data-code") or code_cell.get_text(strip=True)).strip()
-            if not code:
-                continue
-            title = link.get_text(strip=True)
-            time_tag = row.find("time")
-            if time_tag and time_tag.has_attr("datetime"):
-                try:
-                    published = datetime.fromisoformat(time_tag["datetime"])
-                except ValueError:
-                    published = datetime.now()
-            else:
-                published = datetime.now()
+        for row in news_rows(html, self.html_backend):
+            try:
+                published = datetime.fromisoformat(row.published) if row.published else None
+            except ValueError:
+                published = None
             items.append(
                 NewsItem(
-                    code=code,
-                    title=title,
+                    code=row.code,
+                    title=row.title,
                     summary="",
-                    polarity=self._infer_polarity(title),
+                    polarity="",
                     published_at=published,
                 )
             )
         return items
 
-    def _fetch_live(self) -> List[NewsItem]:
+    def fetch_live(self) -> List[NewsItem]:
         assert self.feed_url
-        resp = self.session.get(self.feed_url, timeout=15)
+        if self.session is None:
+            self.session = new_session()
+        resp = self.session.get(self.feed_url, timeout=self.timeout)
         resp.raise_for_status()
         if resp.encoding is None:
             resp.encoding = resp.apparent_encoding or "utf-8"
-        raw = resp.text
+        content_type = resp.headers.get("Content-Type", "")
+        # Parsed items are cached without inferred polarity or a fetch-time date,
+        # so rule changes apply to cached pages too and undated rows are not frozen.
+        items = reuse_parsed(resp, "news-v3", lambda: self._parse(resp.text, content_type), NewsItem)
+        return self._fill_polarity(self._fill_published(items))
+
+    def _parse(self, raw: str, content_type: str) -> List[NewsItem]:
         items: List[NewsItem] = []
-        if "json" in resp.headers.get("Content-Type", "").lower():
+        if "json" in content_type.lower():
             items = self._parse_json(raw)
         else:
             try:
@@ -133,11 +127,14 @@ class NewsAdapter:
     def fetch(self) -> List[NewsItem]:
         if self.feed_url:
             try:
-                live = self._fetch_live()
+                live = self.fetch_live()
                 if live:
                     return live
             except Exception:
                 pass
+        return self.read_sample()
+
+    def read_sample(self) -> List[NewsItem]:
         with self.sample_path.open("r", encoding="utf-8") as fp:
             raw = json.load(fp)
         items: List[NewsItem] = []
@@ -1,14 +1,41 @@
-"""Adapter for TDnet RSS/list pages (with local fallback)."""
+"""Adapter for TDnet list pages (with local fallback).
+
+A day's disclosures are listed newest first over ``I_list_001_YYYYMMDD.html``,
+``I_list_002_...`` and so on. Each page is streamed through
+``TdnetListParser``, which yields the table rows (time, code, company, title
+and PDF link) as they arrive. The follow-on pages named in the pager are
+fetched concurrently. With a seen-state file, rows already returned by an
+earlier run end the walk: the rest of that page and every later page are
+older, so they are served from the state file instead.
+"""
 from __future__ import annotations
 
+import codecs
 import csv
+import json
 import re
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Container, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+from ..symbol_universe import extract_codes
+from ..utils.http import new_session
+
+if TYPE_CHECKING:
+    import requests
 
-import requests
+# kj* cell classes of a list row -> TdnetRow field.
+ROW_CELLS = {"kjTime": "time", "kjCode": "code", "kjName": "company", "kjTitle": "title"}
+LIST_TABLE_ID = "main-list-table"
+PAGE_PATTERN = re.compile(r"I_list_(\d{3})_(\d{8})\.html")
+CHUNK_BYTES = 16 * 1024
+# List dates kept in the seen-state file.
+SEEN_DAYS = 5
 
 
 @dataclass(slots=True)
@@ -18,6 +45,105 @@ class TdnetItem:
     summary: str
     announced_at: datetime
     source: str = "tdnet"
+    company: str = ""
+    url: str = ""
+
+
+def row_key(code: str, hhmm: str, title: str, url: str) -> str:
+    """Identity of a list row across runs: its PDF link, else code, time and title."""
+    return url or f"{code}|{hhmm}|{title}"
+
+
+def item_key(item: TdnetItem) -> str:
+    return row_key(item.code, item.announced_at.strftime("%H:%M"), item.title, item.url)
+
+
+@dataclass(slots=True)
+class TdnetRow:
+    time: str = ""
+    code: str = ""
+    company: str = ""
+    title: str = ""
+    url: str = ""
+
+    @property
+    def key(self) -> str:
+        return row_key(self.code, self.time, self.title, self.url)
+
+
+class TdnetListParser(HTMLParser):
+    """Incremental parser for one ``I_list`` page.
+
+    Rows land in ``rows`` as soon as their ``</tr>`` is fed. A row whose key is
+    in ``stop_at`` sets ``stopped`` and every later row is ignored. Pager links
+    are collected in ``pages``. ``listing`` is set once the list table or a
+    ``kj*`` cell is seen, so an empty list can be told apart from a page in
+    another format; ``text`` keeps the page text for pages without any list rows.
+    """
+
+    def __init__(self, base_url: str, stop_at: Container[str] = ()) -> None:
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.stop_at = stop_at
+        self.rows: List[TdnetRow] = []
+        self.pages: Set[str] = set()
+        self.text: List[str] = []
+        self.stopped = False
+        self.listing = False
+        self._row: TdnetRow | None = None
+        self._field: str | None = None
+        self._parts: List[str] = []
+
+    def _close_cell(self) -> None:
+        if self._field is not None and self._row is not None:
+            setattr(self._row, self._field, " ".join("".join(self._parts).split()))
+        self._field = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        row, self._row = self._row, None
+        if row is None or not row.code or self.stopped:
+            return
+        if row.key in self.stop_at:
+            self.stopped = True
+        else:
+            self.rows.append(row)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str | None]]) -> None:
+        values = dict(attrs)
+        classes = (values.get("class") or "").split()
+        if values.get("id") == LIST_TABLE_ID or any(name.startswith("kj") for name in classes):
+            self.listing = True
+        for name in ("href", "onclick"):
+            match = PAGE_PATTERN.search(values.get(name) or "")
+            if match:
+                self.pages.add(urljoin(self.base_url, match.group(0)))
+        if tag == "tr":
+            self._close_row()
+            self._row = TdnetRow()
+        elif tag == "td" and self._row is not None:
+            self._close_cell()
+            self._field = next((ROW_CELLS[name] for name in classes if name in ROW_CELLS), None)
+            self._parts = []
+        elif tag == "a" and self._field == "title" and (values.get("href") or "").endswith(".pdf"):
+            self._row.url = urljoin(self.base_url, values["href"])
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "td":
+            self._close_cell()
+        elif tag in ("tr", "table"):
+            self._close_row()
+
+    def handle_data(self, data: str) -> None:
+        if self._field is not None:
+            self._parts.append(data)
+        elif not self.rows:
+            self.text.append(data)
+
+
+def _page_number(url: str) -> int:
+    match = PAGE_PATTERN.search(url)
+    return int(match.group(1)) if match else 0
 
 
 class TdnetRssAdapter:
@@ -27,46 +153,144 @@ class TdnetRssAdapter:
         self,
         sample_path: str | None = None,
         rss_url: str | None = None,
-        session: Optional[requests.Session] = None,
+        session: Optional["requests.Session"] = None,
+        timeout: float = 15,
+        seen_path: str | Path | None = None,
+        concurrency: int = 4,
     ) -> None:
         base = Path(__file__).resolve().parents[3] / "data" / "sample"
         self.sample_path = Path(sample_path) if sample_path else base / "events.csv"
         self.rss_url = rss_url
-        self.session = session or requests.Session()
+        # Built on the first live fetch, so sample-only runs never import requests.
+        self.session = session
+        self.timeout = timeout
+        self.seen_path = Path(seen_path) if seen_path else None
+        self.concurrency = max(1, concurrency)
+        # Pages actually requested by the last fetch_live().
+        self.pages_fetched = 0
 
-    def _fetch_live(self) -> List[TdnetItem]:
-        assert self.rss_url
-        resp = self.session.get(self.rss_url, timeout=15)
-        resp.raise_for_status()
-        if resp.encoding is None:
-            resp.encoding = resp.apparent_encoding or "utf-8"
-        html = resp.text
+    def _list_time(self) -> datetime:
         # Infer date from URL like I_list_001_YYYYMMDD.html; fallback to today
         m = re.search(r"(20\d{6})", self.rss_url)
         if m:
-            dt = datetime.strptime(m.group(1), "%Y%m%d")
-        else:
-            dt = datetime.utcnow()
-        codes = sorted({match.group(0) for match in re.finditer(r"(?<!\d)(\d{4})(?!\d)", html)})
-        items: List[TdnetItem] = []
-        for code in codes:
-            items.append(
-                TdnetItem(
-                    code=code,
-                    title=f"TDNET 公開情報 {code}",
-                    summary="",
-                    announced_at=dt,
-                )
-            )
-        return items
+            return datetime.strptime(m.group(1), "%Y%m%d")
+        return datetime.utcnow()
+
+    def _stream_page(self, url: str, stop_at: Container[str], cancel: threading.Event) -> TdnetListParser:
+        parser = TdnetListParser(url, stop_at)
+        with self.session.get(url, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            # requests assumes ISO-8859-1 for text/* without a charset; TDnet serves UTF-8.
+            charset = "charset=" in (resp.headers.get("Content-Type") or "").lower()
+            decoder = codecs.getincrementaldecoder(resp.encoding if charset else "utf-8")(errors="replace")
+            for chunk in resp.iter_content(CHUNK_BYTES):
+                parser.feed(decoder.decode(chunk))
+                if parser.stopped or cancel.is_set():
+                    return parser
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+        return parser
+
+    def _item(self, row: TdnetRow, day: datetime) -> TdnetItem:
+        try:
+            announced_at = datetime.strptime(f"{day:%Y%m%d} {row.time}", "%Y%m%d %H:%M")
+        except ValueError:
+            announced_at = day
+        return TdnetItem(
+            # TDnet lists 5-character codes; the trailing check digit is always 0.
+            code=row.code[:4],
+            title=row.title,
+            summary="",
+            announced_at=announced_at,
+            company=row.company,
+            url=row.url,
+        )
+
+    def _load_seen(self) -> Dict[str, List[Dict[str, object]]]:
+        if self.seen_path is None or not self.seen_path.exists():
+            return {}
+        try:
+            return json.loads(self.seen_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def _save_seen(self, state: Dict[str, List[Dict[str, object]]]) -> None:
+        if self.seen_path is None:
+            return
+        kept = dict(sorted(state.items())[-SEEN_DAYS:])
+        self.seen_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.seen_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(kept, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.seen_path)
+
+    def fetch_live(self) -> List[TdnetItem]:
+        assert self.rss_url
+        if self.session is None:
+            self.session = new_session()
+        self.pages_fetched = 0
+        day = self._list_time()
+        state = self._load_seen()
+        stored = [
+            TdnetItem(**{**row, "announced_at": datetime.fromisoformat(str(row["announced_at"]))})
+            for row in state.get(f"{day:%Y%m%d}", [])
+        ]
+        seen = {item_key(item) for item in stored}
+
+        cancel = threading.Event()
+        first = self._stream_page(self.rss_url, seen, cancel)
+        if not first.rows and not first.stopped:
+            if first.listing:
+                # The day's list exists but has nothing on it yet.
+                return []
+            # Not a TDnet list table: keep the codes mentioned on the page.
+            return [
+                TdnetItem(code=code, title=f"TDNET 公開情報 {code}", summary="", announced_at=day)
+                for code in extract_codes("".join(first.text))
+            ]
+        rows = list(first.rows)
+        self.pages_fetched = 1
+        complete = True
+        current = _page_number(self.rss_url)
+        rest = sorted((url for url in first.pages if _page_number(url) > current), key=_page_number)
+        if rest and not first.stopped:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(rest))) as pool:
+                futures = [pool.submit(self._stream_page, url, seen, cancel) for url in rest]
+                for future in futures:
+                    try:
+                        page = future.result()
+                    except Exception:
+                        # Keep what was read, but do not record a walk with a gap in it.
+                        complete = False
+                        page = None
+                    if page is not None:
+                        rows.extend(page.rows)
+                    if page is None or page.stopped:
+                        # Everything after this row was returned by an earlier run.
+                        cancel.set()
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            self.pages_fetched += sum(not future.cancelled() for future in futures)
+
+        # A disclosure published mid-walk shifts rows onto the next page.
+        fresh = list({row.key: self._item(row, day) for row in rows}.values())
+        if fresh and complete and self.seen_path is not None:
+            state[f"{day:%Y%m%d}"] = [
+                {**asdict(item), "announced_at": item.announced_at.isoformat()} for item in fresh + stored
+            ]
+            self._save_seen(state)
+        return fresh + stored
 
     def fetch(self) -> List[TdnetItem]:
         if self.rss_url:
             try:
-                return self._fetch_live()
+                return self.fetch_live()
             except Exception:
                 # fall back to local
                 pass
+        return self.read_sample()
+
+    def read_sample(self) -> List[TdnetItem]:
         items: List[TdnetItem] = []
         with self.sample_path.open("r", encoding="utf-8") as fp:
             reader = csv.DictReader(fp)
@@ -0,0 +1,199 @@
+"""Bulk backfill of multi-year DailyPrice/Feature history.
+
+The daily path (``upsert_prices``/``upsert_features``) stages every chunk and
+diffs it against the table so it can report per-row outcomes. A backfill loads
+far more rows at once, so it instead:
+
+- applies bulk-load pragmas for the duration of the load,
+- encodes each distinct trading date once,
+- writes with a single ``INSERT ... ON CONFLICT`` statement per table in one
+  transaction, and
+- optionally drops the secondary date indexes and rebuilds them afterwards.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.backfill --prices path/to/daily_prices.csv [--drop-indexes]
+    PYTHONPATH=. python -m jobs.ingest.backfill --bench 300 1250
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date
+from functools import cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Tuple
+
+from .adapters.price_adapter import PriceAdapter, PriceBar
+from .features import FeatureCalculator, FeatureFrame
+from .incremental import to_db_date
+from .utils.db import bulk_upsert, sqlite_conn
+from .utils.env import load_env
+
+ROOT = Path(__file__).resolve().parents[2]
+
+BULK_LOAD_PRAGMAS: Dict[str, object] = {
+    "cache_size": -262144,  # 256 MiB page cache
+    "temp_store": "MEMORY",
+    "synchronous": "OFF",
+}
+# Secondary indexes (``@@index([date])`` / ``@@index([date, name])``) that only
+# serve read queries and can be rebuilt in one pass after a bulk load.
+BACKFILL_INDEXES = ("DailyPrice_date_idx", "Feature_date_name_idx")
+
+PRICE_COLUMNS = ("code", "date", "open", "high", "low", "close", "volume", "vwap")
+FEATURE_COLUMNS = ("code", "date", "name", "value")
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, drop_indexes: bool = False) -> Iterator[None]:
+    """Run a load as one transaction under bulk-load pragmas.
+
+    With ``drop_indexes`` the secondary date indexes are dropped inside that
+    transaction and rebuilt from their stored definitions before it commits, so
+    a failed load rolls back to the original indexes. Previous pragma values
+    are restored afterwards.
+    """
+    conn.commit()
+    saved = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    try:
+        conn.execute("BEGIN")
+        try:
+            dropped: List[str] = []
+            if drop_indexes:
+                for name in BACKFILL_INDEXES:
+                    row = conn.execute(
+                        "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+                    ).fetchone()
+                    if row is not None:
+                        conn.execute(f'DROP INDEX "{name}"')
+                        dropped.append(row[0])
+            yield
+            for sql in dropped:
+                conn.execute(sql)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    finally:
+        for name, value in saved.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+
+def price_rows(
+    prices: Mapping[str, List[PriceBar]],
+    encode: Callable[[date], str],
+) -> Iterator[Tuple[object, ...]]:
+    for code, bars in prices.items():
+        for bar in bars:
+            yield (
+                code,
+                encode(bar.trading_date),
+                f"{bar.open:.2f}",
+                f"{bar.high:.2f}",
+                f"{bar.low:.2f}",
+                f"{bar.close:.2f}",
+                bar.volume,
+                f"{bar.vwap:.2f}" if bar.vwap is not None else None,
+            )
+
+
+def backfill_prices(conn: sqlite3.Connection, prices: Mapping[str, List[PriceBar]]) -> int:
+    """Write ``prices`` with the same encoding as ``upsert_prices``; returns rows written."""
+    # Each distinct trading date is encoded once, not once per code.
+    return bulk_upsert(conn, "DailyPrice", PRICE_COLUMNS, ("code", "date"), price_rows(prices, cache(to_db_date)))
+
+
+def backfill_features(conn: sqlite3.Connection, features: FeatureFrame) -> int:
+    from .main import feature_rows
+
+    return bulk_upsert(conn, "Feature", FEATURE_COLUMNS, ("code", "date", "name"), feature_rows(features))
+
+
+def run_backfill(
+    conn: sqlite3.Connection,
+    prices: Mapping[str, List[PriceBar]],
+    drop_indexes: bool = False,
+    engine: str | None = None,
+) -> Dict[str, int]:
+    features = FeatureCalculator(PriceAdapter(), engine=engine).compute(prices)
+    with bulk_load(conn, drop_indexes=drop_indexes):
+        return {
+            "DailyPrice": backfill_prices(conn, prices),
+            "Feature": backfill_features(conn, features),
+        }
+
+
+def _fresh_database(directory: str, name: str) -> str:
+    path = Path(directory) / name
+    conn = sqlite3.connect(path)
+    for migration in sorted((ROOT / "infra" / "prisma" / "migrations").glob("*/migration.sql")):
+        conn.executescript(migration.read_text(encoding="utf-8"))
+    conn.close()
+    return f"file:{path}"
+
+
+def benchmark(codes: int, days: int) -> None:
+    """Time the daily write path against the backfill path on fresh databases."""
+    from .main import upsert_features, upsert_prices
+    from .synthetic import generate
+
+    prices = generate(codes, days).prices
+    features = FeatureCalculator(PriceAdapter()).compute(prices)
+    print(f"[backfill-bench] {codes} codes x {days} bars, {len(features)} feature dates")
+
+    def daily(conn: sqlite3.Connection) -> None:
+        upsert_prices(conn, prices)
+        upsert_features(conn, features)
+
+    def backfill(drop_indexes: bool) -> Callable[[sqlite3.Connection], None]:
+        def load(conn: sqlite3.Connection) -> None:
+            with bulk_load(conn, drop_indexes=drop_indexes):
+                backfill_prices(conn, prices)
+                backfill_features(conn, features)
+
+        return load
+
+    variants = [
+        ("daily upsert", daily),
+        ("backfill", backfill(False)),
+        ("backfill + index rebuild", backfill(True)),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        for idx, (label, load) in enumerate(variants):
+            database_url = _fresh_database(directory, f"bench{idx}.db")
+            started = time.perf_counter()
+            with sqlite_conn(database_url) as conn:
+                load(conn)
+            print(f"[backfill-bench] {label}: {time.perf_counter() - started:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load DailyPrice/Feature history.")
+    parser.add_argument("--prices", help="OHLCV CSV in the sample format (defaults to the sample file)")
+    parser.add_argument("--drop-indexes", action="store_true", help="drop and rebuild the secondary date indexes")
+    parser.add_argument("--bench", nargs=2, type=int, metavar=("CODES", "DAYS"), help="benchmark on synthetic data")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(*args.bench)
+        return
+    env = load_env()
+    prices = PriceAdapter(args.prices).fetch()
+    started = time.perf_counter()
+    with sqlite_conn(env.get("DATABASE_URL", "file:./prisma/dev.db")) as conn:
+        written = run_backfill(
+            conn, prices, drop_indexes=args.drop_indexes, engine=env.get("FEATURE_ENGINE") or None
+        )
+    for table, count in written.items():
+        print(f"[backfill] {table}: {count} rows")
+    print(f"Backfill completed in {time.perf_counter() - started:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
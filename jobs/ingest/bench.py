@@ -0,0 +1,362 @@
+"""Micro-benchmarks for the ingest hot paths.
+
+Every case runs on a seeded synthetic universe from ``synthetic.generate``
+(``codes x days`` bars plus the TDnet, earnings and news items announced on
+them) and records:
+
+- ``seconds``: best of up to ``repeat`` timed runs,
+- ``items_per_s``: bars, rows, items or codes handled per second, and
+- ``peak_mb``: peak memory allocated during one extra run under ``tracemalloc``.
+
+Cases whose input would exceed their ``max_bars`` are recorded as skipped
+(``--all`` lifts the caps). Results are saved as JSON keyed by
+``case[CODESxDAYS]`` so two runs can be diffed, and ``--baseline`` exits
+non-zero when a case is more than ``--max-slowdown`` percent slower.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.bench --sizes 100x250 1000x250 --output bench.json
+    PYTHONPATH=. python -m jobs.ingest.bench --compare old.json new.json
+    PYTHONPATH=. python -m jobs.ingest.bench --baseline bench.json --max-slowdown 25
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sqlite3
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from .adapters.earnings_adapter import EarningsItem
+from .adapters.news_adapter import NewsItem
+from .adapters.price_adapter import PriceAdapter, PriceBar
+from .adapters.tdnet_rss_adapter import TdnetItem
+from .backfill import PRICE_COLUMNS, ROOT, price_rows
+from .features import FeatureCalculator, FeatureFrame
+from .incremental import to_db_date
+from .rules import (
+    DetectedEvent,
+    EventIndex,
+    detect_earnings,
+    detect_news,
+    detect_tdnet,
+    detect_volume_spike,
+    to_feature_map,
+)
+from .scoring import calculate_score, frame_inputs, load_weights
+from .synthetic import generate
+from .utils.db import replace_many, upsert_many
+
+SIZES = ("100x250", "100x1250", "1000x250", "1000x1250", "4000x250", "4000x1250")
+# Regressions in cases faster than this are timer noise, not slowdowns.
+MIN_GATED_SECONDS = 0.005
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    codes, _, days = size.lower().partition("x")
+    if not codes.isdigit() or not days.isdigit():
+        raise ValueError(f"Expected CODESxDAYS, got {size!r}")
+    return int(codes), int(days)
+
+
+@dataclass
+class Market:
+    """Synthetic inputs shared by every case of one size."""
+
+    codes: int
+    days: int
+    prices: Dict[str, List[PriceBar]]
+    features: FeatureFrame
+    tdnet: List[TdnetItem]
+    earnings: List[EarningsItem]
+    news: List[NewsItem]
+    events: List[DetectedEvent]
+
+    @property
+    def bars(self) -> int:
+        return self.codes * self.days
+
+
+def build_market(codes: int, days: int, seed: int = 7) -> Market:
+    market = generate(codes, days, seed=seed)
+    features = FeatureCalculator(PriceAdapter()).compute(market.prices)
+    events = (
+        detect_tdnet(market.tdnet)
+        + detect_earnings(market.earnings)
+        + detect_news(market.news)
+        + detect_volume_spike(features)
+    )
+    return Market(codes, days, market.prices, features, market.tdnet, market.earnings, market.news, events)
+
+
+def _schema() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    for migration in sorted((ROOT / "infra" / "prisma" / "migrations").glob("*/migration.sql")):
+        conn.executescript(migration.read_text(encoding="utf-8"))
+    return conn
+
+
+# A case turns a Market into (run, items): ``run`` is timed, ``items`` is the
+# unit its throughput is reported in.
+Setup = Callable[[Market], Tuple[Callable[[], object], int]]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    unit: str
+    setup: Setup
+    max_bars: int | None = None
+
+
+def _compute(market: Market) -> Tuple[Callable[[], object], int]:
+    calculator = FeatureCalculator(PriceAdapter())
+    return lambda: calculator.compute(market.prices), market.bars
+
+
+def _feature_map(market: Market) -> Tuple[Callable[[], object], int]:
+    records = list(market.features.records())
+    return lambda: to_feature_map(records), len(records)
+
+
+def _detect(market: Market, items: Sequence[object], detect: Callable[[Sequence[object]], object]):
+    return lambda: detect(items), len(items)
+
+
+def _scoring(market: Market) -> Tuple[Callable[[], object], int]:
+    weights = load_weights({})
+    index = EventIndex(market.events)
+    pick_date = max(bars[-1].trading_date for bars in market.prices.values())
+    pick_iso = pick_date.isoformat()
+    inputs = []
+    for code, bars in market.prices.items():
+        metrics, filters = frame_inputs(market.features, code, pick_iso, bars[-1].close)
+        events = index.between(code, pick_date - timedelta(days=10), pick_date)
+        inputs.append((events, metrics, filters, {"recent_negative": index.negative_penalty(code, pick_date)}))
+
+    def run() -> None:
+        for events, metrics, filters, penalties in inputs:
+            calculate_score(weights, events, metrics, filters, penalties)
+
+    return run, len(inputs)
+
+
+def _picks(market: Market) -> Tuple[Callable[[], object], int]:
+    from .main import build_daily_picks
+
+    weights = load_weights({})
+    return lambda: build_daily_picks({}, market.prices, market.features, market.events, weights=weights), market.codes
+
+
+def _writes(write: Callable[[sqlite3.Connection, List[Tuple[object, ...]]], object]) -> Setup:
+    def setup(market: Market) -> Tuple[Callable[[], object], int]:
+        rows = list(price_rows(market.prices, cache(to_db_date)))
+
+        def run() -> None:
+            # A fresh in-memory database per run, so every run inserts.
+            conn = _schema()
+            write(conn, rows)
+            conn.commit()
+            conn.close()
+
+        return run, len(rows)
+
+    return setup
+
+
+CASES: Tuple[Case, ...] = (
+    Case("compute", "bars", _compute),
+    Case("to_feature_map", "records", _feature_map, max_bars=250_000),
+    Case("detect_tdnet", "items", lambda market: _detect(market, market.tdnet, detect_tdnet)),
+    Case("detect_earnings", "items", lambda market: _detect(market, market.earnings, detect_earnings)),
+    Case("detect_news", "items", lambda market: _detect(market, market.news, detect_news)),
+    Case("detect_volume_spike", "rows", lambda market: (lambda: detect_volume_spike(market.features), market.bars)),
+    Case("calculate_score", "codes", _scoring),
+    Case("build_daily_picks", "codes", _picks),
+    Case(
+        "replace_many",
+        "rows",
+        _writes(lambda conn, rows: replace_many(conn, "DailyPrice", PRICE_COLUMNS, rows)),
+        max_bars=1_250_000,
+    ),
+    Case(
+        "upsert_many",
+        "rows",
+        _writes(lambda conn, rows: upsert_many(conn, "DailyPrice", PRICE_COLUMNS, ("code", "date"), rows)),
+        max_bars=1_250_000,
+    ),
+)
+
+
+def _time(run: Callable[[], object], repeat: int, budget: float) -> Tuple[float, int]:
+    """Best time of up to ``repeat`` runs; stops early once ``budget`` seconds are spent."""
+    best = float("inf")
+    spent = 0.0
+    runs = 0
+    while runs < repeat and (runs == 0 or spent < budget):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return best, runs
+
+
+def _peak_mb(run: Callable[[], object]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+def case_key(name: str, codes: int, days: int) -> str:
+    return f"{name}[{codes}x{days}]"
+
+
+def run_suite(
+    sizes: Iterable[str] = SIZES,
+    cases: Sequence[str] | None = None,
+    repeat: int = 5,
+    budget: float = 2.0,
+    memory: bool = True,
+    limits: bool = True,
+) -> Dict[str, object]:
+    """Run the selected ``cases`` (default: all) at each size; returns the JSON document."""
+    selected = [case for case in CASES if cases is None or case.name in cases]
+    sizes = list(sizes)
+    results: Dict[str, Dict[str, object]] = {}
+    for size in sizes:
+        codes, days = parse_size(size)
+        started = time.perf_counter()
+        market = build_market(codes, days)
+        print(f"[bench] {codes} codes x {days} days: {len(market.events)} events, built in {time.perf_counter() - started:.1f}s")
+        for case in selected:
+            key = case_key(case.name, codes, days)
+            if limits and case.max_bars is not None and market.bars > case.max_bars:
+                results[key] = {"skipped": f"over {case.max_bars} bars"}
+                print(f"[bench] {key}: skipped (over {case.max_bars} bars)")
+                continue
+            run, items = case.setup(market)
+            seconds, runs = _time(run, repeat, budget)
+            result: Dict[str, object] = {
+                "seconds": round(seconds, 6),
+                "items": items,
+                "unit": case.unit,
+                "items_per_s": round(items / seconds, 1) if seconds else None,
+                "runs": runs,
+            }
+            if memory:
+                result["peak_mb"] = round(_peak_mb(run), 2)
+            results[key] = result
+            del run
+            print(f"[bench] {key}: {_describe(result)}")
+        del market
+        gc.collect()
+    return {"meta": _meta(sizes, repeat), "results": results}
+
+
+def _describe(result: Mapping[str, object]) -> str:
+    text = f"{result['seconds'] * 1000:.1f} ms, {result['items_per_s']:,.0f} {result['unit']}/s"
+    if "peak_mb" in result:
+        text += f", peak {result['peak_mb']:.1f} MiB"
+    return text
+
+
+def _meta(sizes: Sequence[str], repeat: int) -> Dict[str, object]:
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "machine": platform.machine(),
+        "sizes": list(sizes),
+        "repeat": repeat,
+    }
+
+
+def compare(old: Mapping[str, object], new: Mapping[str, object]) -> List[Tuple[str, float, float, float]]:
+    """``(key, old seconds, new seconds, change %)`` for every case timed in both documents."""
+    rows = []
+    for key, before in old["results"].items():
+        after = new["results"].get(key)
+        if not after or "seconds" not in before or "seconds" not in after:
+            continue
+        change = (after["seconds"] / before["seconds"] - 1) * 100 if before["seconds"] else 0.0
+        rows.append((key, before["seconds"], after["seconds"], change))
+    return rows
+
+
+def regressions(
+    baseline: Mapping[str, object], current: Mapping[str, object], max_slowdown: float
+) -> List[str]:
+    """Cases of ``current`` more than ``max_slowdown`` percent slower than ``baseline``."""
+    return [
+        f"{key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms (+{change:.0f}%)"
+        for key, before, after, change in compare(baseline, current)
+        if change > max_slowdown and max(before, after) >= MIN_GATED_SECONDS
+    ]
+
+
+def print_comparison(old: Mapping[str, object], new: Mapping[str, object]) -> None:
+    for key, before, after, change in compare(old, new):
+        old_mb = old["results"][key].get("peak_mb")
+        new_mb = new["results"][key].get("peak_mb")
+        memory = f"  peak {old_mb:.1f} -> {new_mb:.1f} MiB" if old_mb is not None and new_mb is not None else ""
+        print(f"{key:40s} {before * 1000:10.1f} ms {after * 1000:10.1f} ms {change:+7.1f}%{memory}")
+
+
+def _load(path: str) -> Dict[str, object]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the ingest hot paths on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", metavar="CODESxDAYS", help=f"default: {' '.join(SIZES)}")
+    parser.add_argument("--cases", nargs="+", choices=[case.name for case in CASES], help="default: all")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--all", action="store_true", help="also run cases above their size cap")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files and exit")
+    parser.add_argument("--baseline", help="fail when a case is slower than in this result file")
+    parser.add_argument("--max-slowdown", type=float, default=25.0, help="allowed slowdown in percent")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(_load(args.compare[0]), _load(args.compare[1]))
+        return
+    baseline = _load(args.baseline) if args.baseline else None
+    sizes = args.sizes or (baseline["meta"]["sizes"] if baseline else SIZES)
+    current = run_suite(sizes, args.cases, repeat=args.repeat, memory=not args.no_memory, limits=not args.all)
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    if baseline is None:
+        return
+    print_comparison(baseline, current)
+    slower = regressions(baseline, current, args.max_slowdown)
+    for line in slower:
+        print(f"[bench] regression {line}")
+    if slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Resident ingest service that keeps the job's working set in memory.
+
+A one-shot ``jobs.ingest.main`` run pays for interpreter start-up, imports,
+reading prices, computing features and indexing events every time. The daemon
+does the full run once, keeps prices, features, the ``EventIndex`` and the
+parsed ``WeightConfig`` in memory, and then schedules its own work:
+
+- every ``INGEST_NEWS_INTERVAL`` seconds it polls the TDnet and news feeds,
+  writes only events it has not seen yet and rescores just the codes they
+  affect (``PickMaintainer``);
+- once a weekday at ``INGEST_EOD_TIME`` (local time) it repeats the full run
+  for the new price bars.
+
+``weights.json`` is re-read only when its mtime changes; a change alone also
+triggers a pick rebuild on the next poll.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.daemon
+    PYTHONPATH=. python -m jobs.ingest.daemon --once
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as clock_time
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Set, Tuple
+
+from .adapters.price_adapter import PriceBar
+from .features import FeatureFrame
+from .main import (
+    event_id,
+    fetch_events,
+    latest_pick_date,
+    open_name_cache,
+    open_session,
+    open_universe,
+    replace_picks,
+    report_written,
+    run_ingest,
+    upsert_events,
+)
+from .pick_maintainer import PickMaintainer, write_pick_changes
+from .rules import DetectedEvent, EventIndex
+from .scoring import WeightConfig, load_weights, weights_path
+from .symbol_universe import SymbolUniverse
+from .utils.db import sqlite_conn
+from .utils.env import load_env
+
+# Feeds polled between end-of-day runs; earnings are only refreshed with prices.
+INTRADAY_FEEDS = ("tdnet", "news")
+TDNET_LIST_URL = "https://www.release.tdnet.info/inbs/I_list_001_{day:%Y%m%d}.html"
+
+
+class WeightsCache:
+    """``load_weights`` result, re-read only when weights.json's mtime changes."""
+
+    def __init__(self, env: Mapping[str, str]) -> None:
+        self.env = env
+        self._key: Tuple[Path, int] | None = None
+        self._weights: WeightConfig | None = None
+
+    def refresh(self) -> bool:
+        """Reload if the file changed since the last call; returns whether it did."""
+        path = weights_path(self.env)
+        key = (path, path.stat().st_mtime_ns)
+        if key == self._key:
+            return False
+        self._weights = load_weights(self.env)
+        self._key = key
+        return True
+
+    @property
+    def current(self) -> WeightConfig:
+        if self._weights is None:
+            self.refresh()
+        return self._weights
+
+
+def next_eod(now: datetime, at: clock_time) -> datetime:
+    """First weekday ``at`` strictly after ``now``."""
+    candidate = datetime.combine(now.date(), at)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def ensure_symbols(conn, codes: Set[str], names: Mapping[str, str] | None = None) -> None:
+    """Add Symbol rows for codes first seen intraday; unnamed ones are placeholders the EOD run resolves."""
+    conn.executemany(
+        'INSERT INTO "Symbol" (code, name) VALUES (?, ?) ON CONFLICT(code) DO NOTHING',
+        [(code, (names or {}).get(code, code)) for code in sorted(codes)],
+    )
+
+
+class IngestDaemon:
+    def __init__(self, env: Mapping[str, str]) -> None:
+        self.env = env
+        self.database_url = env.get("DATABASE_URL", "file:./prisma/dev.db")
+        self.session, self.http_cache = open_session(env)
+        self.weights = WeightsCache(env)
+        self.prices: Dict[str, List[PriceBar]] = {}
+        # Newest bar per code: all that scoring the latest date needs from prices.
+        self.last_bars: Dict[str, List[PriceBar]] = {}
+        self.latest = date.min
+        self.features = FeatureFrame()
+        self.events: List[DetectedEvent] = []
+        self.index = EventIndex()
+        self.event_ids: Set[str] = set()
+        self.maintainer: PickMaintainer | None = None
+        self.name_cache = open_name_cache(env)
+        self.universe = SymbolUniverse()
+
+    def _feed_env(self, today: date) -> Mapping[str, str]:
+        # The one-shot script pins today's TDnet list; a resident process must roll over.
+        if self.env.get("TDNET_RSS_URL"):
+            return self.env
+        return {**self.env, "TDNET_RSS_URL": TDNET_LIST_URL.format(day=today)}
+
+    def run_eod(self, today: date | None = None) -> None:
+        """Full ingest run; replaces the in-memory state with its inputs."""
+        started = time.perf_counter()
+        self.weights.refresh()
+        env = self._feed_env(today or date.today())
+        self.prices, self.features, self.events, written = run_ingest(env, self.session)
+        self.index = EventIndex(self.events)
+        self.event_ids = {event_id(event) for event in self.events}
+        self.last_bars = {code: bars[-1:] for code, bars in self.prices.items() if bars}
+        self.latest = latest_pick_date(self.last_bars, self.events)
+        with sqlite_conn(self.database_url) as conn:
+            self.universe = open_universe(env, conn, self.name_cache)
+        self._rebuild_picks()
+        report_written(written)
+        print(
+            f"[daemon] eod run: {len(self.prices)} codes, {len(self.events)} events "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _rebuild_picks(self) -> None:
+        self.maintainer = PickMaintainer(self.weights.current, self.last_bars, self.features, self.index, self.latest)
+
+    def refresh_news(self, today: date | None = None) -> int:
+        """Poll the intraday feeds; rebuilds the latest picks if anything changed.
+
+        Returns the number of new events.
+        """
+        started = time.perf_counter()
+        reweighted = self.weights.refresh()
+        fetched = fetch_events(
+            self._feed_env(today or date.today()),
+            self.session,
+            feeds=INTRADAY_FEEDS,
+            universe=self.universe,
+            cache=self.name_cache,
+        )
+        fresh: Dict[str, DetectedEvent] = {}
+        for event in fetched:
+            key = event_id(event)
+            if key not in self.event_ids:
+                fresh.setdefault(key, event)
+        if not fresh and not reweighted:
+            print(f"[daemon] news poll: no new events ({time.perf_counter() - started:.3f}s)")
+            return 0
+
+        new_events = list(fresh.values())
+        self.events.extend(new_events)
+        self.event_ids.update(fresh)
+        self.latest = max([self.latest] + [event.date.date() for event in new_events])
+        with sqlite_conn(self.database_url) as conn:
+            with conn:
+                ensure_symbols(conn, {event.code for event in new_events}, self.universe.names)
+                events_written = upsert_events(conn, new_events)
+            if reweighted or self.maintainer is None or self.maintainer.pick_date != self.latest:
+                # New weights or a new pick date: every code's score changes.
+                self.index.extend(new_events)
+                self._rebuild_picks()
+                picks_written = replace_picks(conn, list(self.maintainer.picks.values()), [self.latest])
+            else:
+                changes = self.maintainer.push_events(new_events)
+                picks_written = write_pick_changes(conn, self.latest, changes)
+        print(
+            f"[daemon] news poll: {len(new_events)} new events"
+            f"{' (weights reloaded)' if reweighted else ''}; CorporateEvent {events_written}; "
+            f"Pick {picks_written} ({time.perf_counter() - started:.3f}s)"
+        )
+        return len(new_events)
+
+    def serve(
+        self,
+        news_interval: float,
+        eod_at: clock_time,
+        clock: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Run the schedule forever; a failing tick is reported and the schedule goes on.
+
+        ``eod_due`` only moves to the next weekday once ``run_eod`` succeeds; a
+        failed end-of-day run is retried on the next tick, ``news_interval``
+        seconds later, in place of a news poll.
+        """
+        self.run_eod()
+        next_news = clock() + timedelta(seconds=news_interval)
+        eod_due = next_eod(clock(), eod_at)
+        while True:
+            now = clock()
+            wake = min(next_news, eod_due)
+            if now < wake:
+                sleep((wake - now).total_seconds())
+                continue
+            try:
+                if now >= eod_due:
+                    self.run_eod(now.date())
+                    eod_due = next_eod(now, eod_at)
+                else:
+                    self.refresh_news(now.date())
+            except Exception as exc:
+                print(f"[daemon] tick failed: {type(exc).__name__}: {exc}")
+            next_news = clock() + timedelta(seconds=news_interval)
+            if eod_due <= now:
+                # The end-of-day run failed: retry it in place of the next news poll.
+                eod_due = next_news
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resident ingest service with warm in-memory state.")
+    parser.add_argument("--once", action="store_true", help="do the initial run and one news poll, then exit")
+    args = parser.parse_args()
+
+    env = load_env()
+    daemon = IngestDaemon(env)
+    if args.once:
+        daemon.run_eod()
+        daemon.refresh_news()
+        return
+    daemon.serve(
+        news_interval=float(env.get("INGEST_NEWS_INTERVAL", "300")),
+        eod_at=clock_time.fromisoformat(env.get("INGEST_EOD_TIME", "15:30")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
 """Feature engineering for ingest job."""
 from __future__ import annotations
 
+import importlib.util
+import math
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
 from statistics import mean, pstdev
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from .adapters.price_adapter import PriceAdapter, PriceBar
+from .rolling import RollingMax, RollingMean, RollingZScore
+
+FEATURE_NAMES = ("volume_z", "gap_pct", "vwap_dev_pct", "supply_demand_proxy", "high20d_dist_pct")
+FEATURE_ENGINES = ("vectorized", "streaming", "reference")
+
+LONG_WINDOW = 20
+SHORT_WINDOW = 5
+
+# numpy is optional: without it only the streaming and reference engines are available.
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
 
 
 @dataclass(slots=True)
@@ -16,60 +30,304 @@ class FeatureRecord:
     value: float
 
 
+class FeatureFrame:
+    """Columnar feature table.
+
+    Rows are ``(code, date)`` pairs held as integer ids into the shared ``codes`` and
+    ``dates`` lists; every feature is one contiguous ``array('d')`` column with NaN
+    for a missing value. A code's rows are contiguous and in date order, so lookups
+    by ``(code, date)`` are a bisect over that span.
+    """
+
+    def __init__(self, names: Sequence[str] = FEATURE_NAMES) -> None:
+        self.names = tuple(names)
+        self.codes: List[str] = []
+        self.code_index: Dict[str, int] = {}
+        self.dates: List[str] = []
+        self.date_index: Dict[str, int] = {}
+        self.row_code = array("i")
+        self.row_date = array("i")
+        self.columns: Dict[str, array] = {name: array("d") for name in self.names}
+        self.spans: List[Tuple[int, int]] = []
+        self._date_rows: Dict[int, array] | None = None
+
+    def __len__(self) -> int:
+        return len(self.row_code)
+
+    def _intern_date(self, day: str) -> int:
+        idx = self.date_index.get(day)
+        if idx is None:
+            idx = len(self.dates)
+            self.dates.append(day)
+            self.date_index[day] = idx
+        return idx
+
+    def append_code(self, code: str, dates: Sequence[str], columns: Mapping[str, Sequence[float]]) -> None:
+        """Append all rows of one code; ``dates`` must be ascending ISO dates."""
+        self.extend_codes([code], [len(dates)], dates, columns)
+
+    def extend_codes(
+        self,
+        codes: Sequence[str],
+        counts: Sequence[int],
+        dates: Iterable[str],
+        columns: Mapping[str, Sequence[float]],
+    ) -> None:
+        """Append the rows of several codes in one pass.
+
+        The next ``counts[i]`` entries of ``dates`` and of every column belong to
+        ``codes[i]``; each code's dates must be ascending.
+        """
+        for code in codes:
+            if code in self.code_index:
+                raise ValueError(f"Code {code} is already in the frame")
+        start = len(self.row_code)
+        total = sum(counts)
+        for code, count in zip(codes, counts):
+            self.code_index[code] = len(self.codes)
+            self.row_code.extend(array("i", [len(self.codes)]) * count)
+            self.codes.append(code)
+            self.spans.append((start, start + count))
+            start += count
+        self.row_date.extend(self._intern_date(day) for day in dates)
+        for name in self.names:
+            values = columns.get(name)
+            column = self.columns[name]
+            if values is None:
+                column.extend(array("d", [math.nan]) * total)
+            elif hasattr(values, "dtype"):
+                # NumPy column: copy the raw float64 buffer instead of boxing each value.
+                column.frombytes(values.astype("float64").tobytes())
+            else:
+                column.extend(values)
+        self._date_rows = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[FeatureRecord], names: Sequence[str] = FEATURE_NAMES) -> "FeatureFrame":
+        grouped: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for record in records:
+            grouped.setdefault(record.code, {}).setdefault(record.date, {})[record.name] = record.value
+        frame = cls(names)
+        for code, by_date in grouped.items():
+            dates = sorted(by_date)
+            frame.append_code(
+                code,
+                dates,
+                {name: [by_date[day].get(name, math.nan) for day in dates] for name in frame.names},
+            )
+        return frame
+
+    def span(self, code: str) -> Tuple[int, int]:
+        """Row range ``[start, end)`` of ``code`` (empty if unknown)."""
+        idx = self.code_index.get(code)
+        return self.spans[idx] if idx is not None else (0, 0)
+
+    def row(self, code: str, day: str) -> int | None:
+        start, end = self.span(code)
+        pos = bisect_left(self.row_date, day, start, end, key=self.dates.__getitem__)
+        if pos < end and self.dates[self.row_date[pos]] == day:
+            return pos
+        return None
+
+    def at(self, row: int | None, name: str) -> float | None:
+        """Value of ``name`` in ``row``; ``None`` when the row or value is missing."""
+        if row is None:
+            return None
+        value = self.columns[name][row]
+        return None if math.isnan(value) else value
+
+    def get(self, code: str, day: str) -> Dict[str, float]:
+        """Present features of ``code`` on ``day`` (empty when there is no row)."""
+        row = self.row(code, day)
+        if row is None:
+            return {}
+        return {name: self.columns[name][row] for name in self.names if not math.isnan(self.columns[name][row])}
+
+    def date_of(self, row: int) -> str:
+        return self.dates[self.row_date[row]]
+
+    def rows_on(self, day: str) -> array:
+        """Rows of every code on ``day``; the date index is built once on first use."""
+        if self._date_rows is None:
+            by_date: Dict[int, array] = {}
+            for row, date_id in enumerate(self.row_date):
+                bucket = by_date.get(date_id)
+                if bucket is None:
+                    bucket = by_date[date_id] = array("i")
+                bucket.append(row)
+            self._date_rows = by_date
+        date_id = self.date_index.get(day)
+        if date_id is None:
+            return array("i")
+        return self._date_rows.get(date_id, array("i"))
+
+    def on_date(self, day: str) -> Dict[str, Dict[str, float]]:
+        return {
+            self.codes[self.row_code[row]]: {
+                name: self.columns[name][row] for name in self.names if not math.isnan(self.columns[name][row])
+            }
+            for row in self.rows_on(day)
+        }
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def records(self) -> Iterator[FeatureRecord]:
+        """Yield present values as records, ordered by code, date, then feature name order."""
+        columns = [(name, self.columns[name]) for name in self.names]
+        for row in range(len(self.row_code)):
+            code = self.codes[self.row_code[row]]
+            day = self.dates[self.row_date[row]]
+            for name, column in columns:
+                value = column[row]
+                if not math.isnan(value):
+                    yield FeatureRecord(code=code, date=day, name=name, value=value)
+
+
+class FeatureStream:
+    """Bar-by-bar feature state for a single code.
+
+    ``update`` consumes a closed bar and returns its features; ``preview`` evaluates
+    a still-forming intraday bar without advancing the windows. Both are O(1).
+    """
+
+    def __init__(self) -> None:
+        self.bars = 0
+        self.prev_close: float | None = None
+        self.volume_z = RollingZScore(LONG_WINDOW)
+        self.volume_short = RollingMean(SHORT_WINDOW)
+        self.volume_long = RollingMean(LONG_WINDOW)
+        self.high = RollingMax(LONG_WINDOW)
+
+    def preview(self, bar: PriceBar) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+        volume_z = self.volume_z.peek(bar.volume)
+        if volume_z is not None:
+            features["volume_z"] = volume_z
+        if self.prev_close is not None:
+            features["gap_pct"] = (bar.open - self.prev_close) / self.prev_close
+        if bar.vwap is not None and bar.vwap != 0:
+            features["vwap_dev_pct"] = (bar.close - bar.vwap) / bar.vwap
+        if self.bars + 1 >= LONG_WINDOW:
+            avg_long = self.volume_long.peek(bar.volume)
+            if avg_long != 0:
+                features["supply_demand_proxy"] = self.volume_short.peek(bar.volume) / avg_long
+        high20 = self.high.peek(bar.close)
+        features["high20d_dist_pct"] = (bar.close / high20) - 1 if high20 else 0
+        return features
+
+    def update(self, bar: PriceBar) -> Dict[str, float]:
+        features = self.preview(bar)
+        self.bars += 1
+        self.prev_close = bar.close
+        self.volume_z.push(bar.volume)
+        self.volume_short.push(bar.volume)
+        self.volume_long.push(bar.volume)
+        self.high.push(bar.close)
+        return features
+
+
 class FeatureCalculator:
-    def __init__(self, price_adapter: PriceAdapter) -> None:
+    """Computes per-bar tape features.
+
+    ``engine="vectorized"`` evaluates a whole code's history with NumPy rolling
+    windows; ``engine="streaming"`` feeds bars one at a time through
+    :class:`FeatureStream`. ``engine="reference"`` is the original bar-by-bar
+    implementation that re-slices the windows on every bar, and is kept to
+    cross-check the other two. All three produce the same records.
+    """
+
+    def __init__(self, price_adapter: PriceAdapter, engine: str | None = None) -> None:
         self.price_adapter = price_adapter
+        if engine is None:
+            engine = "vectorized" if HAS_NUMPY else "streaming"
+        if engine not in FEATURE_ENGINES:
+            raise ValueError(f"Unknown feature engine: {engine}")
+        if engine == "vectorized" and not HAS_NUMPY:
+            raise RuntimeError("The vectorized feature engine requires numpy")
+        self.engine = engine
+
+    def compute(
+        self,
+        prices: Mapping[str, List[PriceBar]] | None = None,
+        warmup: Mapping[str, List[PriceBar]] | None = None,
+    ) -> FeatureFrame:
+        """Compute features for ``prices``.
 
-    def compute(self) -> List[FeatureRecord]:
-        result: List[FeatureRecord] = []
-        prices = self.price_adapter.fetch()
+        ``warmup`` optionally maps a code to the bars immediately preceding
+        ``prices[code]``; they seed the rolling windows but emit no rows, so an
+        incremental run only produces rows for its new bars.
+        """
+        if prices is None:
+            prices = self.price_adapter.fetch()
+        warmup = warmup or {}
+        frame = FeatureFrame()
         for code, bars in prices.items():
-            volumes: List[int] = []
-            closes: List[float] = []
-            for idx, bar in enumerate(bars):
-                volumes.append(bar.volume)
-                closes.append(bar.close)
-
-                twenty_window = volumes[-20:]
-                five_window = volumes[-5:]
-                prev_close = closes[-2] if idx >= 1 else None
-                high20 = max(closes[-20:]) if len(closes) >= 1 else bar.close
-
-                volume_z = self._volume_z(volumes, idx)
-                if volume_z is not None:
-                    result.append(
-                        FeatureRecord(code=code, date=bar.trading_date.isoformat(), name="volume_z", value=volume_z)
-                    )
-                if prev_close is not None:
-                    gap_pct = (bar.open - prev_close) / prev_close
-                    result.append(
-                        FeatureRecord(code=code, date=bar.trading_date.isoformat(), name="gap_pct", value=gap_pct)
-                    )
-                if bar.vwap is not None and bar.vwap != 0:
-                    vwap_dev = (bar.close - bar.vwap) / bar.vwap
-                    result.append(
-                        FeatureRecord(code=code, date=bar.trading_date.isoformat(), name="vwap_dev_pct", value=vwap_dev)
-                    )
-                supply_demand = self._supply_demand(five_window, twenty_window)
-                if supply_demand is not None:
-                    result.append(
-                        FeatureRecord(
-                            code=code,
-                            date=bar.trading_date.isoformat(),
-                            name="supply_demand_proxy",
-                            value=supply_demand,
-                        )
-                    )
-                high20d_dist = (bar.close / high20) - 1 if high20 else 0
-                result.append(
-                    FeatureRecord(
-                        code=code,
-                        date=bar.trading_date.isoformat(),
-                        name="high20d_dist_pct",
-                        value=high20d_dist,
-                    )
-                )
-        return result
+            history = list(warmup.get(code, [])) + list(bars)
+            skip = len(history) - len(bars)
+            if self.engine == "vectorized":
+                columns = self._columns_vectorized(history)
+            elif self.engine == "streaming":
+                columns = self._columns_streaming(history)
+            else:
+                columns = self._columns_reference(history)
+            frame.append_code(
+                code,
+                [bar.trading_date.isoformat() for bar in bars],
+                {name: values[skip:] for name, values in columns.items()},
+            )
+        return frame
+
+    @staticmethod
+    def _columns_vectorized(bars: Sequence[PriceBar]) -> Mapping[str, Sequence[float]]:
+        from . import vectorized
+
+        arrays = vectorized.as_price_arrays(
+            [bar.open for bar in bars],
+            [bar.close for bar in bars],
+            [bar.volume for bar in bars],
+            [bar.vwap for bar in bars],
+        )
+        return vectorized.compute_feature_arrays(arrays["open"], arrays["close"], arrays["volume"], arrays["vwap"])
+
+    @staticmethod
+    def _columns_streaming(bars: Sequence[PriceBar]) -> Mapping[str, Sequence[float]]:
+        stream = FeatureStream()
+        columns: Dict[str, array] = {name: array("d") for name in FEATURE_NAMES}
+        for bar in bars:
+            features = stream.update(bar)
+            for name, column in columns.items():
+                column.append(features.get(name, math.nan))
+        return columns
+
+    def _columns_reference(self, bars: Sequence[PriceBar]) -> Mapping[str, Sequence[float]]:
+        columns: Dict[str, array] = {name: array("d") for name in FEATURE_NAMES}
+        volumes: List[int] = []
+        closes: List[float] = []
+        for idx, bar in enumerate(bars):
+            volumes.append(bar.volume)
+            closes.append(bar.close)
+
+            twenty_window = volumes[-20:]
+            five_window = volumes[-5:]
+            prev_close = closes[-2] if idx >= 1 else None
+            high20 = max(closes[-20:]) if len(closes) >= 1 else bar.close
+
+            features: Dict[str, float] = {}
+            volume_z = self._volume_z(volumes, idx)
+            if volume_z is not None:
+                features["volume_z"] = volume_z
+            if prev_close is not None:
+                features["gap_pct"] = (bar.open - prev_close) / prev_close
+            if bar.vwap is not None and bar.vwap != 0:
+                features["vwap_dev_pct"] = (bar.close - bar.vwap) / bar.vwap
+            supply_demand = self._supply_demand(five_window, twenty_window)
+            if supply_demand is not None:
+                features["supply_demand_proxy"] = supply_demand
+            features["high20d_dist_pct"] = (bar.close / high20) - 1 if high20 else 0
+            for name, column in columns.items():
+                column.append(features.get(name, math.nan))
+        return columns
 
     def _volume_z(self, volumes: List[int], idx: int) -> Optional[float]:
         window = volumes[-20:]
@@ -0,0 +1,280 @@
+"""Local stand-in for the TDnet list, news, earnings and symbol feeds.
+
+Serves a directory in the ``data/sample`` formats (``jobs.ingest.synthetic``
+output or ``data/sample`` itself) over HTTP so ``main()`` can be load-tested
+offline:
+
+- ``/tdnet/I_list_NNN_YYYYMMDD.html``: that day's TDNET rows in the TDnet
+  list markup (``kj*`` cells, newest first), split over ``pages`` pages that
+  link to each other with pager elements;
+- ``/news.json`` and ``/news.html`` (``table.s_news_list``): the news items;
+- ``/earnings.json``: the EARNINGS rows of ``events.csv``;
+- ``/symbols.csv`` and ``/stock/?code=XXXX``: the master list and profile pages.
+
+Every request waits ``latency`` (plus up to ``jitter``) seconds and fails with
+a 503 at ``error_rate``; the failures are drawn from a seeded generator.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.feed_server --data .cache/synthetic --pages 10 --latency-ms 50 --error-rate 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import html
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import EARNINGS_WINDOW, NEWS_WINDOW, announce_time
+
+LIST_PATH = re.compile(r"^/tdnet/I_list_(\d{3})_(\d{8})\.html$")
+
+
+class FeedData:
+    """The feeds of one data directory, with announcement times restored."""
+
+    def __init__(self, directory: str | Path, feed_days: int = 0) -> None:
+        directory = Path(directory)
+        with (directory / "symbols.csv").open("r", encoding="utf-8", newline="") as fp:
+            self.symbols = list(csv.DictReader(fp))
+        self.names = {row["code"]: row.get("name") or row["code"] for row in self.symbols}
+        # Day -> (time, code, title) rows.
+        self.tdnet: Dict[str, List[Tuple[str, str, str]]] = defaultdict(list)
+        self.earnings: List[Dict[str, str]] = []
+        with (directory / "events.csv").open("r", encoding="utf-8", newline="") as fp:
+            for row in csv.DictReader(fp):
+                day = date.fromisoformat(row["date"][:10])
+                if row["type"] == "TDNET":
+                    when = announce_time(day, row["code"], row["title"])
+                    self.tdnet[f"{day:%Y%m%d}"].append((f"{when:%H:%M}", row["code"], row["title"]))
+                elif row["type"] == "EARNINGS":
+                    when = announce_time(day, row["code"], row["title"], EARNINGS_WINDOW)
+                    self.earnings.append({**_feed_row(row), "date": when.isoformat()})
+        self.news = []
+        for entry in json.loads((directory / "news.json").read_text(encoding="utf-8")):
+            when = announce_time(date.fromisoformat(entry["date"][:10]), entry["code"], entry["title"], NEWS_WINDOW)
+            self.news.append({**entry, "date": when.isoformat()})
+        for rows in self.tdnet.values():
+            rows.sort(reverse=True)
+        dated = self.earnings + self.news
+        self.latest = max([*self.tdnet, *(item["date"][:10].replace("-", "") for item in dated)], default="")
+        if feed_days:
+            # Like the real feeds, keep only the trailing window of days.
+            first = sorted({item["date"][:10] for item in dated})[-feed_days:][:1] or [""]
+            self.earnings = [item for item in self.earnings if item["date"][:10] >= first[0]]
+            self.news = [item for item in self.news if item["date"][:10] >= first[0]]
+        self.earnings.reverse()
+        self.news.reverse()
+
+    def list_page(self, day: str, page: int, pages: int) -> bytes | None:
+        rows = self.tdnet.get(day, [])
+        per_page = max(1, -(-len(rows) // pages))
+        chunk = rows[(page - 1) * per_page : page * per_page]
+        total = max(1, -(-len(rows) // per_page))
+        if page > total:
+            return None
+        cells = "".join(
+            f'<tr><td class="oddnew-L kjTime" noWrap>{hhmm}</td><td class="oddnew-M kjCode">{code}0</td>'
+            f'<td class="oddnew-M kjName">{html.escape(self.names.get(code, code))}</td>'
+            f'<td class="oddnew-M kjTitle" align="left"><a href="{_pdf_name(day, hhmm, code)}.pdf" target="_blank">'
+            f"{html.escape(title)}</a></td><td class=\"oddnew-M kjXbrl\"></td></tr>\n"
+            for hhmm, code, title in chunk
+        )
+        pager = "".join(
+            f"<div class=\"pager-M\" onclick=\"pagerLink('I_list_{num:03d}_{day}.html')\">{num}</div>"
+            for num in range(1, total + 1)
+            if num != page
+        )
+        return (
+            f"<html><head><title>適時開示情報閲覧サービス</title></head><body>{pager}"
+            f'<table id="main-list-table">{cells}</table></body></html>'
+        ).encode()
+
+    def news_page(self) -> bytes:
+        rows = "".join(
+            f'<tr><td class="news_time"><time datetime="{item["date"]}+09:00">'
+            f'{item["date"][2:10].replace("-", "/")}&nbsp;{item["date"][11:16]}</time></td>'
+            f'<td class="oncodetip_code-data1" data-code="{item["code"]}">{item["code"]}</td>'
+            f'<td><a href="{html.escape(item.get("url") or "#")}">{html.escape(item["title"])}</a></td></tr>\n'
+            for item in self.news
+        )
+        return (
+            "<html><head><title>ニュース</title></head><body>"
+            f'<table class="s_news_list mgbt0">\n{rows}</table></body></html>'
+        ).encode()
+
+
+def _feed_row(row: Mapping[str, str]) -> Dict[str, str]:
+    return {"code": row["code"], "title": row["title"], "summary": row.get("summary") or ""}
+
+
+def _pdf_name(day: str, hhmm: str, code: str) -> str:
+    return f"{day}{hhmm.replace(':', '')}{code}"
+
+
+class FeedServer:
+    """``ThreadingHTTPServer`` over a :class:`FeedData`; use as a context manager."""
+
+    def __init__(
+        self,
+        data: FeedData,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pages: int = 1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 7,
+    ) -> None:
+        self.data = data
+        self.pages = max(1, pages)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self, day: str | None = None) -> Dict[str, str]:
+        """Feed settings pointing the ingest job at this server (TDnet list of ``day``, default latest)."""
+        return {
+            "TDNET_RSS_URL": f"{self.url}/tdnet/I_list_001_{day or self.data.latest}.html",
+            "NEWS_FEED_URL": f"{self.url}/news.json",
+            "EARNINGS_FEED_URL": f"{self.url}/earnings.json",
+            "SYMBOLS_CSV_URL": f"{self.url}/symbols.csv",
+            "SYMBOL_PROFILE_URL_TEMPLATE": f"{self.url}/stock/?code={{code}}",
+        }
+
+    def start(self) -> "FeedServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FeedServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _delay_and_fail(self) -> bool:
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter) if self.jitter else self.latency
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def respond(self, path: str) -> Tuple[int, str, bytes]:
+        url = urlparse(path)
+        data = self.data
+        match = LIST_PATH.match(url.path)
+        if match:
+            body = data.list_page(match.group(2), int(match.group(1)), self.pages)
+            return (200, "text/html; charset=utf-8", body) if body is not None else (404, "text/plain", b"")
+        if url.path == "/news.json":
+            return 200, "application/json", json.dumps(data.news, ensure_ascii=False).encode()
+        if url.path == "/news.html":
+            return 200, "text/html; charset=utf-8", data.news_page()
+        if url.path == "/earnings.json":
+            return 200, "application/json", json.dumps(data.earnings, ensure_ascii=False).encode()
+        if url.path == "/symbols.csv":
+            lines = ["code,name,sector"] + [
+                ",".join(row.get(key) or "" for key in ("code", "name", "sector")) for row in data.symbols
+            ]
+            return 200, "text/csv; charset=utf-8", ("\n".join(lines) + "\n").encode()
+        if url.path == "/stock/":
+            code = (parse_qs(url.query).get("code") or [""])[0]
+            if code in data.names:
+                title = f"<title>{html.escape(data.names[code])}【{code}】</title>"
+                return 200, "text/html; charset=utf-8", title.encode()
+        return 404, "text/plain", b""
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                route = urlparse(self.path).path
+                route = "/tdnet/" if route.startswith("/tdnet/") else route
+                with server._lock:
+                    server.requests[route] += 1
+                if server._delay_and_fail():
+                    with server._lock:
+                        server.errors[route] += 1
+                    status, content_type, body = 503, "text/plain", b"injected failure"
+                else:
+                    status, content_type, body = server.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve stand-in TDnet/news/earnings feeds from a data directory.")
+    parser.add_argument("--data", default=".cache/synthetic", help="directory written by jobs.ingest.synthetic")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=1, help="TDnet list pages per day")
+    parser.add_argument("--feed-days", type=int, default=0, help="trailing news/earnings days to serve (0: all)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server = FeedServer(
+        FeedData(args.data, feed_days=args.feed_days),
+        host=args.host,
+        port=args.port,
+        pages=args.pages,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"[feed-server] serving {args.data} at {server.url}; ingest with:")
+    for key, value in {"SAMPLE_DATA_DIR": str(Path(args.data).resolve()), **server.env()}.items():
+        print(f"{key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        for label, counts in (("requests", server.requests), ("errors", server.errors)):
+            print(f"[feed-server] {label}: " + ", ".join(f"{route}={count}" for route, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Concurrent adapter fetch stage with per-source timeouts and a global deadline."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LIVE = "live"
+FALLBACK = "fallback"
+TIMED_OUT = "timed_out"
+
+
+@dataclass(slots=True)
+class FetchSource:
+    """One feed: an optional live fetcher plus the local fallback reader."""
+
+    name: str
+    live: Optional[Callable[[], List[object]]]
+    fallback: Callable[[], List[object]]
+    # TDnet treats an empty live list as a valid answer; other feeds fall back.
+    accept_empty: bool = False
+
+
+@dataclass(slots=True)
+class FetchOutcome:
+    name: str
+    status: str
+    items: List[object] = field(default_factory=list)
+    elapsed: float = 0.0
+    detail: str = ""
+
+
+def _timed(fetch: Callable[[], List[object]]) -> Tuple[List[object], float]:
+    started = time.monotonic()
+    items = fetch()
+    return items, time.monotonic() - started
+
+
+def run_fetch_stage(
+    sources: Sequence[FetchSource],
+    deadline: float = 30.0,
+    source_timeout: float = 15.0,
+) -> Dict[str, FetchOutcome]:
+    """Fetch every live source concurrently and fall back per source.
+
+    Each source gets ``source_timeout`` seconds, and nothing is waited on past
+    ``deadline`` seconds from the start of the stage. A late or failing source
+    falls back to its local data without holding up the others.
+    """
+    started = time.monotonic()
+    live_sources = [source for source in sources if source.live is not None]
+    pool = ThreadPoolExecutor(max_workers=max(len(live_sources), 1), thread_name_prefix="fetch")
+    futures: Dict[str, Future] = {source.name: pool.submit(_timed, source.live) for source in live_sources}
+
+    outcomes: Dict[str, FetchOutcome] = {}
+    try:
+        for source in sources:
+            future = futures.get(source.name)
+            if future is None:
+                outcomes[source.name] = FetchOutcome(
+                    source.name, FALLBACK, source.fallback(), detail="no live source configured"
+                )
+                continue
+            waited = time.monotonic() - started
+            remaining = max(min(source_timeout, deadline) - waited, 0.0)
+            try:
+                items, elapsed = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                outcomes[source.name] = FetchOutcome(
+                    source.name,
+                    TIMED_OUT,
+                    source.fallback(),
+                    elapsed=time.monotonic() - started,
+                    detail="served local fallback",
+                )
+                continue
+            except Exception as exc:
+                outcomes[source.name] = FetchOutcome(
+                    source.name,
+                    FALLBACK,
+                    source.fallback(),
+                    elapsed=time.monotonic() - started,
+                    detail=f"{type(exc).__name__}: {exc}",
+                )
+                continue
+            if items or source.accept_empty:
+                outcomes[source.name] = FetchOutcome(source.name, LIVE, items, elapsed=elapsed)
+            else:
+                outcomes[source.name] = FetchOutcome(
+                    source.name, FALLBACK, source.fallback(), elapsed=elapsed, detail="live feed returned no items"
+                )
+    finally:
+        # Do not block on stragglers; their requests are bounded by the adapter timeout.
+        pool.shutdown(wait=False, cancel_futures=True)
+    return outcomes
+
+
+def report_fetch_stage(outcomes: Dict[str, FetchOutcome]) -> None:
+    for outcome in outcomes.values():
+        line = f"[fetch] {outcome.name}: {outcome.status} ({len(outcome.items)} items, {outcome.elapsed:.2f}s)"
+        if outcome.detail:
+            line += f" - {outcome.detail}"
+        print(line)
@@ -0,0 +1,117 @@
+"""Helpers for incremental ingest runs that only process new trading dates."""
+from __future__ import annotations
+
+import sqlite3
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+from typing import Dict, List, Mapping, Tuple
+
+from .adapters.price_adapter import PriceBar
+from .features import FeatureFrame, FeatureRecord
+from .rules import DetectedEvent
+from .utils.db import parse_db_date
+
+WARMUP_BARS = 20
+
+
+def to_db_date(value: date) -> str:
+    """Encode a trading date the way ``upsert_prices``/``upsert_features`` store it."""
+    return datetime.combine(value, datetime.min.time(), tzinfo=timezone.utc).isoformat()
+
+
+def last_feature_dates(conn: sqlite3.Connection) -> Dict[str, date]:
+    """Latest stored Feature date of every code, in one grouped query."""
+    rows = conn.execute('SELECT code, MAX(date) FROM "Feature" GROUP BY code')
+    return {code: parse_db_date(last) for code, last in rows if last is not None}
+
+
+def load_price_tail(conn: sqlite3.Connection, code: str, before: date, limit: int = WARMUP_BARS) -> List[PriceBar]:
+    """Return up to ``limit`` stored bars strictly before ``before``, oldest first."""
+    rows = conn.execute(
+        'SELECT date, open, high, low, close, volume, vwap FROM "DailyPrice" '
+        "WHERE code = ? AND date < ? ORDER BY date DESC LIMIT ?",
+        (code, to_db_date(before), limit),
+    ).fetchall()
+    bars = [
+        PriceBar(
+            trading_date=parse_db_date(row[0]),
+            code=code,
+            open=float(row[1]),
+            high=float(row[2]),
+            low=float(row[3]),
+            close=float(row[4]),
+            volume=int(row[5]),
+            vwap=float(row[6]) if row[6] is not None else None,
+        )
+        for row in rows
+    ]
+    bars.reverse()
+    return bars
+
+
+def split_new_bars(
+    conn: sqlite3.Connection,
+    prices: Mapping[str, List[PriceBar]],
+) -> Tuple[Dict[str, List[PriceBar]], Dict[str, List[PriceBar]]]:
+    """Split ``prices`` into bars newer than the stored features and their warm-up window.
+
+    Returns ``(new_bars, warmup)``. Codes without new bars are omitted from both, so
+    the cost of a run is bounded by the number of new bars rather than history size.
+    ``prices`` must be in date order (as ``PriceAdapter.fetch`` returns them). The
+    warm-up bars are the ``WARMUP_BARS`` bars before the first new one in
+    ``prices`` itself, so they carry the same values a full run sees; DailyPrice
+    (stored rounded to 2 decimals) is only read for a code whose in-memory
+    history is shorter than that.
+    """
+    last_dates = last_feature_dates(conn)
+    new_bars: Dict[str, List[PriceBar]] = {}
+    warmup: Dict[str, List[PriceBar]] = {}
+    for code, bars in prices.items():
+        last = last_dates.get(code)
+        start = 0 if last is None else bisect_right(bars, last, key=lambda bar: bar.trading_date)
+        if start == len(bars):
+            continue
+        new_bars[code] = bars[start:]
+        if last is None:
+            continue
+        if start >= WARMUP_BARS:
+            warmup[code] = bars[start - WARMUP_BARS : start]
+        else:
+            warmup[code] = load_price_tail(conn, code, bars[start].trading_date)
+    return new_bars, warmup
+
+
+def load_features_since(conn: sqlite3.Connection, since: date) -> FeatureFrame:
+    """Load stored features on or after ``since`` (used as scoring/spike context)."""
+    rows = conn.execute(
+        'SELECT code, date, name, value FROM "Feature" WHERE date >= ? ORDER BY code, date',
+        (to_db_date(since),),
+    ).fetchall()
+    return FeatureFrame.from_records(
+        FeatureRecord(code=row[0], date=parse_db_date(row[1]).isoformat(), name=row[2], value=float(row[3]))
+        for row in rows
+    )
+
+
+def load_spikes_since(conn: sqlite3.Connection, since: date) -> List[DetectedEvent]:
+    """Load stored VOL_SPIKE events on or after ``since``."""
+    since_ms = int(datetime.combine(since, datetime.min.time()).timestamp() * 1000)
+    rows = conn.execute(
+        'SELECT code, date, title, summary, source, scoreRaw FROM "CorporateEvent" '
+        "WHERE type = 'VOL_SPIKE' AND date >= ? ORDER BY code, date",
+        (since_ms,),
+    ).fetchall()
+    return [
+        DetectedEvent(
+            code=row[0],
+            # upsert_events stores naive datetimes as local epoch milliseconds.
+            date=datetime.fromtimestamp(row[1] / 1000),
+            type="VOL_SPIKE",
+            tag="VOL_SPIKE",
+            title=row[2],
+            summary=row[3],
+            source=row[4],
+            score_raw=row[5],
+        )
+        for row in rows
+    ]
@@ -4,31 +4,61 @@ from __future__ import annotations
 import csv
 import io
 import json
-import re
+import math
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Sequence
-
-import requests
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
 
 from .adapters.earnings_adapter import EarningsAdapter
 from .adapters.news_adapter import NewsAdapter
 from .adapters.price_adapter import PriceAdapter, PriceBar
 from .adapters.tdnet_rss_adapter import TdnetRssAdapter
-from .features import FeatureCalculator, FeatureRecord
-from .rules import DetectedEvent, detect_earnings, detect_news, detect_tdnet, detect_volume_spike, to_feature_map
-from .scoring import ScoreComponents, calculate_score, load_weights
-from .utils.db import clear_table, replace_many, sqlite_conn
-from .utils.env import load_env
+from .features import FeatureCalculator, FeatureFrame
+from .fetch_stage import LIVE, FetchSource, report_fetch_stage, run_fetch_stage
+from .incremental import load_features_since, load_spikes_since, split_new_bars
+from .rules import (
+    DetectedEvent,
+    EventIndex,
+    detect_earnings,
+    detect_news,
+    detect_tdnet,
+    detect_volume_spike,
+    spike_thresholds,
+)
+from .scoring import (
+    ScoreComponents,
+    WeightConfig,
+    calculate_score,
+    frame_batch_inputs,
+    frame_inputs,
+    load_weights,
+    score_batch,
+)
+from .symbol_universe import SymbolUniverse, extract_codes, load_universe, write_master
+from .utils.db import UpsertStats, sqlite_conn, upsert_many
+from .utils.env import env_flag, load_env
+from .utils.html import page_title
+from .utils.http import CachingSession, HostRateLimiter, HttpCache, LazySession, new_session
+from .utils.name_cache import SymbolNameCache
+
+if TYPE_CHECKING:
+    import requests
 
 ROOT = Path(__file__).resolve().parents[2]
+PICK_LOOKBACK_DAYS = 10
+
 
+def sample_file(env: Mapping[str, str], name: str) -> str | None:
+    """``name`` under ``SAMPLE_DATA_DIR`` (e.g. a synthetic market); ``None`` selects data/sample."""
+    directory = env.get("SAMPLE_DATA_DIR")
+    return str(Path(directory) / name) if directory else None
 
-def read_symbols_local() -> List[Dict[str, str]]:
+
+def read_symbols_local(env: Mapping[str, str] | None = None) -> List[Dict[str, str]]:
     """Read fallback symbols from the local sample CSV."""
-    symbols_path = ROOT / "data" / "sample" / "symbols.csv"
+    symbols_path = Path(sample_file(env or {}, "symbols.csv") or ROOT / "data" / "sample" / "symbols.csv")
     if not symbols_path.exists():
         return []
     with symbols_path.open("r", encoding="utf-8") as fp:
@@ -44,47 +74,88 @@ def fetch_text(session: requests.Session, url: str, timeout: int = 15) -> str:
     return resp.text
 
 
+def fetch_symbol_name(
+    session: requests.Session,
+    code: str,
+    template: str,
+    headers: Mapping[str, str],
+    limiter: HostRateLimiter,
+    html_backend: str | None = None,
+) -> str | None:
+    """Look up one company name from its profile page; ``None`` if it cannot be resolved."""
+    url = template.format(code=code)
+    try:
+        limiter.wait(url)
+        resp = session.get(url, timeout=15, headers=headers)
+        resp.raise_for_status()
+        title = page_title(resp.text, html_backend)
+        if title and "【" in title:
+            name = title.split("【", 1)[0].strip()
+            return name if name else None
+    except Exception:
+        pass
+    return None
+
+
+def open_name_cache(env: Mapping[str, str]) -> SymbolNameCache:
+    path = env.get("SYMBOL_CACHE_PATH") or str(ROOT / ".cache" / "symbol_names.sqlite")
+    ttl_days = float(env.get("SYMBOL_CACHE_TTL_DAYS", "30"))
+    missing_ttl_days = float(env.get("SYMBOL_MISSING_TTL_DAYS", "7"))
+    return SymbolNameCache(path, ttl_seconds=ttl_days * 24 * 3600, missing_ttl_seconds=missing_ttl_days * 24 * 3600)
+
+
 def resolve_symbol_names(
     session: requests.Session,
     codes: Sequence[str],
     env: Mapping[str, str],
+    known: Mapping[str, str] | None = None,
+    cache: SymbolNameCache | None = None,
 ) -> Dict[str, str]:
+    """Resolve company names, fetching only codes missing from ``known`` and ``cache``.
+
+    Lookups run on a bounded thread pool (``SYMBOL_RESOLVE_CONCURRENCY``) and are
+    throttled per host (``SYMBOL_RESOLVE_RATE`` requests/second). Unresolvable codes
+    map to themselves and are not cached, so they are retried on the next run.
+    """
     template = env.get("SYMBOL_PROFILE_URL_TEMPLATE", "https://kabutan.jp/stock/?code={code}")
     headers = {"User-Agent": env.get("HTTP_USER_AGENT", "kabu4-ingest/1.0")}
     result: Dict[str, str] = {}
     for code in codes:
-        url = template.format(code=code)
-        try:
-            resp = session.get(url, timeout=15, headers=headers)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
-            title_tag = soup.find("title")
-            if title_tag and "【" in title_tag.text:
-                name = title_tag.text.split("【", 1)[0].strip()
-                result[code] = name if name else code
-                continue
-        except Exception:
-            pass
-        result[code] = code
-    return result
+        name = (known or {}).get(code)
+        if name and name != code:
+            result[code] = name
+    if cache is not None:
+        result.update(cache.get_many(code for code in codes if code not in result))
+    pending = [code for code in dict.fromkeys(codes) if code not in result]
+
+    fetched: Dict[str, str] = {}
+    if pending:
+        limiter = HostRateLimiter(float(env.get("SYMBOL_RESOLVE_RATE", "4")))
+        concurrency = max(1, int(env.get("SYMBOL_RESOLVE_CONCURRENCY", "8")))
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(pending))) as pool:
+            html_backend = env.get("HTML_PARSER_BACKEND")
+            names = pool.map(
+                lambda code: fetch_symbol_name(session, code, template, headers, limiter, html_backend), pending
+            )
+            fetched = {code: name for code, name in zip(pending, names) if name}
+        if cache is not None:
+            cache.put_many(fetched)
+    result.update(fetched)
+    return {code: result.get(code, code) for code in codes}
 
 
-def fetch_web_symbols(
-    env: Mapping[str, str],
-    recent_events: List[DetectedEvent],
-    session: requests.Session,
-) -> List[Dict[str, str]]:
-    """Try to resolve symbols from the internet.
+def symbol_master_path(env: Mapping[str, str]) -> Path:
+    return Path(env.get("SYMBOL_MASTER_PATH") or ROOT / ".cache" / "symbol_master.csv")
+
+
+def fetch_symbol_master(env: Mapping[str, str], session: requests.Session) -> List[Dict[str, str]]:
+    """Full symbol list from ``SYMBOLS_CSV_URL`` or ``SYMBOLS_JSON_URL``; empty if neither answers.
 
-    Strategy (in order):
     - SYMBOLS_CSV_URL: CSV with headers code,name[,sector]
     - SYMBOLS_JSON_URL: JSON array of {code,name,sector?} or [code,...]
-    - TDNET_RSS_URL (HTML page): extract 4-digit codes from page text
-    - Fallback to codes seen in recent_events (name omitted)
     """
     csv_url = env.get("SYMBOLS_CSV_URL")
     json_url = env.get("SYMBOLS_JSON_URL")
-    tdnet_url = env.get("TDNET_RSS_URL")
 
     # CSV source
     if csv_url:
@@ -130,15 +201,77 @@ def fetch_web_symbols(
                 return out
         except Exception:
             pass
+    return []
+
+
+def lookup_symbols(
+    env: Mapping[str, str],
+    session: requests.Session,
+    codes: Sequence[str],
+    cache: SymbolNameCache | None = None,
+) -> Dict[str, str]:
+    """Resolve a batch of unknown codes; returns only the codes that exist.
+
+    A configured master list is fetched once (and cached at
+    ``SYMBOL_MASTER_PATH``) and answers the whole batch. Otherwise the profile
+    pages of the codes not recently found missing are looked up together, and
+    the misses are remembered in ``cache``.
+    """
+    master = fetch_symbol_master(env, session)
+    if master:
+        write_master(symbol_master_path(env), master)
+        names = {symbol["code"]: symbol["name"] for symbol in master}
+        return {code: names[code] for code in codes if code in names}
+    missing = cache.get_missing(codes) if cache is not None else set()
+    wanted = [code for code in codes if code not in missing]
+    names = resolve_symbol_names(session, wanted, env, cache=cache) if wanted else {}
+    found = {code: name for code, name in names.items() if name != code}
+    if cache is not None:
+        cache.put_missing(code for code in wanted if code not in found)
+    return found
+
+
+def open_universe(env: Mapping[str, str], conn, cache: SymbolNameCache | None = None) -> SymbolUniverse:
+    return load_universe(conn, symbol_master_path(env), cache.all_names() if cache is not None else None)
+
+
+def fetch_web_symbols(
+    env: Mapping[str, str],
+    recent_events: List[DetectedEvent],
+    session: requests.Session,
+    known: Mapping[str, str] | None = None,
+    cache: SymbolNameCache | None = None,
+    universe: SymbolUniverse | None = None,
+) -> List[Dict[str, str]]:
+    """Try to resolve symbols from the internet.
+
+    Strategy (in order):
+    - SYMBOLS_CSV_URL / SYMBOLS_JSON_URL: the master list (see ``fetch_symbol_master``)
+    - TDNET_RSS_URL (HTML page): extract 4-digit codes from page text, keeping
+      those in ``universe`` (unknown ones are resolved in one batch first)
+    - Fallback to codes seen in recent_events (name omitted)
+    """
+    tdnet_url = env.get("TDNET_RSS_URL")
+
+    master = fetch_symbol_master(env, session)
+    if master:
+        write_master(symbol_master_path(env), master)
+        return master
+
+    if universe is not None:
+        known = {**universe.names, **(known or {})}
 
     # TDNET page codes
     if tdnet_url:
         try:
             html = fetch_text(session, tdnet_url)
-            # Extract 4-digit codes that likely represent JP equity codes
-            codes = sorted({m.group(0) for m in re.finditer(r"(?<!\d)(\d{4})(?!\d)", html)})
+            codes = extract_codes(html)
+            if universe is not None:
+                universe.admit(codes)
+                universe.resolve_pending(lambda pending: lookup_symbols(env, session, pending, cache=cache))
+                codes = [code for code in codes if code in universe]
             if codes:
-                names = resolve_symbol_names(session, codes, env)
+                names = resolve_symbol_names(session, codes, env, known=known, cache=cache)
                 return [
                     {
                         "code": c,
@@ -153,16 +286,21 @@ def fetch_web_symbols(
     codes = sorted({ev.code for ev in recent_events if ev.code})
     if not codes:
         return []
-    names = resolve_symbol_names(session, codes, env)
+    names = resolve_symbol_names(session, codes, env, known=known, cache=cache)
     return [{"code": c, "name": names.get(c, c)} for c in codes]
 
 
-def upsert_symbols(conn, symbols: Iterable[Mapping[str, str]]) -> None:
+def load_symbol_names(conn) -> Dict[str, str]:
+    """Names already stored in the Symbol table (placeholder names equal to the code are skipped)."""
+    return {row[0]: row[1] for row in conn.execute('SELECT code, name FROM "Symbol" WHERE name != code')}
+
+
+def upsert_symbols(conn, symbols: Iterable[Mapping[str, str]]) -> UpsertStats:
     rows = [(row["code"], row["name"], row.get("sector")) for row in symbols]
-    replace_many(conn, "Symbol", ("code", "name", "sector"), rows)
+    return upsert_many(conn, "Symbol", ("code", "name", "sector"), ("code",), rows)
 
 
-def upsert_prices(conn, prices: Mapping[str, List[PriceBar]]) -> None:
+def upsert_prices(conn, prices: Mapping[str, List[PriceBar]]) -> UpsertStats:
     rows = []
     for code, bars in prices.items():
         for bar in bars:
@@ -179,36 +317,47 @@ def upsert_prices(conn, prices: Mapping[str, List[PriceBar]]) -> None:
                     f"{bar.vwap:.2f}" if bar.vwap is not None else None,
                 )
             )
-    replace_many(
+    return upsert_many(
         conn,
         "DailyPrice",
         ("code", "date", "open", "high", "low", "close", "volume", "vwap"),
+        ("code", "date"),
         rows,
     )
 
 
-def upsert_features(conn, features: Iterable[FeatureRecord]) -> None:
-    rows = [
-        (
-            feature.code,
-            datetime.fromisoformat(feature.date).replace(tzinfo=timezone.utc).isoformat(),
-            feature.name,
-            feature.value,
-        )
-        for feature in features
-    ]
-    replace_many(conn, "Feature", ("code", "date", "name", "value"), rows)
+def feature_rows(features: FeatureFrame) -> Iterator[Tuple[str, str, str, float]]:
+    # Encode each distinct date once instead of once per feature value.
+    encoded = [datetime.fromisoformat(day).replace(tzinfo=timezone.utc).isoformat() for day in features.dates]
+    columns = [(name, features.column(name)) for name in features.names]
+    for row, (code_id, date_id) in enumerate(zip(features.row_code, features.row_date)):
+        code = features.codes[code_id]
+        day = encoded[date_id]
+        for name, column in columns:
+            value = column[row]
+            if not math.isnan(value):
+                yield code, day, name, value
+
+
+def upsert_features(conn, features: FeatureFrame) -> UpsertStats:
+    return upsert_many(
+        conn, "Feature", ("code", "date", "name", "value"), ("code", "date", "name"), feature_rows(features)
+    )
+
+
+def event_id(event: DetectedEvent) -> str:
+    """Primary key of ``event`` in the CorporateEvent table."""
+    return f"{event.code}-{event.date.date().isoformat()}-{event.tag}-{event.source}"
 
 
-def upsert_events(conn, events: Iterable[DetectedEvent]) -> None:
+def upsert_events(conn, events: Iterable[DetectedEvent]) -> UpsertStats:
     rows = []
     for event in events:
-        event_id = f"{event.code}-{event.date.date().isoformat()}-{event.tag}-{event.source}"
         # Store as epoch milliseconds to stay consistent with Prisma's SQLite representation
         epoch_ms = int(event.date.timestamp() * 1000)
         rows.append(
             (
-                event_id,
+                event_id(event),
                 event.code,
                 epoch_ms,
                 event.type,
@@ -218,118 +367,158 @@ def upsert_events(conn, events: Iterable[DetectedEvent]) -> None:
                 event.score_raw,
             )
         )
-    replace_many(
+    return upsert_many(
         conn,
         "CorporateEvent",
         ("id", "code", "date", "type", "title", "summary", "source", "scoreRaw"),
+        ("id",),
         rows,
     )
 
 
+def delete_events(conn, events: Iterable[DetectedEvent]) -> int:
+    """Delete ``events`` from the CorporateEvent table; returns the number of rows removed."""
+    ids = [(event_id(event),) for event in events]
+    before = conn.total_changes
+    conn.executemany('DELETE FROM "CorporateEvent" WHERE id = ?', ids)
+    return conn.total_changes - before
+
+
+def latest_pick_date(prices: Mapping[str, List[PriceBar]], events: Iterable[DetectedEvent]) -> date:
+    """Date the daily picks are built for: the newest price bar or event."""
+    price_dates = [bar.trading_date for price_list in prices.values() for bar in price_list]
+    event_dates = [ev.date.date() for ev in events]
+    candidate_dates = price_dates + event_dates
+    return max(candidate_dates) if candidate_dates else date.today()
+
+
+def pick_dates(
+    env: Mapping[str, str],
+    prices: Mapping[str, List[PriceBar]],
+    events: Iterable[DetectedEvent],
+) -> List[date]:
+    """Dates to (re)build picks for.
+
+    Defaults to the latest price/event date. ``PICK_DATE_FROM`` (and optionally
+    ``PICK_DATE_TO``, default the latest date) rebuild every date in that range
+    that has a price bar or an event.
+    """
+    events = list(events)
+    latest = latest_pick_date(prices, events)
+    start = env.get("PICK_DATE_FROM")
+    if not start:
+        return [latest]
+    first = date.fromisoformat(start)
+    last = date.fromisoformat(env["PICK_DATE_TO"]) if env.get("PICK_DATE_TO") else latest
+    known = {bar.trading_date for price_list in prices.values() for bar in price_list}
+    known.update(ev.date.date() for ev in events)
+    return sorted(day for day in known if first <= day <= last)
+
+
 def build_daily_picks(
     weights_env: Mapping[str, str],
     prices: Mapping[str, List[PriceBar]],
-    features: Iterable[FeatureRecord],
+    features: FeatureFrame,
     events: List[DetectedEvent],
+    dates: Sequence[date] | None = None,
+    weights: WeightConfig | None = None,
+    index: EventIndex | None = None,
 ) -> List[Dict[str, object]]:
-    weights = load_weights(weights_env)
-    feature_map = to_feature_map(features)
-    price_dates = [bar.trading_date for price_list in prices.values() for bar in price_list]
-    event_dates = [ev.date.date() for ev in events]
-    candidate_dates = price_dates + event_dates
-    latest_date = max(candidate_dates) if candidate_dates else date.today()
-    latest_iso = latest_date.isoformat()
+    """Score every code on each of ``dates`` (default: the latest price/event date).
 
-    events_by_code: Dict[str, List[DetectedEvent]] = defaultdict(list)
-    for event in events:
-        events_by_code[event.code].append(event)
-
-    price_lookup: Dict[str, Dict[str, PriceBar]] = defaultdict(dict)
+    ``weights`` and ``index`` may be passed in by callers that keep them between
+    runs; ``index`` must cover ``events``.
+    """
+    if weights is None:
+        weights = load_weights(weights_env)
+    if dates is None:
+        dates = [latest_pick_date(prices, events)]
+    if index is None:
+        index = EventIndex(events)
+
+    # Only bars on the requested dates are needed; keying by date objects
+    # avoids formatting every bar of the history.
+    wanted = set(dates)
+    price_lookup: Dict[str, Dict[date, PriceBar]] = defaultdict(dict)
     for code, price_list in prices.items():
         for bar in price_list:
-            price_lookup[code][bar.trading_date.isoformat()] = bar
+            if bar.trading_date in wanted:
+                price_lookup[code][bar.trading_date] = bar
 
     picks: List[Dict[str, object]] = []
 
-    codes = sorted(set(price_lookup.keys()) | set(events_by_code.keys()))
-
-    for code in codes:
-        price_list = price_lookup.get(code, {})
-        bar = price_list.get(latest_iso)
-        daily_features = feature_map.get(code, {}).get(latest_iso, {})
-        if daily_features:
-            metrics = {
-                "volume_z": daily_features.get("volume_z"),
-                "gap_pct": daily_features.get("gap_pct"),
-                "supply_demand_proxy": daily_features.get("supply_demand_proxy"),
-            }
-            filters = {
-                "high20d_dist_pct": daily_features.get("high20d_dist_pct"),
-                "close": getattr(bar, "close", None),
-            }
-        else:
-            metrics = {
-                "volume_z": None,
-                "gap_pct": None,
-                "supply_demand_proxy": None,
-            }
-            filters = {
-                "high20d_dist_pct": None,
-                "close": getattr(bar, "close", None),
-            }
-        penalty = {
-            "recent_negative": recent_negative_penalty(events_by_code.get(code, []), latest_date)
-        }
-        # Consider recent events within a wider lookback window to ensure
-        # scoring reflects nearby catalysts in small sample datasets.
-        candidate_events = [
-            ev
-            for ev in events_by_code.get(code, [])
-            if ev.date.date() <= latest_date and ev.date.date() >= latest_date - timedelta(days=10)
-        ]
-        score = calculate_score(weights, candidate_events, metrics, filters, penalty)
-        if score.normalized >= weights.minScore:
-            picks.append(
-                {
-                    "date": latest_iso,
-                    "code": code,
-                    "score": score,
-                    "close": getattr(bar, "close", None),
-                    "metrics": metrics,
-                    "filters": filters,
-                    "events": candidate_events,
-                    "penalty": penalty,
-                }
-            )
+    codes = sorted({code for code, price_list in prices.items() if price_list} | set(index.codes()))
+
+    for pick_date in dates:
+        pick_iso = pick_date.isoformat()
+        bars = [price_lookup.get(code, {}).get(pick_date) for code in codes]
+        # Numeric pass over every code; reasons are only built for the codes
+        # that reach minScore (score_code re-runs calculate_score for those).
+        first = pick_date - timedelta(days=PICK_LOOKBACK_DAYS)
+        metrics, filters = frame_batch_inputs(features, codes, pick_iso, [getattr(bar, "close", None) for bar in bars])
+        scores = score_batch(
+            weights,
+            [index.between(code, first, pick_date) for code in codes],
+            metrics,
+            filters,
+            [index.negative_penalty(code, pick_date) for code in codes],
+        )
+        for pos in scores.passing(weights.minScore):
+            pick = score_code(weights, features, codes[pos], pick_date, bars[pos], index)
+            if pick is not None:
+                picks.append(pick)
     return picks
 
 
-def recent_negative_penalty(events: Iterable[DetectedEvent], latest: date) -> float:
-    penalty = 0.0
-    for event in events:
-        if event.tag == "NEWS_NEG" and (latest - event.date.date()).days <= 5:
-            penalty = max(penalty, 0.2)
-        if event.tag == "TDNET" and "下方" in event.title:
-            penalty = max(penalty, 0.3)
-    return penalty
-
-
-def upsert_picks(conn, picks: Iterable[Dict[str, object]]) -> None:
+def score_code(
+    weights: WeightConfig,
+    features: FeatureFrame,
+    code: str,
+    pick_date: date,
+    bar: PriceBar | None,
+    index: EventIndex,
+) -> Dict[str, object] | None:
+    """Score one code on ``pick_date``; returns the pick, or ``None`` below ``minScore``."""
+    pick_iso = pick_date.isoformat()
+    metrics, filters = frame_inputs(features, code, pick_iso, getattr(bar, "close", None))
+    penalty = {"recent_negative": index.negative_penalty(code, pick_date)}
+    # Consider recent events within a wider lookback window to ensure
+    # scoring reflects nearby catalysts in small sample datasets.
+    candidate_events = index.between(code, pick_date - timedelta(days=PICK_LOOKBACK_DAYS), pick_date)
+    score = calculate_score(weights, candidate_events, metrics, filters, penalty)
+    if score.normalized < weights.minScore:
+        return None
+    return {
+        "date": pick_iso,
+        "code": code,
+        "score": score,
+        "close": getattr(bar, "close", None),
+        "metrics": metrics,
+        "filters": filters,
+        "events": candidate_events,
+        "penalty": penalty,
+    }
+
+
+def pick_epoch_ms(day: str) -> int | None:
+    # Store date as epoch milliseconds for SQLite/Prisma consistency
+    try:
+        # Interpret the date as YYYY-MM-DD at 00:00:00 UTC
+        dt = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+    except Exception:
+        return None  # Fallback; should not happen with well-formed ISO date
+
+
+def pick_rows(picks: Iterable[Dict[str, object]]) -> List[Tuple[object, ...]]:
     rows = []
     for pick in picks:
         score: ScoreComponents = pick["score"]
         if score.normalized <= 0:
             continue
-        # Store date as epoch milliseconds for SQLite/Prisma consistency
-        try:
-            # Interpret pick["date"] as YYYY-MM-DD at 00:00:00 UTC
-            dt = datetime.strptime(str(pick["date"]), "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            epoch_ms = int(dt.timestamp() * 1000)
-        except Exception:
-            epoch_ms = None  # Fallback; should not happen with well-formed ISO date
         rows.append(
             (
-                epoch_ms,
+                pick_epoch_ms(str(pick["date"])),
                 pick["code"],
                 round(score.normalized, 2),
                 json.dumps(score.reasons, ensure_ascii=False),
@@ -343,42 +532,249 @@ def upsert_picks(conn, picks: Iterable[Dict[str, object]]) -> None:
                 ),
             )
         )
-    replace_many(conn, "Pick", ("date", "code", "scoreFinal", "reasons", "stats"), rows)
+    return rows
 
 
-def main() -> None:
-    env = load_env()
-    database_url = env.get("DATABASE_URL", "file:./prisma/dev.db")
-    session = requests.Session()
-    session.headers.update({"User-Agent": env.get("HTTP_USER_AGENT", "kabu4-ingest/1.0")})
+PICK_COLUMNS = ("date", "code", "scoreFinal", "reasons", "stats")
 
-    tdnet_adapter = TdnetRssAdapter(rss_url=env.get("TDNET_RSS_URL"), session=session)
-    earnings_adapter = EarningsAdapter(feed_url=env.get("EARNINGS_FEED_URL"), session=session)
-    news_adapter = NewsAdapter(feed_url=env.get("NEWS_FEED_URL"), session=session)
-    price_adapter = PriceAdapter()
 
-    prices = price_adapter.fetch()
-    feature_calc = FeatureCalculator(price_adapter)
-    features = feature_calc.compute()
+def upsert_picks(conn, picks: Iterable[Dict[str, object]]) -> UpsertStats:
+    return upsert_many(conn, "Pick", PICK_COLUMNS, ("date", "code"), pick_rows(picks))
+
+
+def replace_picks(conn, picks: Iterable[Dict[str, object]], dates: Sequence[date]) -> UpsertStats:
+    """Replace the stored picks for ``dates`` only, and commit ``conn``.
+
+    Changed ``(date, code)`` rows are upserted and codes that no longer qualify
+    on those dates are deleted; picks for every other date are left untouched.
+    The commit also covers writes still pending on ``conn``: ``run_ingest``
+    leaves its DailyPrice/Feature/Symbol/CorporateEvent upserts uncommitted, so
+    the whole run lands in this one transaction. Under WAL, readers keep seeing
+    the previous run until then.
+    """
+    rows = pick_rows(picks)
+    kept: Dict[int | None, List[str]] = {pick_epoch_ms(day.isoformat()): [] for day in dates}
+    for row in rows:
+        kept.setdefault(row[0], []).append(row[1])
+    with conn:
+        stats = upsert_many(conn, "Pick", PICK_COLUMNS, ("date", "code"), rows)
+        for epoch_ms, codes in kept.items():
+            cursor = conn.execute(
+                'DELETE FROM "Pick" WHERE date = ? AND code NOT IN (SELECT value FROM json_each(?))',
+                (epoch_ms, json.dumps(codes)),
+            )
+            stats.deleted += cursor.rowcount
+    return stats
 
-    feature_map = to_feature_map(features)
-    events = []
-    events.extend(detect_tdnet(tdnet_adapter.fetch()))
-    events.extend(detect_earnings(earnings_adapter.fetch()))
-    events.extend(detect_news(news_adapter.fetch()))
-    events.extend(detect_volume_spike(feature_map))
+
+def open_session(env: Mapping[str, str]) -> Tuple[requests.Session, HttpCache | None]:
+    """HTTP session for feeds and symbol lookups, behind the conditional-GET cache unless disabled.
+
+    The session (and ``requests``) is only created by the first request.
+    """
+    http_cache = None
+    if env_flag(env, "HTTP_CACHE_ENABLED", default=True):
+        http_cache = HttpCache(
+            env.get("HTTP_CACHE_DIR") or ROOT / ".cache" / "http",
+            max_bytes=int(float(env.get("HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        )
+
+    def build() -> requests.Session:
+        session = new_session()
+        session.headers.update({"User-Agent": env.get("HTTP_USER_AGENT", "kabu4-ingest/1.0")})
+        return CachingSession(session, http_cache) if http_cache is not None else session
+
+    return LazySession(build), http_cache
+
+
+def fetch_events(
+    env: Mapping[str, str],
+    session: requests.Session,
+    feeds: Sequence[str] = ("tdnet", "earnings", "news"),
+    universe: SymbolUniverse | None = None,
+    cache: SymbolNameCache | None = None,
+) -> List[DetectedEvent]:
+    """Fetch the given feeds and classify their items into events.
+
+    Under ``INGEST_OFFLINE`` the feed URLs are ignored and only the local sample
+    files (``SAMPLE_DATA_DIR`` or data/sample) are read. With a ``universe``, live TDnet items are kept only for
+    known codes; unknown ones are resolved in one ``lookup_symbols`` batch.
+    """
+    source_timeout = float(env.get("INGEST_FETCH_TIMEOUT", "15"))
+    deadline = float(env.get("INGEST_FETCH_DEADLINE", "30"))
+    offline = env_flag(env, "INGEST_OFFLINE")
+
+    def url(key: str) -> str | None:
+        return None if offline else env.get(key)
+
+    tdnet_adapter = TdnetRssAdapter(
+        sample_path=sample_file(env, "events.csv"),
+        rss_url=url("TDNET_RSS_URL"),
+        session=session,
+        timeout=source_timeout,
+        seen_path=env.get("TDNET_SEEN_PATH") or ROOT / ".cache" / "tdnet_seen.json",
+        concurrency=int(env.get("TDNET_LIST_CONCURRENCY", "4")),
+    )
+    earnings_adapter = EarningsAdapter(
+        sample_path=sample_file(env, "events.csv"),
+        feed_url=url("EARNINGS_FEED_URL"),
+        session=session,
+        timeout=source_timeout,
+    )
+    news_adapter = NewsAdapter(
+        sample_path=sample_file(env, "news.json"),
+        feed_url=url("NEWS_FEED_URL"),
+        session=session,
+        timeout=source_timeout,
+        html_backend=env.get("HTML_PARSER_BACKEND"),
+    )
+    sources = {
+        "tdnet": FetchSource(
+            "tdnet",
+            tdnet_adapter.fetch_live if tdnet_adapter.rss_url else None,
+            tdnet_adapter.read_sample,
+            accept_empty=True,
+        ),
+        "earnings": FetchSource(
+            "earnings",
+            earnings_adapter.fetch_live if earnings_adapter.feed_url else None,
+            earnings_adapter.read_sample,
+        ),
+        "news": FetchSource("news", news_adapter.fetch_live if news_adapter.feed_url else None, news_adapter.read_sample),
+    }
+
+    # All feeds are fetched concurrently; a slow or failing one falls back to
+    # its sample file without delaying the others.
+    fetched = run_fetch_stage([sources[name] for name in feeds], deadline=deadline, source_timeout=source_timeout)
+    report_fetch_stage(fetched)
+
+    tdnet = fetched.get("tdnet")
+    if universe is not None and tdnet is not None and tdnet.status == LIVE:
+        universe.admit(item.code for item in tdnet.items)
+        universe.resolve_pending(lambda codes: lookup_symbols(env, session, codes, cache=cache))
+        tdnet.items = [item for item in tdnet.items if item.code in universe]
+
+    detectors = {"tdnet": detect_tdnet, "earnings": detect_earnings, "news": detect_news}
+    events: List[DetectedEvent] = []
+    for name in feeds:
+        events.extend(detectors[name](fetched[name].items))
+    return events
+
+
+def run_ingest(
+    env: Mapping[str, str],
+    session: requests.Session,
+) -> Tuple[Dict[str, List[PriceBar]], FeatureFrame, List[DetectedEvent], Dict[str, UpsertStats]]:
+    """One full ingest pass; returns ``(prices, features, events, written)``.
+
+    ``features`` is the frame the picks were scored from (only the trailing
+    pick window under ``INGEST_INCREMENTAL``) and ``events`` includes the
+    volume spikes in it. Under ``INGEST_INCREMENTAL`` spikes are only written
+    for the new bars; those already stored in CorporateEvent are loaded back,
+    unless re-detecting the pick window with the current
+    ``VOL_SPIKE_THRESHOLDS`` gives different spikes, in which case the
+    window's stored spikes are replaced.
+    """
+    database_url = env.get("DATABASE_URL", "file:./prisma/dev.db")
+    price_adapter = PriceAdapter(sample_file(env, "daily_prices.csv"))
+
+    prices = price_adapter.fetch()
+    feature_calc = FeatureCalculator(price_adapter, engine=env.get("FEATURE_ENGINE") or None)
+    parallel = env_flag(env, "INGEST_PARALLEL")
+    if parallel and feature_calc.engine != "vectorized":
+        # The sharded workers only run the NumPy kernel.
+        raise ValueError(f"INGEST_PARALLEL requires FEATURE_ENGINE=vectorized, not {feature_calc.engine!r}")
+    incremental = env_flag(env, "INGEST_INCREMENTAL")
+    thresholds = spike_thresholds(env)
+
+    universe = name_cache = None
+    if not env_flag(env, "INGEST_OFFLINE"):
+        # Scraped TDnet codes are checked against the known symbols before they
+        # become events or lookups.
+        name_cache = open_name_cache(env)
+        with sqlite_conn(database_url) as conn:
+            universe = open_universe(env, conn, name_cache)
+    events = fetch_events(env, session, universe=universe, cache=name_cache)
+    # Volume spikes fall on trading dates, so they cannot change the pick dates.
+    dates = pick_dates(env, prices, events)
 
     with sqlite_conn(database_url) as conn:
+        if incremental:
+            # Only bars newer than the stored features are computed and written;
+            # the trailing DailyPrice window seeds the rolling features.
+            price_rows, warmup = split_new_bars(conn, prices)
+        else:
+            price_rows, warmup = prices, None
+        spikes = None
+        if parallel:
+            from .parallel import compute_sharded
+
+            workers = int(env["INGEST_WORKERS"]) if env.get("INGEST_WORKERS") else None
+            features, spikes = compute_sharded(
+                price_rows, workers=workers, warmup=warmup, spike_thresholds=thresholds
+            )
+        else:
+            features = feature_calc.compute(price_rows, warmup=warmup)
+        if spikes is None:
+            # Only the rows just computed: spikes on older rows were written by earlier runs.
+            spikes = detect_volume_spike(features, thresholds)
+        written: Dict[str, UpsertStats] = {}
+        written["DailyPrice"] = upsert_prices(conn, price_rows)
+        written["Feature"] = upsert_features(conn, features)
+        stored_spikes: List[DetectedEvent] = []
+        removed = 0
+        if incremental:
+            # Picks only look back PICK_LOOKBACK_DAYS, so re-read just that slice
+            # of the stored features and spikes as their context.
+            since = min(dates, default=latest_pick_date(prices, events)) - timedelta(days=PICK_LOOKBACK_DAYS)
+            features = load_features_since(conn, since)
+            detected = {(ev.code, ev.date) for ev in spikes}
+            stored_spikes = [ev for ev in load_spikes_since(conn, since) if (ev.code, ev.date) not in detected]
+            redetected = [ev for ev in detect_volume_spike(features, thresholds) if (ev.code, ev.date) not in detected]
+            if {(ev.code, ev.date, ev.summary) for ev in redetected} != {
+                (ev.code, ev.date, ev.summary) for ev in stored_spikes
+            }:
+                # Stored under other VOL_SPIKE_THRESHOLDS: replace the window's spikes.
+                kept = {event_id(ev) for ev in redetected}
+                removed = delete_events(conn, [ev for ev in stored_spikes if event_id(ev) not in kept])
+                spikes.extend(redetected)
+                stored_spikes = []
+        events.extend(spikes)
+
         # Prefer web-sourced symbols; fallback to local sample if none resolved
-        web_symbols = fetch_web_symbols(env, events, session)
-        symbols = web_symbols if web_symbols else read_symbols_local()
-        upsert_symbols(conn, symbols)
-        upsert_prices(conn, prices)
-        upsert_features(conn, features)
-        upsert_events(conn, events)
-        clear_table(conn, "Pick")
-        picks = build_daily_picks(env, prices, features, events)
-        upsert_picks(conn, picks)
+        web_symbols = []
+        if not env_flag(env, "INGEST_OFFLINE"):
+            web_symbols = fetch_web_symbols(
+                env, events, session, known=load_symbol_names(conn), cache=name_cache, universe=universe
+            )
+        symbols = web_symbols if web_symbols else read_symbols_local(env)
+        written["Symbol"] = upsert_symbols(conn, symbols)
+        written["CorporateEvent"] = upsert_events(conn, events)
+        written["CorporateEvent"].deleted = removed
+        events.extend(stored_spikes)
+        if len(dates) > 1:
+            from .pick_backfill import build_pick_history
+
+            picks = build_pick_history(env, prices, features, events, dates)
+        else:
+            picks = build_daily_picks(env, prices, features, events, dates)
+        # Commits every write of the run at once, picks included.
+        written["Pick"] = replace_picks(conn, picks, dates)
+    return prices, features, events, written
+
+
+def report_written(written: Mapping[str, UpsertStats]) -> None:
+    for table, stats in written.items():
+        print(f"[db] {table}: {stats}")
+
+
+def main() -> None:
+    env = load_env()
+    session, http_cache = open_session(env)
+    _, _, _, written = run_ingest(env, session)
+    report_written(written)
+    if http_cache is not None and session.started:
+        print("[http-cache] " + ", ".join(f"{key}={value}" for key, value in http_cache.counters.items()))
     print("Ingest job completed.")
 
 
@@ -0,0 +1,265 @@
+"""Process-pool sharded feature and volume-spike computation.
+
+Codes are independent. The parent packs every code's bars once, in code order,
+into one ``(len(INPUTS), n_bars)`` float64 array in shared memory; a shard is
+just a contiguous range of codes plus their offsets into that array. Workers
+run the vectorized kernel on their slices in place, write the feature values
+into a second shared ``(len(FEATURE_NAMES), n_rows)`` array (warm-up bars
+excluded) and return only their spike positions. The parent appends the whole
+output array to one ``FeatureFrame`` with a single copy per feature, in the
+original code order, so the output is identical to a serial run.
+
+Usage (scaling benchmark)::
+
+    PYTHONPATH=. python -m jobs.ingest.parallel --size 1000x1250 --workers 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import cache
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .adapters.price_adapter import PriceBar
+from .features import FEATURE_NAMES, FeatureFrame
+from .rules import VOLUME_SPIKE_THRESHOLD, DetectedEvent, spike_levels, volume_spike_event
+from .vectorized import compute_feature_arrays
+
+# Shards per worker; a few per worker keeps the pool busy when code histories differ in length.
+SHARDS_PER_WORKER = 4
+# Rows of the packed input array.
+INPUTS = ("open", "close", "volume", "vwap")
+
+# (code position, bar position within the code, volume_z, level) of one spike.
+Spike = Tuple[int, int, float, int]
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def pack_prices(bars_by_code: Sequence[Sequence[PriceBar]], out: np.ndarray) -> None:
+    """Write the bars of every code, back to back, into the rows of ``out``."""
+    total = out.shape[1]
+    for row, field in enumerate(INPUTS):
+        values = (getattr(bar, field) for bars in bars_by_code for bar in bars)
+        if field == "vwap":
+            values = (np.nan if value is None else value for value in values)
+        out[row] = np.fromiter(values, dtype=np.float64, count=total)
+
+
+def compute_range(
+    inputs: np.ndarray,
+    outputs: np.ndarray,
+    offsets: np.ndarray,
+    rows: np.ndarray,
+    skips: np.ndarray,
+    spike_thresholds: Sequence[float],
+) -> List[Spike]:
+    """Compute the codes whose bars are ``inputs[:, offsets[i]:offsets[i + 1]]``.
+
+    Features from the ``skips[i]``-th bar on are written to ``outputs`` from
+    column ``rows[i]``; spikes are returned with code positions relative to the
+    range.
+    """
+    spikes: List[Spike] = []
+    for pos in range(len(offsets) - 1):
+        start, end, skip, row = int(offsets[pos]), int(offsets[pos + 1]), int(skips[pos]), int(rows[pos])
+        columns = compute_feature_arrays(*(inputs[idx, start:end] for idx in range(len(INPUTS))))
+        for idx, name in enumerate(FEATURE_NAMES):
+            outputs[idx, row : row + end - start - skip] = columns[name][skip:]
+        hits, levels = spike_levels(columns["volume_z"][skip:], spike_thresholds)
+        spikes.extend(
+            (pos, idx + skip, float(columns["volume_z"][idx + skip]), level)
+            for idx, level in zip(hits.tolist(), levels.tolist())
+        )
+    return spikes
+
+
+def _compute_shared(
+    names: Tuple[str, str],
+    shapes: Tuple[Tuple[int, int], Tuple[int, int]],
+    offsets: np.ndarray,
+    rows: np.ndarray,
+    skips: np.ndarray,
+    spike_thresholds: Sequence[float],
+) -> List[Spike]:
+    """Worker entry point: ``compute_range`` on the parent's shared arrays."""
+    blocks = [SharedMemory(name=name) for name in names]
+    arrays = [np.ndarray(shape, dtype=np.float64, buffer=block.buf) for shape, block in zip(shapes, blocks)]
+    try:
+        return compute_range(*arrays, offsets, rows, skips, spike_thresholds)
+    finally:
+        # The views must go before the blocks can be closed.
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def _split(sizes: Sequence[int], shard_count: int) -> List[Tuple[int, int]]:
+    """Cut code positions into contiguous ``[lo, hi)`` runs of roughly equal bar counts."""
+    target = max(sum(sizes) / max(shard_count, 1), 1)
+    ranges: List[Tuple[int, int]] = []
+    lo = filled = 0
+    for pos, size in enumerate(sizes):
+        if pos > lo and filled >= target:
+            ranges.append((lo, pos))
+            lo, filled = pos, 0
+        filled += size
+    if lo < len(sizes):
+        ranges.append((lo, len(sizes)))
+    return ranges
+
+
+class _SharedArrays:
+    """Input and output arrays in shared memory, released on exit.
+
+    Use the arrays through ``arrays`` only: a view kept elsewhere would stop the
+    blocks from being closed.
+    """
+
+    def __init__(self, shapes: Sequence[Tuple[int, int]]) -> None:
+        self.shapes = tuple(shapes)
+        self.blocks = [SharedMemory(create=True, size=max(1, 8 * rows * cols)) for rows, cols in self.shapes]
+        self.arrays = [
+            np.ndarray(shape, dtype=np.float64, buffer=block.buf) for shape, block in zip(self.shapes, self.blocks)
+        ]
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(block.name for block in self.blocks)
+
+    def __enter__(self) -> "_SharedArrays":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.arrays = []
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def compute_sharded(
+    prices: Mapping[str, List[PriceBar]],
+    workers: int | None = None,
+    warmup: Mapping[str, List[PriceBar]] | None = None,
+    spike_thresholds: Sequence[float] = (VOLUME_SPIKE_THRESHOLD,),
+) -> Tuple[FeatureFrame, List[DetectedEvent]]:
+    """Compute features and volume spikes for ``prices`` across a process pool.
+
+    ``warmup`` has the same meaning as in :meth:`FeatureCalculator.compute`;
+    ``spike_thresholds`` as in :func:`detect_volume_spike`.
+    """
+    workers = workers or default_workers()
+    warmup = warmup or {}
+    codes = list(prices.keys())
+    bars_by_code = [list(warmup.get(code, [])) + list(prices[code]) for code in codes]
+    lengths = np.fromiter((len(bars) for bars in bars_by_code), dtype=np.int64, count=len(codes))
+    skips = np.fromiter((len(warmup.get(code, [])) for code in codes), dtype=np.int64, count=len(codes))
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    rows = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(lengths - skips, out=rows[1:])
+    shapes = ((len(INPUTS), int(offsets[-1])), (len(FEATURE_NAMES), int(rows[-1])))
+    ranges = _split(lengths.tolist(), workers * SHARDS_PER_WORKER)
+
+    frame = FeatureFrame()
+    iso = cache(date.isoformat)
+
+    def collect(outputs: np.ndarray) -> None:
+        frame.extend_codes(
+            codes,
+            (lengths - skips).tolist(),
+            (iso(bar.trading_date) for code in codes for bar in prices[code]),
+            {name: outputs[row] for row, name in enumerate(FEATURE_NAMES)},
+        )
+
+    if workers == 1 or len(ranges) <= 1:
+        inputs, outputs = np.empty(shapes[0]), np.full(shapes[1], np.nan)
+        pack_prices(bars_by_code, inputs)
+        spikes = compute_range(inputs, outputs, offsets, rows, skips, spike_thresholds)
+        collect(outputs)
+    else:
+        with _SharedArrays(shapes) as shared:
+            pack_prices(bars_by_code, shared.arrays[0])
+            shared.arrays[1].fill(np.nan)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _compute_shared,
+                        shared.names,
+                        shapes,
+                        offsets[lo : hi + 1],
+                        rows[lo:hi],
+                        skips[lo:hi],
+                        tuple(spike_thresholds),
+                    )
+                    for lo, hi in ranges
+                ]
+                spikes = [
+                    (lo + pos, *rest) for (lo, _), future in zip(ranges, futures) for pos, *rest in future.result()
+                ]
+            collect(shared.arrays[1])
+
+    events: List[DetectedEvent] = []
+    for pos, idx, volume_z, level in spikes:
+        bar = bars_by_code[pos][idx]
+        events.append(
+            volume_spike_event(codes[pos], datetime.combine(bar.trading_date, datetime.min.time()), volume_z, level)
+        )
+    return frame, events
+
+
+def scaling(codes: int, days: int, workers: Sequence[int], repeat: int = 3) -> Dict[str, object]:
+    """Best-of-``repeat`` seconds of the serial path and of ``compute_sharded`` per worker count."""
+    from .adapters.price_adapter import PriceAdapter
+    from .features import FeatureCalculator
+    from .rules import detect_volume_spike
+    from .synthetic import generate
+
+    prices = generate(codes, days).prices
+
+    def best(run) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    calculator = FeatureCalculator(PriceAdapter(), engine="vectorized")
+    serial = best(lambda: detect_volume_spike(calculator.compute(prices)))
+    seconds_by_run = {"serial": round(serial, 4)}
+    for count in workers:
+        seconds = best(lambda: compute_sharded(prices, workers=count))
+        seconds_by_run[f"workers={count}"] = round(seconds, 4)
+        print(f"[parallel] {codes}x{days} workers={count}: {seconds:.3f}s ({serial / seconds:.2f}x serial)")
+    return {"size": f"{codes}x{days}", "cpu_count": os.cpu_count(), "seconds": seconds_by_run}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time compute_sharded against the serial feature path.")
+    parser.add_argument("--size", default="1000x1250", metavar="CODESxDAYS")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the timings as JSON")
+    args = parser.parse_args()
+
+    from .bench import parse_size
+
+    result = scaling(*parse_size(args.size), args.workers, args.repeat)
+    print(f"[parallel] serial: {result['seconds']['serial']:.3f}s on {result['cpu_count']} CPU(s)")
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
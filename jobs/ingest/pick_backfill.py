@@ -0,0 +1,211 @@
+"""Vectorized historical pick backfill over every trading date.
+
+``build_daily_picks`` scores one date at a time, so filling years of history
+costs O(days x codes) Python-level ``calculate_score`` calls. This engine
+instead evaluates each code over *all* requested dates at once:
+
+- tape metrics and filter inputs are aligned to the date axis straight from the
+  ``FeatureFrame`` columns,
+- the 10-day event window is a prefix-sum difference over the code's events
+  sorted by date (two ``searchsorted`` calls per code), and
+- the recent-negative penalty counts the NEWS_NEG dates inside each date's
+  window with two more ``searchsorted`` calls.
+
+That yields each pair's score up to float rounding. Only pairs within
+``SCORE_EPSILON`` of ``minScore`` or above are then scored again through
+``score_code``, so the emitted picks (scores, reasons, ordering) are exactly
+what ``build_daily_picks`` returns for the same dates.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .adapters.price_adapter import PriceBar
+from .features import FeatureFrame
+from .main import PICK_LOOKBACK_DAYS, score_code
+from .rules import (
+    DOWNWARD_REVISION,
+    DOWNWARD_REVISION_PENALTY,
+    NEGATIVE_NEWS_DAYS,
+    NEGATIVE_NEWS_PENALTY,
+    DetectedEvent,
+    EventIndex,
+)
+from .scoring import TAPE_LIMITS, WeightConfig, load_weights
+
+# Slack for rounding differences between the array sums and calculate_score.
+SCORE_EPSILON = 1e-6
+
+
+def align_to_days(day_ords: np.ndarray, ords: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Scatter ``values`` observed on ``ords`` onto the ``day_ords`` axis (NaN elsewhere)."""
+    out = np.full(len(day_ords), np.nan)
+    if len(ords) == 0 or len(day_ords) == 0:
+        return out
+    pos = np.searchsorted(day_ords, ords)
+    inside = pos < len(day_ords)
+    hit = np.zeros(len(ords), dtype=bool)
+    hit[inside] = day_ords[pos[inside]] == ords[inside]
+    out[pos[hit]] = values[hit]
+    return out
+
+
+def window_sums(day_ords: np.ndarray, ev_ords: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Sum of ``values`` for events dated within ``[day - PICK_LOOKBACK_DAYS, day]``."""
+    prefix = np.concatenate(([0.0], np.cumsum(values)))
+    hi = np.searchsorted(ev_ords, day_ords, side="right")
+    lo = np.searchsorted(ev_ords, day_ords - PICK_LOOKBACK_DAYS, side="left")
+    return prefix[hi] - prefix[lo]
+
+
+def penalty_by_day(index: EventIndex, code: str, day_ords: np.ndarray) -> np.ndarray:
+    """``EventIndex.negative_penalty`` of ``code`` on every date of ``day_ords``."""
+    penalty = np.zeros(len(day_ords))
+    negative = np.asarray(index.tag_days(code, "NEWS_NEG"), dtype=np.int64)
+    if len(negative):
+        # NEWS_NEG events inside [day - NEGATIVE_NEWS_DAYS, day].
+        recent = np.searchsorted(negative, day_ords, side="right") - np.searchsorted(
+            negative, day_ords - NEGATIVE_NEWS_DAYS, side="left"
+        )
+        penalty = np.where(recent > 0, NEGATIVE_NEWS_PENALTY, 0.0)
+    downward = index.tag_days(code, DOWNWARD_REVISION)
+    if downward:
+        penalty = np.where(day_ords >= downward[0], np.maximum(penalty, DOWNWARD_REVISION_PENALTY), penalty)
+    return np.clip(penalty, 0.0, 1.0)
+
+
+def filters_pass(high20: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """``calculate_score``'s filters; NaN (missing) inputs pass."""
+    return ~(high20 < -0.15) & ~(close < 100)
+
+
+def approximate_scores(
+    weights: WeightConfig,
+    day_ords: np.ndarray,
+    tape: Mapping[str, np.ndarray],
+    high20: np.ndarray,
+    close: np.ndarray,
+    index: EventIndex,
+    code: str,
+) -> np.ndarray:
+    """``calculate_score(...).normalized`` of one code on every date of ``day_ords``."""
+    total = np.zeros(len(day_ords))
+    weight_sum = np.zeros(len(day_ords))
+    for name, max_value in TAPE_LIMITS.items():
+        tag_weight = weights.tape.get(name, 0.0)
+        if tag_weight == 0:
+            continue
+        values = tape[name]
+        present = ~np.isnan(values)
+        normalized = np.clip(values, 0, max_value) / max_value
+        total += np.where(present, normalized * tag_weight, 0.0)
+        weight_sum += np.where(present, tag_weight, 0.0)
+
+    weighted = [
+        (day, weights.event.get(ev.tag, 0.0), ev.score_raw)
+        for day, ev in index.by_day(code)
+        if weights.event.get(ev.tag, 0.0) != 0
+    ]
+    if weighted:
+        ev_ords = np.array([item[0] for item in weighted], dtype=np.int64)
+        tag_weights = np.array([item[1] for item in weighted])
+        raw = np.array([1.0 if item[2] is None else item[2] for item in weighted])
+        total += window_sums(day_ords, ev_ords, np.clip(raw, 0.0, 1.0) * tag_weights)
+        weight_sum += window_sums(day_ords, ev_ords, tag_weights)
+
+    penalty = penalty_by_day(index, code, day_ords)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        penalized = np.maximum(total / weight_sum - penalty, 0.0)
+    return np.where((weight_sum == 0) | ~filters_pass(high20, close), 0.0, penalized * 100)
+
+
+def pick_history_dates(prices: Mapping[str, List[PriceBar]], events: Sequence[DetectedEvent]) -> List[date]:
+    """Every date with a price bar or an event, ascending."""
+    known = {bar.trading_date for bars in prices.values() for bar in bars}
+    known.update(ev.date.date() for ev in events)
+    return sorted(known)
+
+
+class AlignedHistory:
+    """Per-code pick inputs aligned to one sorted axis of pick dates.
+
+    ``dates`` keeps the caller's (de-duplicated) order; ``day_ords`` is the
+    sorted axis the arrays use and ``order[i]`` maps axis position ``i`` back to
+    ``dates``. Codes are those ``build_daily_picks`` scores: every code with a
+    price bar or an event.
+    """
+
+    def __init__(
+        self,
+        prices: Mapping[str, List[PriceBar]],
+        features: FeatureFrame,
+        events: Sequence[DetectedEvent],
+        dates: Sequence[date],
+    ) -> None:
+        self.prices = prices
+        self.features = features
+        self.dates = list(dict.fromkeys(dates))
+        ords = np.array([day.toordinal() for day in self.dates], dtype=np.int64)
+        self.order = np.argsort(ords, kind="stable")
+        self.day_ords = ords[self.order]
+        self.index = EventIndex(events)
+        self.codes = sorted({code for code, bars in prices.items() if bars} | set(self.index.codes()))
+
+        self._frame_ords = np.array([date.fromisoformat(day).toordinal() for day in features.dates], dtype=np.int64)
+        self._row_dates = np.frombuffer(features.row_date, dtype=np.int32) if len(features) else np.zeros(0, np.int32)
+        self._columns = {
+            name: np.frombuffer(features.column(name), dtype=np.float64) if len(features) else np.zeros(0)
+            for name in features.names
+        }
+
+    def feature_values(self, code: str) -> Dict[str, np.ndarray]:
+        """Every feature column of ``code`` on the date axis (NaN where missing)."""
+        start, end = self.features.span(code)
+        ords = self._frame_ords[self._row_dates[start:end]]
+        return {name: align_to_days(self.day_ords, ords, column[start:end]) for name, column in self._columns.items()}
+
+    def closes(self, code: str) -> Tuple[np.ndarray, np.ndarray]:
+        """``(close, bar position in prices[code])`` on the date axis (NaN where there is no bar)."""
+        bars = self.prices.get(code, [])
+        ords = np.array([bar.trading_date.toordinal() for bar in bars], dtype=np.int64)
+        close = align_to_days(self.day_ords, ords, np.array([bar.close for bar in bars], dtype=np.float64))
+        return close, align_to_days(self.day_ords, ords, np.arange(len(bars), dtype=np.float64))
+
+
+def build_pick_history(
+    weights_env: Mapping[str, str],
+    prices: Mapping[str, List[PriceBar]],
+    features: FeatureFrame,
+    events: List[DetectedEvent],
+    dates: Sequence[date] | None = None,
+) -> List[Dict[str, object]]:
+    """Picks for every distinct date in ``dates`` (default: every price/event date).
+
+    Equivalent to ``build_daily_picks(weights_env, prices, features, events, dates)``.
+    """
+    weights = load_weights(weights_env)
+    history = AlignedHistory(prices, features, events, pick_history_dates(prices, events) if dates is None else dates)
+
+    # build_daily_picks emits dates in the given order, then codes in sorted order.
+    candidates: List[Tuple[int, int, PriceBar | None]] = []
+    for code_pos, code in enumerate(history.codes):
+        values = history.feature_values(code)
+        close, bar_pos = history.closes(code)
+        scores = approximate_scores(
+            weights, history.day_ords, values, values["high20d_dist_pct"], close, history.index, code
+        )
+        for pos in np.nonzero(scores >= weights.minScore - SCORE_EPSILON)[0]:
+            bar = None if np.isnan(bar_pos[pos]) else prices[code][int(bar_pos[pos])]
+            candidates.append((int(history.order[pos]), code_pos, bar))
+
+    candidates.sort(key=lambda item: (item[0], item[1]))
+    picks: List[Dict[str, object]] = []
+    for date_pos, code_pos, bar in candidates:
+        code = history.codes[code_pos]
+        pick = score_code(weights, features, code, history.dates[date_pos], bar, history.index)
+        if pick is not None:
+            picks.append(pick)
+    return picks
@@ -0,0 +1,128 @@
+"""Event-driven upkeep of one date's picks.
+
+``build_daily_picks`` rescores the whole universe. A code's pick on a date
+only depends on:
+
+- its events dated within the ``PICK_LOOKBACK_DAYS`` window,
+- its NEWS_NEG events dated within ``NEGATIVE_NEWS_DAYS`` before the date,
+  and any downward-revision TDNET event dated by then (the penalty rules), and
+- its feature row and close on that date.
+
+``PickMaintainer`` keeps the current picks plus those inputs, so pushed events
+and feature updates rescore just the codes they touch and yield the
+``(date, code)`` rows to upsert or delete.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Mapping, Set
+
+from .adapters.price_adapter import PriceBar
+from .features import FeatureFrame
+from .main import PICK_COLUMNS, PICK_LOOKBACK_DAYS, build_daily_picks, pick_epoch_ms, pick_rows, score_code
+from .rules import NEGATIVE_NEWS_DAYS, DetectedEvent, EventIndex
+from .scoring import WeightConfig, frame_inputs
+from .utils.db import UpsertStats, upsert_many
+
+Pick = Dict[str, object]
+
+
+def _stored(pick: Pick | None) -> Pick | None:
+    # pick_rows() never stores a zero score, so such a pick is a removal.
+    return pick if pick is not None and pick["score"].normalized > 0 else None
+
+
+class PickMaintainer:
+    def __init__(
+        self,
+        weights: WeightConfig,
+        prices: Mapping[str, List[PriceBar]],
+        features: FeatureFrame,
+        index: EventIndex,
+        pick_date: date,
+    ) -> None:
+        """Score ``pick_date`` once for every code; ``index`` is extended in place by pushes."""
+        self.weights = weights
+        self.features = features
+        self.index = index
+        self.pick_date = pick_date
+        self.bars: Dict[str, PriceBar | None] = {}
+        for code, bars in prices.items():
+            if bars:
+                self.bars[code] = next((bar for bar in reversed(bars) if bar.trading_date == pick_date), None)
+        self.picks: Dict[str, Pick] = {}
+        picks = build_daily_picks({}, prices, features, [], [pick_date], weights=weights, index=index)
+        for pick in picks:
+            if _stored(pick) is not None:
+                self.picks[str(pick["code"])] = pick
+
+    def affects(self, event: DetectedEvent) -> bool:
+        """Whether ``event`` can change its code's score on ``pick_date``."""
+        day = event.date.date()
+        if day > self.pick_date:
+            return False
+        if day >= self.pick_date - timedelta(days=PICK_LOOKBACK_DAYS):
+            return True
+        if event.tag == "NEWS_NEG" and day >= self.pick_date - timedelta(days=NEGATIVE_NEWS_DAYS):
+            return True
+        return event.tag == "TDNET" and "下方" in event.title
+
+    def rescore(self, codes: Iterable[str]) -> Dict[str, Pick | None]:
+        """Rescore ``codes``; returns the ones whose stored pick changed (``None``: removed)."""
+        changes: Dict[str, Pick | None] = {}
+        for code in sorted(set(codes)):
+            pick = _stored(
+                score_code(self.weights, self.features, code, self.pick_date, self.bars.get(code), self.index)
+            )
+            previous = self.picks.get(code)
+            if pick is None:
+                if previous is not None:
+                    del self.picks[code]
+                    changes[code] = None
+                continue
+            if previous is None or pick_rows([previous]) != pick_rows([pick]):
+                changes[code] = pick
+            self.picks[code] = pick
+        return changes
+
+    def push_events(self, events: Iterable[DetectedEvent]) -> Dict[str, Pick | None]:
+        """Index ``events`` and rescore only the codes they affect."""
+        events = list(events)
+        self.index.extend(events)
+        return self.rescore({event.code for event in events if self.affects(event)})
+
+    def push_features(
+        self,
+        features: FeatureFrame,
+        bars: Mapping[str, PriceBar] | None = None,
+    ) -> Dict[str, Pick | None]:
+        """Swap in a new feature frame (and pick-date bars); rescores codes whose inputs changed."""
+        pick_iso = self.pick_date.isoformat()
+        touched: Set[str] = set()
+        for code, bar in (bars or {}).items():
+            if bar.trading_date == self.pick_date and bar is not self.bars.get(code):
+                self.bars[code] = bar
+                touched.add(code)
+        for code in set(features.codes) | set(self.features.codes):
+            close = getattr(self.bars.get(code), "close", None)
+            if frame_inputs(features, code, pick_iso, close) != frame_inputs(self.features, code, pick_iso, close):
+                touched.add(code)
+        self.features = features
+        return self.rescore(touched)
+
+
+def write_pick_changes(conn: sqlite3.Connection, pick_date: date, changes: Mapping[str, Pick | None]) -> UpsertStats:
+    """Apply ``PickMaintainer`` changes to the Pick table in one transaction."""
+    rows = pick_rows(pick for pick in changes.values() if pick is not None)
+    removed = [code for code, pick in changes.items() if pick is None]
+    with conn:
+        stats = upsert_many(conn, "Pick", PICK_COLUMNS, ("date", "code"), rows)
+        if removed:
+            cursor = conn.execute(
+                'DELETE FROM "Pick" WHERE date = ? AND code IN (SELECT value FROM json_each(?))',
+                (pick_epoch_ms(pick_date.isoformat()), json.dumps(removed)),
+            )
+            stats.deleted += cursor.rowcount
+    return stats
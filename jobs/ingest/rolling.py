@@ -0,0 +1,145 @@
+"""O(1) streaming rolling-window accumulators.
+
+Each accumulator is fed one value per closed bar with ``push``. ``peek`` returns
+what the statistic would be if a value were pushed next, without mutating the
+state, so an in-progress intraday bar can be re-evaluated on every tick.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+Number = float | int
+
+
+class RollingSum:
+    """Running sum and sum of squares over the last ``window`` values.
+
+    Integer inputs (e.g. volumes) stay exact because Python ints never round.
+    """
+
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.values: Deque[Number] = deque()
+        self.total: Number = 0
+        self.total_sq: Number = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def _evicted(self) -> Number:
+        return self.values[0] if self.full else 0
+
+    def push(self, value: Number) -> None:
+        if self.full:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def peek_totals(self, value: Number) -> Tuple[int, Number, Number]:
+        """Return ``(count, sum, sum_sq)`` as if ``value`` were pushed next."""
+        old = self._evicted()
+        count = len(self.values) + (0 if self.full else 1)
+        return count, self.total - old + value, self.total_sq - old * old + value * value
+
+
+class RollingMean:
+    """Running mean over the last ``window`` values."""
+
+    def __init__(self, window: int) -> None:
+        self.sums = RollingSum(window)
+
+    @property
+    def full(self) -> bool:
+        return self.sums.full
+
+    def push(self, value: Number) -> None:
+        self.sums.push(value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.sums.values:
+            return None
+        return self.sums.total / len(self.sums)
+
+    def peek(self, value: Number) -> float:
+        count, total, _ = self.sums.peek_totals(value)
+        return total / count
+
+
+class RollingZScore:
+    """Population z-score of the newest value against the last ``window`` values."""
+
+    def __init__(self, window: int) -> None:
+        self.sums = RollingSum(window)
+
+    @property
+    def full(self) -> bool:
+        return self.sums.full
+
+    def push(self, value: Number) -> None:
+        self.sums.push(value)
+
+    @staticmethod
+    def _zscore(count: int, total: Number, total_sq: Number, current: Number) -> float:
+        # n * sum_sq - sum^2 is exact for integer inputs, so flat windows give exactly 0.
+        spread = count * total_sq - total * total
+        if spread <= 0:
+            return 0.0
+        std = math.sqrt(spread / (count * count))
+        return (current - total / count) / std
+
+    @property
+    def zscore(self) -> Optional[float]:
+        """z-score of the most recent value, or ``None`` until the window is full."""
+        if not self.full:
+            return None
+        return self._zscore(len(self.sums), self.sums.total, self.sums.total_sq, self.sums.values[-1])
+
+    def peek(self, value: Number) -> Optional[float]:
+        count, total, total_sq = self.sums.peek_totals(value)
+        if count < self.sums.window:
+            return None
+        return self._zscore(count, total, total_sq, value)
+
+
+class RollingMax:
+    """Maximum over the last ``window`` values using a monotonic deque."""
+
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.count = 0
+        # (position, value) pairs with strictly decreasing values; each entry is the
+        # maximum of everything pushed after the entry before it.
+        self.candidates: Deque[Tuple[int, Number]] = deque()
+
+    def push(self, value: Number) -> None:
+        while self.candidates and self.candidates[-1][1] <= value:
+            self.candidates.pop()
+        self.candidates.append((self.count, value))
+        self.count += 1
+        if self.candidates[0][0] <= self.count - 1 - self.window:
+            self.candidates.popleft()
+
+    @property
+    def max(self) -> Optional[Number]:
+        return self.candidates[0][1] if self.candidates else None
+
+    def peek(self, value: Number) -> Number:
+        oldest_kept = self.count + 1 - self.window
+        for position, candidate in self.candidates:
+            if position >= oldest_kept:
+                return max(candidate, value)
+        return value
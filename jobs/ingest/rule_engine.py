@@ -0,0 +1,157 @@
+"""Config-driven headline classification with compiled multi-pattern rule sets.
+
+``config/rules.json`` maps each rule set (``tdnet``, ``earnings``, ``news``)
+to a ``default`` outcome and a list of rules. Each rule has a ``tag``, a
+``priority``, an optional ``score_raw`` and its ``keywords`` (literal
+substrings) and/or ``patterns`` (regular expressions). A title gets the
+highest-priority rule that matches anywhere in it (ties go to the rule listed
+first), or the default when nothing matches.
+
+A rule set compiles to at most two regular expressions:
+
+- every keyword of every rule folded into one prefix trie, so each position of
+  a title is tried once against the trie instead of once per keyword, and
+- the regex patterns as one alternation of named groups in priority order.
+
+Both sit in a lookahead so overlapping matches are all seen. ``classify``
+joins a batch of titles with newlines and runs each expression once over the
+whole batch; patterns therefore must not match a line break.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    tag: str
+    priority: float = 0.0
+    score_raw: float | None = None
+    keywords: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, data: Mapping[str, object]) -> "Rule":
+        return cls(
+            tag=str(data["tag"]),
+            priority=float(data.get("priority", 0.0)),
+            score_raw=float(data["score_raw"]) if data.get("score_raw") is not None else None,
+            keywords=tuple(str(word) for word in data.get("keywords", ()) if word),
+            patterns=tuple(str(pattern) for pattern in data.get("patterns", ())),
+        )
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """Regex matching the longest of ``words`` at a position, branching by prefix."""
+    root: Dict[str, dict] = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Children come before the end of a word, so longer keywords win.
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(root)
+
+
+class RuleSet:
+    def __init__(self, rules: Sequence[Rule], default: Rule) -> None:
+        self.default = default
+        # Rank 0 is the best rule; sorted() is stable, so ties keep config order.
+        self.rules: List[Rule] = sorted(rules, key=lambda rule: -rule.priority)
+        keyword_rank: Dict[str, int] = {}
+        for rank, rule in enumerate(self.rules):
+            for word in rule.keywords:
+                keyword_rank.setdefault(word, rank)
+        # A trie match is the longest keyword at its position; every shorter
+        # keyword matching there is one of its prefixes.
+        self._keyword_rank = {
+            word: min(keyword_rank.get(word[:size], rank) for size in range(1, len(word) + 1))
+            for word, rank in keyword_rank.items()
+        }
+        self._keywords = re.compile(f"(?=({_trie_pattern(list(keyword_rank))}))") if keyword_rank else None
+        branches = [
+            f"(?P<r{rank}>{'|'.join(f'(?:{pattern})' for pattern in rule.patterns)})"
+            for rank, rule in enumerate(self.rules)
+            if rule.patterns
+        ]
+        self._patterns = re.compile(f"(?=(?:{'|'.join(branches)}))") if branches else None
+
+    def classify(self, titles: Sequence[str]) -> List[Rule]:
+        """Best matching rule (or ``default``) for each of ``titles``."""
+        unmatched = len(self.rules)
+        best = [unmatched] * len(titles)
+        if titles and (self._keywords is not None or self._patterns is not None):
+            text = "\n".join(titles)
+            starts: List[int] = []
+            offset = 0
+            for title in titles:
+                starts.append(offset)
+                offset += len(title) + 1
+            if self._keywords is not None:
+                for match in self._keywords.finditer(text):
+                    pos = bisect_right(starts, match.start()) - 1
+                    rank = self._keyword_rank[match.group(1)]
+                    if rank < best[pos]:
+                        best[pos] = rank
+            if self._patterns is not None:
+                for match in self._patterns.finditer(text):
+                    pos = bisect_right(starts, match.start()) - 1
+                    rank = int(match.lastgroup[1:])
+                    if rank < best[pos]:
+                        best[pos] = rank
+        return [self.rules[rank] if rank != unmatched else self.default for rank in best]
+
+    def match(self, title: str) -> Rule:
+        return self.classify([title])[0]
+
+
+def rules_path(env: Mapping[str, str]) -> Path:
+    """Location of rules.json: ``RULES_CONFIG_PATH`` or ``config/rules.json``."""
+    candidate_env = env.get("RULES_CONFIG_PATH")
+    base_candidates = [
+        Path(candidate_env) if candidate_env else None,
+        Path.cwd() / "config" / "rules.json",
+        Path.cwd().parent / "config" / "rules.json",
+        Path(__file__).resolve().parents[2] / "config" / "rules.json",
+    ]
+    config_path = next((path for path in base_candidates if path and path.exists()), None)
+    if not config_path:
+        raise FileNotFoundError("rules.json not found")
+    return config_path
+
+
+def load_rule_sets(path: str | Path) -> Dict[str, RuleSet]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {
+        name: RuleSet(
+            [Rule.from_config(rule) for rule in section.get("rules", [])],
+            Rule.from_config(section["default"]),
+        )
+        for name, section in data.items()
+    }
+
+
+@cache
+def _rule_sets(path: Path, mtime_ns: int) -> Dict[str, RuleSet]:
+    return load_rule_sets(path)
+
+
+def rule_set(name: str, env: Mapping[str, str] | None = None) -> RuleSet:
+    """Compiled rule set ``name``; recompiled only when rules.json changes."""
+    path = rules_path(os.environ if env is None else env)
+    return _rule_sets(path, path.stat().st_mtime_ns)[name]
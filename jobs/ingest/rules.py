@@ -1,35 +1,29 @@
 """Event detection rules for the MVP."""
 from __future__ import annotations
 
-import re
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Iterable, List, Mapping
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Collection, Dict, Iterable, KeysView, List, Mapping, Sequence, Tuple
 
 from .adapters.earnings_adapter import EarningsItem
 from .adapters.news_adapter import NewsItem
 from .adapters.tdnet_rss_adapter import TdnetItem
-from .features import FeatureRecord
-
-GUIDE_UP_PATTERNS = [
-    re.compile(pattern)
-    for pattern in [
-        r"上方修正",
-        r"増配",
-        r"業績予想.*修正",
-        r"利益予想.*上方"
-    ]
-]
-
-EARNINGS_PATTERNS = [
-    re.compile(pattern)
-    for pattern in [
-        r"第?\d四半期",
-        r"通期",
-        r"上期",
-        r"下期",
-    ]
-]
+from .features import FeatureFrame, FeatureRecord
+from .rule_engine import RuleSet, rule_set
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VOLUME_SPIKE_THRESHOLD = 2.0
+
+# Penalty rules: negative news within NEGATIVE_NEWS_DAYS of the pick date (or
+# later), and any TDnet title announcing a downward revision.
+NEGATIVE_NEWS_DAYS = 5
+NEGATIVE_NEWS_PENALTY = 0.2
+DOWNWARD_REVISION_PENALTY = 0.3
+# Sub-index key for TDNET events whose title contains "下方".
+DOWNWARD_REVISION = "TDNET_DOWNWARD"
 
 
 @dataclass(slots=True)
@@ -44,83 +38,196 @@ class DetectedEvent:
     score_raw: float | None = None
 
 
-def detect_tdnet(items: Iterable[TdnetItem]) -> List[DetectedEvent]:
-    events: List[DetectedEvent] = []
-    for item in items:
-        for pattern in GUIDE_UP_PATTERNS:
-            if pattern.search(item.title):
-                events.append(
-                    DetectedEvent(
-                        code=item.code,
-                        date=item.announced_at,
-                        type="GUIDE_UP",
-                        tag="GUIDE_UP",
-                        title=item.title,
-                        summary=item.summary,
-                        source=item.source,
-                        score_raw=0.9,
-                    )
-                )
-                break
-        else:
-            events.append(
-                DetectedEvent(
-                    code=item.code,
-                    date=item.announced_at,
-                    type="TDNET",
-                    tag="TDNET",
-                    title=item.title,
-                    summary=item.summary,
-                    source=item.source,
-                    score_raw=0.5,
-                )
-            )
-    return events
+class EventIndex:
+    """Events grouped by code and sorted by calendar day for range queries.
 
+    Each code keeps ``(day ordinal, input position, event)`` entries sorted by
+    day, with a parallel list of ordinals, so a day range is two bisects. Every
+    tag (plus ``DOWNWARD_REVISION``) also gets a sorted ordinal sub-index per
+    code for the penalty rules. Range results are returned in input order, which
+    keeps reason lists identical to filtering the raw event list.
+    """
 
-def detect_earnings(items: Iterable[EarningsItem]) -> List[DetectedEvent]:
-    events: List[DetectedEvent] = []
-    for item in items:
-        tone = 0.6
-        for pattern in EARNINGS_PATTERNS:
-            if pattern.search(item.title):
-                tone = 0.8
-                break
-        events.append(
-            DetectedEvent(
-                code=item.code,
-                date=item.announced_at,
-                type="EARNINGS",
-                tag="EARNINGS_POSITIVE",
-                title=item.title,
-                summary=item.summary,
-                source=item.source,
-                score_raw=tone,
-            )
+    def __init__(self, events: Iterable[DetectedEvent] = ()) -> None:
+        self._entries: Dict[str, List[Tuple[int, int, DetectedEvent]]] = {}
+        self._days: Dict[str, List[int]] = {}
+        self._tag_days: Dict[str, Dict[str, List[int]]] = {}
+        self._count = 0
+        self.extend(events)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def extend(self, events: Iterable[DetectedEvent]) -> None:
+        touched: Dict[str, List[Tuple[int, int, DetectedEvent]]] = {}
+        position = self._count
+        for event in events:
+            entries = touched.get(event.code)
+            if entries is None:
+                entries = touched[event.code] = self._entries.setdefault(event.code, [])
+            # datetime.toordinal() is the ordinal of the event's calendar date.
+            entries.append((event.date.toordinal(), position, event))
+            position += 1
+        self._count = position
+        for code, entries in touched.items():
+            # (day, position) keys are unique, so tuples never compare events;
+            # already-indexed entries stay sorted, which makes this a cheap merge.
+            entries.sort()
+            self._days[code] = [entry[0] for entry in entries]
+            by_tag: Dict[str, List[int]] = {}
+            for day, _, event in entries:
+                days = by_tag.get(event.tag)
+                if days is None:
+                    days = by_tag[event.tag] = []
+                days.append(day)
+                if event.tag == "TDNET" and "下方" in event.title:
+                    by_tag.setdefault(DOWNWARD_REVISION, []).append(day)
+            self._tag_days[code] = by_tag
+
+    def codes(self) -> KeysView[str]:
+        return self._days.keys()
+
+    def events(self, code: str) -> List[DetectedEvent]:
+        """All events of ``code`` in input order."""
+        return [entry[2] for entry in sorted(self._entries.get(code, []), key=lambda entry: entry[1])]
+
+    def by_day(self, code: str) -> List[Tuple[int, DetectedEvent]]:
+        """``(day ordinal, event)`` pairs of ``code`` in day order."""
+        return [(entry[0], entry[2]) for entry in self._entries.get(code, [])]
+
+    def between(self, code: str, first: date, last: date) -> List[DetectedEvent]:
+        """Events of ``code`` dated ``first`` through ``last`` (inclusive), in input order."""
+        days = self._days.get(code)
+        if not days:
+            return []
+        lo = bisect_left(days, first.toordinal())
+        hi = bisect_right(days, last.toordinal())
+        window = self._entries[code][lo:hi]
+        window.sort(key=lambda entry: entry[1])
+        return [entry[2] for entry in window]
+
+    def tag_days(self, code: str, tag: str) -> List[int]:
+        """Sorted day ordinals of ``code``'s ``tag`` events (read-only)."""
+        return self._tag_days.get(code, {}).get(tag, [])
+
+    def negative_penalty(self, code: str, day: date) -> float:
+        """Penalty on ``day`` from events published by then: NEWS_NEG within
+        ``NEGATIVE_NEWS_DAYS`` before ``day``, or any earlier downward revision."""
+        ordinal = day.toordinal()
+        penalty = 0.0
+        negative = self.tag_days(code, "NEWS_NEG")
+        if bisect_right(negative, ordinal) > bisect_left(negative, ordinal - NEGATIVE_NEWS_DAYS):
+            penalty = NEGATIVE_NEWS_PENALTY
+        if bisect_right(self.tag_days(code, DOWNWARD_REVISION), ordinal):
+            penalty = max(penalty, DOWNWARD_REVISION_PENALTY)
+        return penalty
+
+
+def detect_tdnet(items: Iterable[TdnetItem], rules: RuleSet | None = None) -> List[DetectedEvent]:
+    """Classify TDnet titles with the ``tdnet`` rule set (default: config/rules.json)."""
+    items = list(items)
+    matches = (rules or rule_set("tdnet")).classify([item.title for item in items])
+    return [
+        DetectedEvent(
+            code=item.code,
+            date=item.announced_at,
+            type=rule.tag,
+            tag=rule.tag,
+            title=item.title,
+            summary=item.summary,
+            source=item.source,
+            score_raw=rule.score_raw,
         )
-    return events
+        for item, rule in zip(items, matches)
+    ]
+
+
+def detect_earnings(items: Iterable[EarningsItem], rules: RuleSet | None = None) -> List[DetectedEvent]:
+    """Classify earnings titles with the ``earnings`` rule set (default: config/rules.json)."""
+    items = list(items)
+    matches = (rules or rule_set("earnings")).classify([item.title for item in items])
+    return [
+        DetectedEvent(
+            code=item.code,
+            date=item.announced_at,
+            type="EARNINGS",
+            tag=rule.tag,
+            title=item.title,
+            summary=item.summary,
+            source=item.source,
+            score_raw=rule.score_raw,
+        )
+        for item, rule in zip(items, matches)
+    ]
+
+
+def spike_thresholds(env: Mapping[str, str]) -> Tuple[float, ...]:
+    """Ascending spike levels from ``VOL_SPIKE_THRESHOLDS`` (e.g. ``2,3,5``)."""
+    raw = env.get("VOL_SPIKE_THRESHOLDS", "")
+    levels = sorted({float(part) for part in raw.split(",") if part.strip()})
+    return tuple(levels) or (VOLUME_SPIKE_THRESHOLD,)
+
+
+def volume_spike_event(code: str, occurred_at: datetime, volume_z: float, level: int = 1) -> DetectedEvent:
+    """VOL_SPIKE event; ``level`` is how many thresholds ``volume_z`` reached.
+
+    The level is only recorded in ``summary``: the tag stays ``VOL_SPIKE`` so
+    weights and event ids do not depend on the thresholds, and ``score_raw``
+    already grows with ``volume_z``. Scoring therefore does not see the level.
+    """
+    summary = f"volume_z={volume_z:.2f}"
+    if level > 1:
+        summary += f" level={level}"
+    return DetectedEvent(
+        code=code,
+        date=occurred_at,
+        type="VOL_SPIKE",
+        tag="VOL_SPIKE",
+        title="出来高急増",
+        summary=summary,
+        source="volume_rule",
+        score_raw=min(volume_z / 5, 1.0),
+    )
+
+
+def spike_levels(volume_z: "np.ndarray", thresholds: Sequence[float]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Positions where ``volume_z`` reaches the lowest threshold, and their levels.
+
+    NaN (no volume_z yet) never reaches a threshold.
+    """
+    import numpy as np
+
+    hits = np.flatnonzero(volume_z >= thresholds[0])
+    return hits, np.searchsorted(np.asarray(thresholds), volume_z[hits], side="right")
+
+
+def detect_volume_spike(
+    features: FeatureFrame,
+    thresholds: Sequence[float] = (VOLUME_SPIKE_THRESHOLD,),
+    stored: Collection[Tuple[str, str]] = (),
+) -> List[DetectedEvent]:
+    """VOL_SPIKE events for every row of ``features`` at or above ``thresholds[0]``.
 
+    ``thresholds`` must be ascending. ``(code, ISO date)`` pairs in ``stored``
+    (spikes already in CorporateEvent) are skipped.
+    """
+    import numpy as np
 
-def detect_volume_spike(feature_map: Mapping[str, Mapping[str, Mapping[str, float]]]) -> List[DetectedEvent]:
+    volume_z = np.frombuffer(features.column("volume_z"), dtype=np.float64)
+    hits, levels = spike_levels(volume_z, thresholds)
+    code_ids = np.frombuffer(features.row_code, dtype=np.intc)[hits].tolist()
+    date_ids = np.frombuffer(features.row_date, dtype=np.intc)[hits].tolist()
+    # Each distinct date is parsed once, however many codes spiked on it.
+    occurred: Dict[int, datetime] = {}
     events: List[DetectedEvent] = []
-    for code, by_date in feature_map.items():
-        for date_str, features in by_date.items():
-            volume_z = features.get("volume_z")
-            if volume_z is None:
-                continue
-            if volume_z >= 2.0:
-                events.append(
-                    DetectedEvent(
-                        code=code,
-                        date=datetime.fromisoformat(date_str),
-                        type="VOL_SPIKE",
-                        tag="VOL_SPIKE",
-                        title="出来高急増",
-                        summary=f"volume_z={volume_z:.2f}",
-                        source="volume_rule",
-                        score_raw=min(volume_z / 5, 1.0),
-                    )
-                )
+    for code_id, date_id, value, level in zip(code_ids, date_ids, volume_z[hits].tolist(), levels.tolist()):
+        code = features.codes[code_id]
+        if stored and (code, features.dates[date_id]) in stored:
+            continue
+        when = occurred.get(date_id)
+        if when is None:
+            when = occurred[date_id] = datetime.fromisoformat(features.dates[date_id])
+        events.append(volume_spike_event(code, when, value, level))
     return events
 
 
@@ -5,13 +5,20 @@ import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Sequence, Tuple
 
+from .features import FeatureFrame
 from .rules import DetectedEvent
 
+if TYPE_CHECKING:
+    import numpy as np
+
+TAPE_METRICS = ("volume_z", "gap_pct", "supply_demand_proxy")
+
 VOLUME_Z_MAX = 5
 GAP_PCT_MAX = 0.05
 SUPPLY_DEMAND_MAX = 2
+TAPE_LIMITS = {"volume_z": VOLUME_Z_MAX, "gap_pct": GAP_PCT_MAX, "supply_demand_proxy": SUPPLY_DEMAND_MAX}
 
 
 @dataclass(slots=True)
@@ -22,6 +29,19 @@ class ScoreComponents:
     reasons: List[Dict[str, object]]
 
 
+@dataclass(slots=True)
+class BatchScores:
+    """Numeric ``calculate_score`` results for many codes, without reasons."""
+
+    raw: "np.ndarray"
+    normalized: "np.ndarray"
+    passed_filters: "np.ndarray"
+
+    def passing(self, min_score: float) -> List[int]:
+        """Positions whose normalized score reaches ``min_score``."""
+        return [int(pos) for pos in (self.normalized >= min_score).nonzero()[0]]
+
+
 @dataclass(slots=True)
 class WeightConfig:
     event: Dict[str, float]
@@ -29,7 +49,8 @@ class WeightConfig:
     minScore: float
 
 
-def load_weights(env: Mapping[str, str]) -> WeightConfig:
+def weights_path(env: Mapping[str, str]) -> Path:
+    """Location of the weights.json that ``load_weights`` reads."""
     candidate_env = env.get("WEIGHT_CONFIG_PATH")
     base_candidates = [
         Path(candidate_env) if candidate_env else None,
@@ -40,6 +61,11 @@ def load_weights(env: Mapping[str, str]) -> WeightConfig:
     config_path = next((path for path in base_candidates if path and path.exists()), None)
     if not config_path:
         raise FileNotFoundError("weights.json not found")
+    return config_path
+
+
+def load_weights(env: Mapping[str, str]) -> WeightConfig:
+    config_path = weights_path(env)
     data = json.loads(config_path.read_text(encoding="utf-8"))
     event = data["event"]
     tape = data["tape"]
@@ -77,6 +103,46 @@ def load_weights(env: Mapping[str, str]) -> WeightConfig:
     return WeightConfig(event=event, tape=tape, minScore=min_score)
 
 
+def frame_inputs(
+    features: FeatureFrame,
+    code: str,
+    day: str,
+    close: float | None,
+) -> Tuple[Dict[str, float | None], Dict[str, float | None]]:
+    """Read the tape metrics and filter inputs for ``(code, day)`` straight from the frame."""
+    row = features.row(code, day)
+    metrics = {name: features.at(row, name) for name in TAPE_METRICS}
+    filters = {"high20d_dist_pct": features.at(row, "high20d_dist_pct"), "close": close}
+    return metrics, filters
+
+
+def frame_batch_inputs(
+    features: FeatureFrame,
+    codes: Sequence[str],
+    day: str,
+    closes: Sequence[float | None],
+) -> Tuple[Dict[str, "np.ndarray"], Dict[str, "np.ndarray"]]:
+    """Columnar ``frame_inputs`` for many codes; NaN marks a missing value."""
+    import numpy as np
+
+    rows = [features.row(code, day) for code in codes]
+    present = np.array([row is not None for row in rows], dtype=bool)
+    positions = np.array([row if row is not None else 0 for row in rows], dtype=np.int64)
+
+    def gather(name: str) -> np.ndarray:
+        if not len(features):
+            return np.full(len(codes), np.nan)
+        column = np.frombuffer(features.column(name), dtype=np.float64)
+        return np.where(present, column[positions], np.nan)
+
+    metrics = {name: gather(name) for name in TAPE_METRICS}
+    filters = {
+        "high20d_dist_pct": gather("high20d_dist_pct"),
+        "close": np.array([np.nan if close is None else close for close in closes], dtype=np.float64),
+    }
+    return metrics, filters
+
+
 def normalize_tape(metrics: Mapping[str, float]) -> List[Dict[str, object]]:
     reasons: List[Dict[str, object]] = []
     mapping = {
@@ -102,6 +168,67 @@ def normalize_tape(metrics: Mapping[str, float]) -> List[Dict[str, object]]:
     return reasons
 
 
+def score_batch(
+    weights: WeightConfig,
+    events: Sequence[Sequence[DetectedEvent]],
+    metrics: Mapping[str, "np.ndarray"],
+    filters: Mapping[str, "np.ndarray"],
+    penalties: Sequence[float],
+) -> BatchScores:
+    """Numeric pass of ``calculate_score`` over many codes at once.
+
+    Position ``i`` of every input describes one code: its candidate events, tape
+    metrics and filter inputs (NaN for missing, as from ``frame_batch_inputs``)
+    and its ``recent_negative`` penalty. Sums are accumulated in the same order
+    as ``calculate_score`` (tape metrics, then events in list order), so the
+    scores are bit-identical; reasons are left to ``calculate_score`` for the
+    codes that pass the threshold.
+    """
+    import numpy as np
+
+    count = len(events)
+    weighted_total = np.zeros(count)
+    weight_sum = np.zeros(count)
+    for name, max_value in TAPE_LIMITS.items():
+        tag_weight = weights.tape.get(name, 0.0)
+        if tag_weight == 0:
+            continue
+        values = np.asarray(metrics[name], dtype=np.float64)
+        present = ~np.isnan(values)
+        normalized = np.clip(values, 0, max_value) / max_value
+        weighted_total += np.where(present, normalized * tag_weight, 0.0)
+        weight_sum += np.where(present, tag_weight, 0.0)
+
+    # Pad each code's weighted events into columns so the k-th event of every
+    # code is added in the k-th step, preserving the scalar summation order.
+    columns: List[List[Tuple[int, float, float]]] = []
+    for pos, code_events in enumerate(events):
+        slot = 0
+        for event in code_events:
+            tag_weight = weights.event.get(event.tag, 0.0)
+            if tag_weight == 0:
+                continue
+            raw_score = event.score_raw if event.score_raw is not None else 1.0
+            if slot == len(columns):
+                columns.append([])
+            columns[slot].append((pos, min(max(raw_score, 0.0), 1.0) * tag_weight, tag_weight))
+            slot += 1
+    for column in columns:
+        positions = np.array([item[0] for item in column], dtype=np.int64)
+        weighted_total[positions] += np.array([item[1] for item in column])
+        weight_sum[positions] += np.array([item[2] for item in column])
+
+    scored = weight_sum != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base_score = np.where(scored, weighted_total / weight_sum, 0.0)
+    penalty = np.clip(np.asarray(penalties, dtype=np.float64), 0.0, 1.0)
+    raw = np.where(scored, np.maximum(base_score - penalty, 0.0), 0.0)
+    high20 = np.asarray(filters["high20d_dist_pct"], dtype=np.float64)
+    close = np.asarray(filters["close"], dtype=np.float64)
+    passed = scored & ~(high20 < -0.15) & ~(close < 100)
+    return BatchScores(raw=raw, normalized=np.where(passed, raw * 100, 0.0), passed_filters=passed)
+
+
 def calculate_score(
     weights: WeightConfig,
     events: Iterable[DetectedEvent],
@@ -0,0 +1,344 @@
+"""What-if scoring of many ``WeightConfig`` variants in one pass.
+
+Every ``(code, date)`` pair is reduced once to weight-free components:
+
+- ``tape.<metric>``: the normalized metric (value) and whether it is present (count),
+- ``event.<tag>``: the sum of clipped ``score_raw`` over the 10-day window
+  (value) and the number of such events (count),
+
+plus the weight-free penalty and filter mask. For a weight matrix ``W``
+(components x variants), ``values @ W`` is every variant's weighted total and
+``counts @ W`` its weight sum, so all variants are scored with two matrix
+products per block of pairs. Nothing is written to the database.
+
+Scores match ``calculate_score`` up to float summation order (~1e-12), so a
+pair sitting exactly on a variant's ``minScore`` may differ from a real run.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.sweep --grid minScore=50,60,70 --grid event.GUIDE_UP=0.6,1.0
+    PYTHONPATH=. python -m jobs.ingest.sweep --variants variants.json --from 2024-01-01 --top 3
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from .adapters.price_adapter import PriceAdapter, PriceBar
+from .features import FeatureCalculator, FeatureFrame
+from .pick_backfill import AlignedHistory, filters_pass, penalty_by_day, pick_history_dates, window_sums
+from .rules import DetectedEvent, detect_volume_spike, spike_thresholds
+from .scoring import TAPE_LIMITS, WeightConfig, load_weights
+from .utils.env import load_env
+
+# Score histogram buckets: [0, 10), [10, 20), ..., [90, 100].
+HISTOGRAM_BINS = 10
+# Upper bound on pairs x variants materialized at once.
+BLOCK_CELLS = 1_000_000
+
+
+@dataclass(slots=True)
+class ComponentMatrix:
+    """Weight-free score components of every ``(code, date)`` pair with any input."""
+
+    components: Tuple[str, ...]
+    codes: List[str]
+    dates: List[date]
+    pair_code: np.ndarray
+    pair_date: np.ndarray
+    values: np.ndarray
+    counts: np.ndarray
+    penalty: np.ndarray
+    passed: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pair_code)
+
+
+@dataclass(slots=True)
+class SweepResult:
+    weights: WeightConfig
+    overrides: Dict[str, float] = field(default_factory=dict)
+    # Picked pairs (indexes into the ComponentMatrix, by date then code) and their scores.
+    pairs: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    scores: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    # Pairs with a non-zero weight sum, bucketed by normalized score.
+    histogram: List[int] = field(default_factory=list)
+    matrix: ComponentMatrix | None = None
+
+    @property
+    def picks(self) -> List[Tuple[date, str, float]]:
+        """``(date, code, score)`` of every pick, by date then code."""
+        if self.matrix is None:
+            return []
+        return [
+            (self.matrix.dates[day], self.matrix.codes[code], score)
+            for day, code, score in zip(
+                self.matrix.pair_date[self.pairs].tolist(),
+                self.matrix.pair_code[self.pairs].tolist(),
+                self.scores.tolist(),
+            )
+        ]
+
+    def summary(self, top: int = 0) -> Dict[str, object]:
+        out: Dict[str, object] = {
+            "overrides": self.overrides,
+            "minScore": self.weights.minScore,
+            "picks": len(self.pairs),
+            "pickDates": len(np.unique(self.matrix.pair_date[self.pairs])) if self.matrix is not None else 0,
+            "meanScore": round(float(self.scores.mean()), 2) if len(self.scores) else None,
+            "histogram": self.histogram,
+        }
+        if top and self.matrix is not None:
+            # Stable sort keeps date/code order among equal scores.
+            best = np.argsort(-self.scores, kind="stable")[:top]
+            out["top"] = [
+                {
+                    "date": self.matrix.dates[self.matrix.pair_date[self.pairs[pos]]].isoformat(),
+                    "code": self.matrix.codes[self.matrix.pair_code[self.pairs[pos]]],
+                    "score": round(float(self.scores[pos]), 2),
+                }
+                for pos in best.tolist()
+            ]
+        return out
+
+
+def build_components(
+    prices: Mapping[str, List[PriceBar]],
+    features: FeatureFrame,
+    events: Sequence[DetectedEvent],
+    dates: Sequence[date] | None = None,
+    tags: Sequence[str] = (),
+) -> ComponentMatrix:
+    """Reduce every scored ``(code, date)`` pair to weight-free components.
+
+    Event tags are those of ``events`` plus ``tags`` (e.g. every tag a variant
+    weights). Pairs without any tape metric or windowed event are dropped; they
+    score 0 under every variant.
+    """
+    history = AlignedHistory(prices, features, events, pick_history_dates(prices, events) if dates is None else dates)
+    tag_list = sorted(set(tags) | {event.tag for event in events})
+    components = tuple([f"tape.{name}" for name in TAPE_LIMITS] + [f"event.{tag}" for tag in tag_list])
+    axis = history.day_ords
+    width = len(axis)
+
+    blocks: Dict[str, List[np.ndarray]] = {
+        name: [] for name in ("code", "date", "values", "counts", "penalty", "passed")
+    }
+    for code_pos, code in enumerate(history.codes):
+        feature_values = history.feature_values(code)
+        values = np.zeros((width, len(components)))
+        counts = np.zeros((width, len(components)))
+        for col, (name, max_value) in enumerate(TAPE_LIMITS.items()):
+            metric = feature_values[name]
+            present = ~np.isnan(metric)
+            values[:, col] = np.where(present, np.clip(metric, 0, max_value) / max_value, 0.0)
+            counts[:, col] = present
+        by_tag: Dict[str, List[Tuple[int, float]]] = {}
+        for day, event in history.index.by_day(code):
+            raw = event.score_raw if event.score_raw is not None else 1.0
+            by_tag.setdefault(event.tag, []).append((day, min(max(raw, 0.0), 1.0)))
+        for tag, items in by_tag.items():
+            col = len(TAPE_LIMITS) + tag_list.index(tag)
+            days = np.array([item[0] for item in items], dtype=np.int64)
+            values[:, col] = window_sums(axis, days, np.array([item[1] for item in items]))
+            counts[:, col] = window_sums(axis, days, np.ones(len(items)))
+
+        keep = counts.any(axis=1)
+        if not keep.any():
+            continue
+        close, _ = history.closes(code)
+        blocks["code"].append(np.full(int(keep.sum()), code_pos, dtype=np.int32))
+        blocks["date"].append(history.order[keep].astype(np.int32))
+        blocks["values"].append(values[keep])
+        blocks["counts"].append(counts[keep])
+        blocks["penalty"].append(penalty_by_day(history.index, code, axis)[keep])
+        blocks["passed"].append(filters_pass(feature_values["high20d_dist_pct"], close)[keep])
+
+    def stack(name: str, empty: np.ndarray) -> np.ndarray:
+        return np.concatenate(blocks[name]) if blocks[name] else empty
+
+    return ComponentMatrix(
+        components=components,
+        codes=history.codes,
+        dates=history.dates,
+        pair_code=stack("code", np.zeros(0, np.int32)),
+        pair_date=stack("date", np.zeros(0, np.int32)),
+        values=stack("values", np.zeros((0, len(components)))),
+        counts=stack("counts", np.zeros((0, len(components)))),
+        penalty=stack("penalty", np.zeros(0)),
+        passed=stack("passed", np.zeros(0, dtype=bool)),
+    )
+
+
+def weight_matrix(variants: Sequence[WeightConfig], components: Sequence[str]) -> np.ndarray:
+    """``(components, variants)`` matrix of each variant's weight per component."""
+    matrix = np.zeros((len(components), len(variants)))
+    for col, variant in enumerate(variants):
+        for row, component in enumerate(components):
+            bucket, name = component.split(".", 1)
+            matrix[row, col] = (variant.tape if bucket == "tape" else variant.event).get(name, 0.0)
+    return matrix
+
+
+def run_sweep(
+    matrix: ComponentMatrix,
+    variants: Sequence[WeightConfig],
+    overrides: Sequence[Mapping[str, float]] | None = None,
+) -> List[SweepResult]:
+    """Score every variant over ``matrix``; returns pick sets and score histograms."""
+    results = [
+        SweepResult(weights=variant, overrides=dict(overrides[pos]) if overrides else {}, matrix=matrix)
+        for pos, variant in enumerate(variants)
+    ]
+    if not variants:
+        return results
+    variant_weights = np.ascontiguousarray(weight_matrix(variants, matrix.components).T)
+    min_scores = np.array([variant.minScore for variant in variants], dtype=np.float64)
+    histogram = np.zeros(len(variants) * HISTOGRAM_BINS, dtype=np.int64)
+    bucket_offsets = np.arange(len(variants)) * HISTOGRAM_BINS
+    step = max(1, BLOCK_CELLS // len(variants))
+    hit_pairs: List[List[np.ndarray]] = [[] for _ in variants]
+    hit_scores: List[List[np.ndarray]] = [[] for _ in variants]
+
+    for start in range(0, len(matrix), step):
+        rows = slice(start, start + step)
+        # Variants x pairs, so each variant's hits come out contiguous.
+        normalized = variant_weights @ matrix.values[rows].T
+        weight_sum = variant_weights @ matrix.counts[rows].T
+        scored = weight_sum != 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(normalized, weight_sum, out=normalized)
+        normalized -= matrix.penalty[rows]
+        np.maximum(normalized, 0.0, out=normalized)
+        normalized *= 100
+        np.copyto(normalized, 0.0, where=~(scored & matrix.passed[rows]))
+
+        # Scores are >= 0, so truncation is the floor; unscored pairs go to a spill bucket.
+        buckets = (normalized * (HISTOGRAM_BINS / 100)).astype(np.intp)
+        np.minimum(buckets, HISTOGRAM_BINS - 1, out=buckets)
+        buckets += bucket_offsets[:, None]
+        np.copyto(buckets, len(histogram), where=~scored)
+        histogram += np.bincount(buckets.ravel(), minlength=len(histogram) + 1)[:-1]
+
+        # Stored picks need a positive score as well as minScore (see upsert_picks).
+        hit_cols, hit_rows = np.nonzero((normalized >= min_scores[:, None]) & (normalized > 0))
+        bounds = np.searchsorted(hit_cols, np.arange(len(variants) + 1))
+        for col in range(len(variants)):
+            lo, hi = bounds[col], bounds[col + 1]
+            if lo == hi:
+                continue
+            hit_pairs[col].append(hit_rows[lo:hi] + start)
+            hit_scores[col].append(normalized[col, hit_rows[lo:hi]])
+
+    # Matrix pairs run code-major; picks are reported by date, then code.
+    date_ords = np.array([day.toordinal() for day in matrix.dates], dtype=np.int64)
+    rank = np.empty(len(matrix), dtype=np.int64)
+    rank[np.lexsort((matrix.pair_code, date_ords[matrix.pair_date]))] = np.arange(len(matrix))
+    for pos, result in enumerate(results):
+        result.histogram = histogram[pos * HISTOGRAM_BINS : (pos + 1) * HISTOGRAM_BINS].tolist()
+        if hit_pairs[pos]:
+            pairs = np.concatenate(hit_pairs[pos])
+            order = np.argsort(rank[pairs], kind="stable")
+            result.pairs = pairs[order]
+            result.scores = np.concatenate(hit_scores[pos])[order]
+    return results
+
+
+def apply_overrides(base: WeightConfig, overrides: Mapping[str, float]) -> WeightConfig:
+    """Copy ``base`` with ``event.<TAG>``, ``tape.<metric>`` or ``minScore`` keys replaced."""
+    variant = WeightConfig(event=copy.copy(base.event), tape=copy.copy(base.tape), minScore=base.minScore)
+    for key, value in overrides.items():
+        if key == "minScore":
+            variant.minScore = float(value)
+            continue
+        bucket, _, name = key.partition(".")
+        if bucket not in ("event", "tape") or not name:
+            raise ValueError(f"Unknown weight key: {key}")
+        (variant.event if bucket == "event" else variant.tape)[name] = float(value)
+    return variant
+
+
+def expand_grid(grid: Mapping[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Cartesian product of ``{key: [values...]}`` as a list of override dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[key] for key in keys))]
+
+
+def _parse_grid(entries: Sequence[str]) -> Dict[str, List[float]]:
+    grid: Dict[str, List[float]] = {}
+    for entry in entries:
+        key, _, values = entry.partition("=")
+        grid[key.strip()] = [float(value) for value in values.split(",") if value.strip()]
+    return grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score many weight variants without writing picks.")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2", help="weight key values to sweep")
+    parser.add_argument("--variants", help="JSON file with a list of override objects")
+    parser.add_argument("--prices", help="OHLCV CSV in the sample format (defaults to the sample file)")
+    parser.add_argument("--from", dest="date_from", help="first pick date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="last pick date (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, default=0, help="include the N best picks of each variant")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from .main import fetch_events, open_session
+
+    env = load_env()
+    base = load_weights(env)
+    overrides: List[Dict[str, float]] = []
+    if args.variants:
+        with open(args.variants, "r", encoding="utf-8") as fp:
+            overrides.extend(json.load(fp))
+    overrides.extend(expand_grid(_parse_grid(args.grid)) if args.grid else [])
+    if not overrides:
+        overrides = [{}]
+    variants = [apply_overrides(base, item) for item in overrides]
+
+    started = time.perf_counter()
+    price_adapter = PriceAdapter(args.prices)
+    prices = price_adapter.fetch()
+    features = FeatureCalculator(price_adapter, engine=env.get("FEATURE_ENGINE") or None).compute(prices)
+    session, _ = open_session(env)
+    events = fetch_events(env, session) + detect_volume_spike(features, spike_thresholds(env))
+    dates = pick_history_dates(prices, events)
+    if args.date_from:
+        dates = [day for day in dates if day >= date.fromisoformat(args.date_from)]
+    if args.date_to:
+        dates = [day for day in dates if day <= date.fromisoformat(args.date_to)]
+    tags = {tag for variant in variants for tag in variant.event}
+    matrix = build_components(prices, features, events, dates, tags=sorted(tags))
+    loaded = time.perf_counter()
+    results = run_sweep(matrix, variants, overrides)
+    report = json.dumps(
+        {
+            "pairs": len(matrix),
+            "dates": len(matrix.dates),
+            "variants": [result.summary(args.top) for result in results],
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(report + "\n")
+    else:
+        print(report)
+    print(
+        f"[sweep] {len(variants)} variants x {len(matrix)} pairs: "
+        f"load {loaded - started:.2f}s, score {time.perf_counter() - loaded:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
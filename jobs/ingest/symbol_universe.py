@@ -0,0 +1,115 @@
+"""In-memory index of known securities codes.
+
+Live TDnet pages are scraped for standalone 4-digit numbers, which also picks
+up years, times and page numbers. ``SymbolUniverse`` holds the codes known to
+be listed (named ``Symbol`` rows, the cached master list and cached name
+lookups) so extracted codes are checked with one set lookup before they turn
+into events, DB rows or HTTP requests:
+
+- codes outside the valid range (``1300``-``9999``) are dropped outright,
+- known codes are admitted, and
+- the rest are queued and resolved together by one batched lookup at the end
+  of the fetch stage; codes it cannot resolve are dropped.
+"""
+from __future__ import annotations
+
+import csv
+import re
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence
+
+# Listed-company codes start at 1301; lower 4-digit numbers are times or page numbers.
+MIN_CODE = 1300
+CODE_PATTERN = re.compile(r"(?<!\d)([1-9]\d{3})(?!\d)")
+
+Lookup = Callable[[Sequence[str]], Mapping[str, str]]
+
+
+def valid_code(code: str) -> bool:
+    return len(code) == 4 and code.isdigit() and int(code) >= MIN_CODE
+
+
+def extract_codes(text: str) -> List[str]:
+    """Distinct in-range 4-digit codes in ``text``, sorted."""
+    return sorted({code for code in CODE_PATTERN.findall(text) if int(code) >= MIN_CODE})
+
+
+class SymbolUniverse:
+    def __init__(self, names: Mapping[str, str] | None = None) -> None:
+        # code -> name; the name equals the code for placeholder rows.
+        self.names: Dict[str, str] = dict(names or {})
+        self.pending: Dict[str, None] = {}
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, names: Mapping[str, str]) -> None:
+        for code, name in names.items():
+            if valid_code(code) and self.names.get(code, code) == code:
+                self.names[code] = name
+
+    def admit(self, codes: Iterable[str]) -> List[str]:
+        """Known codes among ``codes``; unknown in-range codes are queued in ``pending``."""
+        known: List[str] = []
+        for code in codes:
+            if code in self.names:
+                known.append(code)
+            elif valid_code(code):
+                self.pending[code] = None
+        return known
+
+    def resolve_pending(self, lookup: Lookup) -> Dict[str, str]:
+        """Resolve every queued code with one ``lookup`` call; returns the codes it found."""
+        if not self.pending:
+            return {}
+        codes = list(self.pending)
+        self.pending.clear()
+        found = {code: name for code, name in lookup(codes).items() if code in codes and name}
+        self.add(found)
+        return found
+
+
+def read_master(path: str | Path) -> Dict[str, str]:
+    """``code -> name`` from a cached master CSV (``code,name[,sector]``); empty if missing."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8", newline="") as fp:
+        return {row["code"]: row.get("name") or row["code"] for row in csv.DictReader(fp) if row.get("code")}
+
+
+def write_master(path: str | Path, symbols: Iterable[Mapping[str, object]]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["code", "name", "sector"])
+        for symbol in symbols:
+            writer.writerow([symbol["code"], symbol.get("name") or symbol["code"], symbol.get("sector") or ""])
+    tmp.replace(path)
+
+
+def load_universe(
+    conn: sqlite3.Connection,
+    master_path: str | Path | None = None,
+    cached_names: Mapping[str, str] | None = None,
+) -> SymbolUniverse:
+    """Universe of the Symbol table, the master list at ``master_path`` and ``cached_names``.
+
+    Symbol rows without a real name (``name == code``, as written for scraped
+    codes by the fallback and ``ensure_symbols``) prove nothing about a code, so
+    they are left out: such a code is queued like any unknown one when it
+    shows up on a page again.
+    """
+    universe = SymbolUniverse()
+    rows = conn.execute('SELECT code, name FROM "Symbol"')
+    universe.add({code: name for code, name in rows if name and name != code})
+    if master_path is not None:
+        universe.add(read_master(master_path))
+    universe.add(cached_names or {})
+    return universe
@@ -0,0 +1,279 @@
+"""Seeded synthetic market in the ``data/sample`` formats.
+
+``generate(codes, days, seed)`` builds a universe of any size, identical for the
+same arguments:
+
+- weekday OHLCV bars whose volatility and volume level follow a per-code
+  regime chain (quiet / normal / active), with volume bursts on the days a
+  code has an announcement;
+- TDnet disclosures, quarterly earnings and news headlines whose titles hit
+  the ``config/rules.json`` keywords at fixed rates.
+
+``write_market`` saves it as ``daily_prices.csv``, ``events.csv``, ``news.json``
+and ``symbols.csv``; point ``SAMPLE_DATA_DIR`` at the directory to ingest it,
+and serve the feeds with ``jobs.ingest.feed_server``.
+
+Usage::
+
+    PYTHONPATH=. python -m jobs.ingest.synthetic --codes 1000 --days 250 --out .cache/synthetic
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import random
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from .adapters.earnings_adapter import EarningsItem
+from .adapters.news_adapter import NewsItem
+from .adapters.price_adapter import PriceBar
+from .adapters.tdnet_rss_adapter import TdnetItem
+from .symbol_universe import MIN_CODE
+
+START = date(2024, 1, 4)
+# (name, volume multiplier, daily return volatility); a code stays in its
+# regime with REGIME_STAY probability each day.
+REGIMES = (("quiet", 0.5, 0.008), ("normal", 1.0, 0.015), ("active", 2.4, 0.028))
+REGIME_STAY = 0.96
+# Chance per code and trading day of a TDnet disclosure / news headline;
+# earnings come every EARNINGS_EVERY trading days, staggered by code.
+TDNET_RATE = 0.02
+NEWS_RATE = 0.03
+EARNINGS_EVERY = 63
+# Volume on an announcement day is multiplied by a factor in this range.
+BURST = (2.5, 5.0)
+# (first minute after midnight, number of 5-minute slots) announcements fall in.
+TDNET_WINDOW = (11 * 60 + 30, 66)
+EARNINGS_WINDOW = (15 * 60, 7)
+NEWS_WINDOW = (7 * 60, 156)
+
+NAME_PREFIXES = ("東", "西", "日本", "大和", "北陸", "中央", "新", "第一", "太平洋", "昭和", "三和", "富士")
+NAME_SUFFIXES = ("", "ホールディングス", "工業", "グループ")
+# Name core -> sector.
+SECTORS = {
+    "精機": "機械",
+    "化学": "化学",
+    "電機": "電気機器",
+    "製薬": "医薬品",
+    "商事": "卸売業",
+    "建設": "建設業",
+    "食品": "食料品",
+    "物流": "陸運業",
+    "通信": "情報・通信業",
+    "不動産": "不動産業",
+    "鉄鋼": "鉄鋼",
+    "銀行": "銀行業",
+}
+# (title, weight); the first three match the GUIDE_UP rule or the downward-revision penalty.
+TDNET_TITLES = (
+    ("業績予想の上方修正に関するお知らせ", 3),
+    ("剰余金の配当（増配）に関するお知らせ", 2),
+    ("業績予想の下方修正に関するお知らせ", 2),
+    ("自己株式の取得状況に関するお知らせ", 4),
+    ("役員の異動に関するお知らせ", 4),
+    ("定時株主総会招集ご通知", 2),
+)
+# (title template, polarity, weight)
+NEWS_TITLES = (
+    ("{name}、今期最高益を更新", "pos", 2),
+    ("{name}、通期予想を上方修正", "pos", 2),
+    ("{name}、増配を発表", "pos", 1),
+    ("{name}、下方修正で減益見通し", "neg", 2),
+    ("{name}、赤字転落", "neg", 1),
+    ("{name}、新製品を発表", "neu", 3),
+    ("{name}、業務提携を締結", "neu", 3),
+)
+# Fiscal quarter -> earnings title; 通期/上期 match the EARNINGS_POSITIVE rule.
+EARNINGS_TITLES = ("第1四半期決算短信", "上期決算短信", "第3四半期決算短信", "通期決算短信")
+
+
+@dataclass
+class SyntheticMarket:
+    symbols: List[Dict[str, str]]
+    prices: Dict[str, List[PriceBar]]
+    tdnet: List[TdnetItem]
+    earnings: List[EarningsItem]
+    news: List[NewsItem]
+
+    @property
+    def last_date(self) -> date:
+        return max(bars[-1].trading_date for bars in self.prices.values() if bars)
+
+
+def trading_days(start: date, count: int) -> List[date]:
+    days: List[date] = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def announce_time(day: date, code: str, title: str, window: Tuple[int, int] = TDNET_WINDOW) -> datetime:
+    """Time of an announcement: a 5-minute slot of ``window`` derived from its code and title.
+
+    The CSV/JSON files keep dates only; the feed stand-in recovers the same times.
+    """
+    first, slots = window
+    minutes = first + 5 * (zlib.crc32(f"{code}{title}".encode()) % slots)
+    return datetime.combine(day, datetime.min.time()) + timedelta(minutes=minutes)
+
+
+def _codes(count: int) -> List[str]:
+    if not 0 < count <= 9999 - MIN_CODE:
+        raise ValueError(f"codes must be between 1 and {9999 - MIN_CODE}")
+    step = (9999 - MIN_CODE) // count
+    return [str(MIN_CODE + 1 + idx * step) for idx in range(count)]
+
+
+def _symbol(rng: random.Random, code: str) -> Dict[str, str]:
+    core = rng.choice(list(SECTORS))
+    name = f"{rng.choice(NAME_PREFIXES)}{core}{rng.choice(NAME_SUFFIXES)}"
+    return {"code": code, "name": name, "sector": SECTORS[core]}
+
+
+def _pick(rng: random.Random, choices: Sequence[Tuple]) -> Tuple:
+    return rng.choices(choices, weights=[choice[-1] for choice in choices])[0]
+
+
+def generate(codes: int, days: int, seed: int = 7, start: date = START) -> SyntheticMarket:
+    calendar = trading_days(start, days)
+    symbols: List[Dict[str, str]] = []
+    prices: Dict[str, List[PriceBar]] = {}
+    tdnet: List[TdnetItem] = []
+    earnings: List[EarningsItem] = []
+    news: List[NewsItem] = []
+    for code in _codes(codes):
+        # One stream per code, so a code's series does not depend on the universe size.
+        rng = random.Random(f"{seed}:{code}")
+        symbol = _symbol(rng, code)
+        symbols.append(symbol)
+        close = math.exp(rng.uniform(math.log(200), math.log(20000)))
+        base_volume = 10 ** rng.uniform(4.5, 6.5)
+        regime = 1
+        bars: List[PriceBar] = []
+        for pos, day in enumerate(calendar):
+            if rng.random() > REGIME_STAY:
+                regime = rng.choice([other for other in range(len(REGIMES)) if other != regime])
+            _, volume_mult, sigma = REGIMES[regime]
+            burst = 1.0
+            if rng.random() < TDNET_RATE:
+                title = _pick(rng, TDNET_TITLES)[0]
+                tdnet.append(
+                    TdnetItem(code, title, "", announce_time(day, code, title), company=symbol["name"])
+                )
+                burst = rng.uniform(*BURST)
+            if (pos + int(code)) % EARNINGS_EVERY == EARNINGS_EVERY - 1:
+                quarter = (pos + int(code)) // EARNINGS_EVERY % 4
+                title = f"{day.year}年3月期 {EARNINGS_TITLES[quarter]}"
+                summary = f"営業利益は前年同期比{rng.randint(-30, 40):+d}%"
+                earnings.append(EarningsItem(code, title, summary, announce_time(day, code, title, EARNINGS_WINDOW)))
+                burst = max(burst, rng.uniform(*BURST))
+            if rng.random() < NEWS_RATE:
+                template, polarity, _ = _pick(rng, NEWS_TITLES)
+                title = template.format(name=symbol["name"])
+                news.append(NewsItem(code, title, "", announce_time(day, code, title, NEWS_WINDOW), polarity))
+            open_ = close * math.exp(rng.gauss(0, sigma / 3))
+            close = open_ * math.exp(rng.gauss(0, sigma))
+            high = max(open_, close) * (1 + abs(rng.gauss(0, sigma / 2)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0, sigma / 2)))
+            volume = int(base_volume * volume_mult * burst * math.exp(rng.gauss(0, 0.25)))
+            bars.append(PriceBar(day, code, open_, high, low, close, volume, (open_ + high + low + close) / 4))
+        prices[code] = bars
+    tdnet.sort(key=lambda item: (item.announced_at, item.code))
+    earnings.sort(key=lambda item: (item.announced_at, item.code))
+    news.sort(key=lambda item: (item.published_at, item.code))
+    return SyntheticMarket(symbols, prices, tdnet, earnings, news)
+
+
+def write_market(market: SyntheticMarket, directory: str | Path) -> Path:
+    """Write ``market`` as the four ``data/sample`` files under ``directory``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with (directory / "daily_prices.csv").open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["date", "code", "open", "high", "low", "close", "volume", "vwap"])
+        for code, bars in market.prices.items():
+            for bar in bars:
+                writer.writerow(
+                    [
+                        bar.trading_date.isoformat(),
+                        code,
+                        f"{bar.open:.2f}",
+                        f"{bar.high:.2f}",
+                        f"{bar.low:.2f}",
+                        f"{bar.close:.2f}",
+                        bar.volume,
+                        f"{bar.vwap:.2f}",
+                    ]
+                )
+    # score_raw as in the sample file: 0.9 for an upward revision, otherwise 0.5.
+    rows = [
+        (
+            item.announced_at,
+            item.code,
+            "TDNET",
+            item.title,
+            item.summary,
+            item.source,
+            0.9 if "上方" in item.title else 0.5,
+        )
+        for item in market.tdnet
+    ] + [
+        (item.announced_at, item.code, "EARNINGS", item.title, item.summary, item.source, 0.6)
+        for item in market.earnings
+    ]
+    rows.sort(key=lambda row: (row[0], row[1], row[2]))
+    with (directory / "events.csv").open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["date", "code", "type", "title", "summary", "source", "score_raw"])
+        for when, *rest in rows:
+            writer.writerow([when.date().isoformat(), *rest])
+    news = [
+        {
+            "date": item.published_at.date().isoformat(),
+            "code": item.code,
+            "title": item.title,
+            "summary": item.summary,
+            "url": f"https://example.com/news/{item.code}-{item.published_at:%Y%m%d%H%M}",
+            "polarity": item.polarity,
+        }
+        for item in market.news
+    ]
+    (directory / "news.json").write_text(json.dumps(news, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    with (directory / "symbols.csv").open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=["code", "name", "sector"])
+        writer.writeheader()
+        writer.writerows(market.symbols)
+    return directory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic market in the data/sample formats.")
+    parser.add_argument("--codes", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start", type=date.fromisoformat, default=START, help="first trading day (YYYY-MM-DD)")
+    parser.add_argument("--out", default=".cache/synthetic", help="output directory")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    market = generate(args.codes, args.days, seed=args.seed, start=args.start)
+    directory = write_market(market, args.out)
+    print(
+        f"[synthetic] {len(market.prices)} codes x {args.days} days to {market.last_date}, "
+        f"{len(market.tdnet)} TDnet, {len(market.earnings)} earnings, {len(market.news)} news "
+        f"-> {directory} in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,10 @@ from __future__ import annotations
 
 import sqlite3
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
 
 from .env import resolve_database_path
 
@@ -34,6 +36,128 @@ def replace_many(
     conn.executemany(sql, rows)
 
 
+@dataclass(slots=True)
+class UpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"inserted={self.inserted} updated={self.updated} "
+            f"unchanged={self.unchanged} deleted={self.deleted}"
+        )
+
+
+def _quote(name: str) -> str:
+    return f'"{name}"'
+
+
+def upsert_many(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    keys: Sequence[str],
+    rows: Iterable[Sequence[object]],
+    chunk_size: int = 5000,
+) -> UpsertStats:
+    """Change-aware bulk upsert.
+
+    Rows are staged chunk by chunk in a TEMP table with the target's column
+    affinities, diffed against ``table`` set-wise, and applied with
+    ``INSERT ... ON CONFLICT DO UPDATE ... WHERE`` so identical rows are never
+    rewritten (unlike ``REPLACE``, which deletes and re-inserts every row).
+    Within one call the last row for a key wins, as with ``REPLACE``.
+    """
+    stats = UpsertStats()
+    values = [column for column in columns if column not in keys]
+    stage = _quote(f"_stage_{table}")
+    target = _quote(table)
+    column_list = ",".join(_quote(column) for column in columns)
+    key_match = " AND ".join(f"t.{_quote(key)} = s.{_quote(key)}" for key in keys)
+    changed = " OR ".join(f"t.{_quote(column)} IS NOT s.{_quote(column)}" for column in values) or "0"
+    excluded_changed = " OR ".join(f"{target}.{_quote(c)} IS NOT excluded.{_quote(c)}" for c in values)
+    if values:
+        on_conflict = (
+            f"DO UPDATE SET {','.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in values)} "
+            f"WHERE {excluded_changed}"
+        )
+    else:
+        on_conflict = "DO NOTHING"
+
+    conn.execute(f"DROP TABLE IF EXISTS temp.{stage}")
+    conn.execute(f"CREATE TEMP TABLE {stage} AS SELECT {column_list} FROM {target} WHERE 0")
+    key_positions = [list(columns).index(key) for key in keys]
+    placeholders = ",".join(["?"] * len(columns))
+    iterator = iter(rows)
+    try:
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            latest: Dict[Tuple[object, ...], Sequence[object]] = {}
+            for row in chunk:
+                latest[tuple(row[pos] for pos in key_positions)] = row
+            conn.execute(f"DELETE FROM {stage}")
+            conn.executemany(f"INSERT INTO {stage} ({column_list}) VALUES ({placeholders})", latest.values())
+            inserted, updated = conn.execute(
+                f"SELECT "
+                f"SUM(NOT EXISTS (SELECT 1 FROM {target} t WHERE {key_match})), "
+                f"SUM(EXISTS (SELECT 1 FROM {target} t WHERE {key_match} AND ({changed}))) "
+                f"FROM {stage} s"
+            ).fetchone()
+            stats.inserted += inserted or 0
+            stats.updated += updated or 0
+            stats.unchanged += len(latest) - (inserted or 0) - (updated or 0)
+            conn.execute(
+                f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {stage} WHERE true "
+                f"ON CONFLICT ({','.join(_quote(key) for key in keys)}) {on_conflict}"
+            )
+    finally:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{stage}")
+    return stats
+
+
+def bulk_upsert(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    keys: Sequence[str],
+    rows: Iterable[Sequence[object]],
+) -> int:
+    """Single-statement ``INSERT ... ON CONFLICT DO UPDATE`` for bulk loads.
+
+    Skips the staging/diff pass of :func:`upsert_many`, so it does not report
+    per-row outcomes; returns the number of rows submitted.
+    """
+    values = [column for column in columns if column not in keys]
+    column_list = ",".join(_quote(column) for column in columns)
+    placeholders = ",".join(["?"] * len(columns))
+    target = _quote(table)
+    if values:
+        on_conflict = (
+            f"DO UPDATE SET {','.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in values)} "
+            f"WHERE {' OR '.join(f'{target}.{_quote(c)} IS NOT excluded.{_quote(c)}' for c in values)}"
+        )
+    else:
+        on_conflict = "DO NOTHING"
+    counted = 0
+
+    def counting() -> Iterator[Sequence[object]]:
+        nonlocal counted
+        for row in rows:
+            counted += 1
+            yield row
+
+    conn.executemany(
+        f"INSERT INTO {target} ({column_list}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({','.join(_quote(key) for key in keys)}) {on_conflict}",
+        counting(),
+    )
+    return counted
+
+
 def clear_table(conn: sqlite3.Connection, table: str) -> None:
     conn.execute(f"DELETE FROM {table}")
 
@@ -42,3 +166,10 @@ def to_iso(dt: datetime | str) -> str:
     if isinstance(dt, str):
         return dt
     return dt.replace(microsecond=0).isoformat()
+
+
+def parse_db_date(value: object) -> date:
+    """Decode a DateTime column written either by Prisma (epoch ms) or by this job (ISO text)."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).date()
+    return datetime.fromisoformat(str(value)).date()
@@ -3,12 +3,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Dict
-
-try:
-    from dotenv import load_dotenv  # type: ignore
-except ImportError:  # pragma: no cover - optional dependency
-    load_dotenv = None
+from typing import Dict, Mapping
 
 
 def load_env(dotenv_path: str | None = None) -> Dict[str, str]:
@@ -20,8 +15,14 @@ def load_env(dotenv_path: str | None = None) -> Dict[str, str]:
             Path(__file__).resolve().parents[3] / ".env",
         ]
         dotenv_path = next((str(p) for p in candidates if p.exists()), None)
-    if load_dotenv and dotenv_path:
-        load_dotenv(dotenv_path)
+    if dotenv_path:
+        # Imported only when there is a .env file to read.
+        try:
+            from dotenv import load_dotenv  # type: ignore
+        except ImportError:  # pragma: no cover - optional dependency
+            load_dotenv = None
+        if load_dotenv:
+            load_dotenv(dotenv_path)
     return dict(os.environ)
 
 
@@ -34,3 +35,11 @@ def resolve_database_path(database_url: str) -> str:
         base = Path(__file__).resolve().parents[3]
         return str((base / relative).resolve())
     raise ValueError("Only SQLite file URLs are supported in the MVP ingest job")
+
+
+def env_flag(env: Mapping[str, str], key: str, default: bool = False) -> bool:
+    """Interpret an environment toggle such as ``true``/``1``/``yes``."""
+    value = env.get(key)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,263 @@
+"""HTML extraction for the few nodes the ingest job reads from scraped pages.
+
+Two backends return the same results:
+
+- ``stream`` (default): ``html.parser.HTMLParser`` callbacks that keep only the
+  target nodes without building a tree, and stop feeding the page once no
+  more targets can follow (``</title>``; news lists are read to the end);
+- ``bs4``: the original BeautifulSoup (``html.parser``) implementation, kept as
+  the compatible fallback and selected with ``HTML_PARSER_BACKEND=bs4``.
+
+The ingest job passes ``HTML_PARSER_BACKEND`` from its env mapping as
+``backend_name``; this module does not read the process environment.
+
+Benchmark both on saved pages with::
+
+    PYTHONPATH=. python -m jobs.ingest.utils.html --bench tests/ingest/fixtures/*.html
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+BACKENDS = ("stream", "bs4")
+# Pages are fed in slices so a parser can stop partway through.
+FEED_CHARS = 8192
+# Elements without an end tag; they never change the nesting depth.
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"))
+
+Attrs = List[Tuple[str, str | None]]
+
+
+@dataclass(slots=True)
+class NewsRow:
+    """One ``table.s_news_list`` row: code cell, first link text and first ``<time datetime>``."""
+
+    code: str
+    title: str
+    published: str | None
+
+
+def backend(name: str | None = None) -> str:
+    name = name or "stream"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    return name
+
+
+def _text(parts: Sequence[str]) -> str:
+    # BeautifulSoup's get_text(strip=True): every string stripped, empty ones dropped.
+    return "".join(part.strip() for part in parts)
+
+
+class _Extractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.done = False
+
+    def run(self, html: str) -> None:
+        for start in range(0, len(html), FEED_CHARS):
+            self.feed(html[start : start + FEED_CHARS])
+            if self.done:
+                return
+        self.close()
+
+
+class _TitleExtractor(_Extractor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.parts: List[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: Attrs) -> None:
+        if tag == "title" and self.parts is None:
+            self.parts = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self.parts is not None:
+            self.done = True
+
+    def handle_data(self, data: str) -> None:
+        if self.parts is not None and not self.done:
+            self.parts.append(data)
+
+
+class _NewsListExtractor(_Extractor):
+    """Rows of every ``table.s_news_list``, read to the end of the document.
+
+    BeautifulSoup's ``html.parser`` keeps markup after ``</body>`` too, so a
+    later table can always follow and the page is never cut short.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: List[NewsRow] = []
+        self._tables = 0  # open tables, counted from the outermost s_news_list
+        self._in_row = False
+        self._code: str | None = None
+        self._code_parts: List[str] | None = None
+        self._code_depth = 0
+        self._title: List[str] | None = None
+        self._title_depth = 0
+        self._published: str | None = None
+        self._seen_time = False
+
+    def _start_row(self) -> None:
+        self._in_row = True
+        self._code = None
+        self._code_parts = None
+        self._title = None
+        self._published = None
+        self._seen_time = False
+
+    def _end_row(self) -> None:
+        if not self._in_row:
+            return
+        self._in_row = False
+        code = self._code if self._code is not None else _text(self._code_parts or [])
+        if self._code_parts is None or self._title is None or not code.strip():
+            return
+        self.rows.append(NewsRow(code=code.strip(), title=_text(self._title), published=self._published))
+
+    def handle_starttag(self, tag: str, attrs: Attrs) -> None:
+        if tag == "table":
+            classes = (dict(attrs).get("class") or "").split()
+            if self._tables or "s_news_list" in classes:
+                self._tables += 1
+            return
+        if not self._tables:
+            return
+        if tag == "tr":
+            self._end_row()
+            self._start_row()
+            return
+        if not self._in_row:
+            return
+        if tag in VOID_TAGS:
+            return
+        values = dict(attrs)
+        if self._code_depth:
+            self._code_depth += 1
+        if self._title_depth:
+            self._title_depth += 1
+        classes = (values.get("class") or "").split()
+        if tag == "td" and self._code_parts is None and "oncodetip_code-data1" in classes:
+            self._code_parts = []
+            self._code = values.get("data-code") or None
+            self._code_depth = 1
+        elif tag == "a" and self._title is None:
+            self._title = []
+            self._title_depth = 1
+        elif tag == "time" and not self._seen_time:
+            self._seen_time = True
+            self._published = values.get("datetime")
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._tables or tag in VOID_TAGS:
+            return
+        if tag == "table":
+            self._end_row()
+            self._tables -= 1
+            return
+        if tag == "tr":
+            self._end_row()
+            return
+        if self._code_depth:
+            self._code_depth -= 1
+        if self._title_depth:
+            self._title_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._code_depth and self._code_parts is not None:
+            self._code_parts.append(data)
+        if self._title_depth and self._title is not None:
+            self._title.append(data)
+
+
+def _title_bs4(html: str) -> str | None:
+    from bs4 import BeautifulSoup
+
+    title_tag = BeautifulSoup(html, "html.parser").find("title")
+    return title_tag.text if title_tag else None
+
+
+def _news_rows_bs4(html: str) -> List[NewsRow]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    rows: List[NewsRow] = []
+    for row in soup.select("table.s_news_list tr"):
+        code_cell = row.select_one("td.oncodetip_code-data1")
+        link = row.find("a")
+        if not code_cell or not link:
+            continue
+        code = (code_cell.get("data-code") or code_cell.get_text(strip=True)).strip()
+        if not code:
+            continue
+        time_tag = row.find("time")
+        published = time_tag["datetime"] if time_tag and time_tag.has_attr("datetime") else None
+        rows.append(NewsRow(code=code, title=link.get_text(strip=True), published=published))
+    return rows
+
+
+def _title_stream(html: str) -> str | None:
+    parser = _TitleExtractor()
+    parser.run(html)
+    return "".join(parser.parts) if parser.parts is not None else None
+
+
+def _news_rows_stream(html: str) -> List[NewsRow]:
+    parser = _NewsListExtractor()
+    parser.run(html)
+    return parser.rows
+
+
+EXTRACTORS: Dict[str, Dict[str, Callable[[str], object]]] = {
+    "title": {"stream": _title_stream, "bs4": _title_bs4},
+    "news_rows": {"stream": _news_rows_stream, "bs4": _news_rows_bs4},
+}
+
+
+def page_title(html: str, backend_name: str | None = None) -> str | None:
+    """Text of the first ``<title>``; ``None`` when the page has none."""
+    return EXTRACTORS["title"][backend(backend_name)](html)
+
+
+def news_rows(html: str, backend_name: str | None = None) -> List[NewsRow]:
+    """Rows of every ``table.s_news_list`` that have a code cell and a link, in document order."""
+    return EXTRACTORS["news_rows"][backend(backend_name)](html)
+
+
+def benchmark(paths: Sequence[str], repeat: int = 20) -> None:
+    for path in paths:
+        html = Path(path).read_text(encoding="utf-8")
+        kind = "news_rows" if "s_news_list" in html else "title"
+        timings = {}
+        for name in BACKENDS:
+            extract = EXTRACTORS[kind][name]
+            result = extract(html)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                extract(html)
+            timings[name] = (time.perf_counter() - started) / repeat
+        count = len(result) if isinstance(result, list) else 1
+        print(
+            f"[html-bench] {Path(path).name} ({len(html) // 1024} KiB, {kind}, {count} nodes): "
+            + ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in timings.items())
+            + f" ({timings['bs4'] / timings['stream']:.1f}x)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extraction backends")
+    parser.add_argument("--bench", nargs="+", metavar="HTML", required=True, help="saved pages to parse")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.bench, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""HTTP helpers shared by the ingest adapters.
+
+``requests`` is only imported once a request is actually made, so runs that
+read the local sample files never pay for loading it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Mapping, Type, TypeVar
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+
+T = TypeVar("T")
+
+
+def new_session() -> "requests.Session":
+    import requests
+
+    return requests.Session()
+
+
+class LazySession:
+    """Stands in for a session and builds one per thread via ``factory`` on first use.
+
+    Feeds, TDnet list pages and symbol lookups are requested from worker
+    threads, and ``requests.Session`` is not documented as thread-safe, so no
+    two threads share one. The ``HttpCache`` behind a ``CachingSession`` is
+    shared and guards its own state.
+    """
+
+    def __init__(self, factory: Callable[[], object]) -> None:
+        self._factory = factory
+        self._local = threading.local()
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def __getattr__(self, name: str) -> object:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._factory()
+            self._started = True
+        return getattr(session, name)
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most ``rate`` per second.
+
+    Safe to share between threads; each caller reserves the next free slot for
+    its host and sleeps outside the lock until that slot arrives.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    url: str
+    digest: str
+    size: int
+    etag: str | None = None
+    last_modified: str | None = None
+    content_type: str | None = None
+    encoding: str | None = None
+
+
+class HttpCache:
+    """On-disk response bodies keyed by URL, with validators for conditional GETs.
+
+    Each URL maps to ``<key>.body`` plus ``<key>.json`` metadata (and optionally
+    ``<key>.parsed.json`` holding adapter items parsed from that exact body).
+    Least-recently-used entries are evicted once the bodies exceed ``max_bytes``;
+    the body total is kept as a running count, so the directory is only listed
+    on the first store and when the limit is crossed.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "uncacheable": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        # Bytes of all stored bodies; None until the first store scans the directory.
+        self._total: int | None = None
+
+    def _path(self, url: str, suffix: str) -> Path:
+        return self.directory / (hashlib.sha1(url.encode("utf-8")).hexdigest() + suffix)
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        meta_path = self._path(url, ".json")
+        if not self._path(url, ".body").exists():
+            return None
+        try:
+            return CacheEntry(**json.loads(meta_path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            # Missing, or evicted by another thread since the check.
+            return None
+
+    def body(self, url: str) -> bytes | None:
+        """The stored body, or ``None`` if it was evicted since ``lookup``."""
+        path = self._path(url, ".body")
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def store(self, url: str, content: bytes, headers: Mapping[str, str], encoding: str | None) -> CacheEntry:
+        entry = CacheEntry(
+            url=url,
+            digest=hashlib.sha256(content).hexdigest(),
+            size=len(content),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            content_type=headers.get("Content-Type"),
+            encoding=encoding,
+        )
+        body_path = self._path(url, ".body")
+        # The running total, the files and any eviction change together, so
+        # concurrent stores never see (or evict) a half-written entry.
+        with self._lock:
+            if self._total is None:
+                self._total = sum(path.stat().st_size for path in self.directory.glob("*.body"))
+            replaced = body_path.stat().st_size if body_path.exists() else 0
+            self._total += len(content) - replaced
+            self.counters["stores"] += 1
+            body_path.write_bytes(content)
+            self._path(url, ".json").write_text(json.dumps(asdict(entry)), encoding="utf-8")
+            if self._total > self.max_bytes:
+                self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the bodies fit; the caller holds the lock."""
+        sized = []
+        for path in self.directory.glob("*.body"):
+            try:
+                sized.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        sized.sort(key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in sized)
+        for path, stat in sized:
+            if total <= self.max_bytes:
+                break
+            total -= stat.st_size
+            stem = path.name[: -len(".body")]
+            for suffix in (".body", ".json", ".parsed.json"):
+                (self.directory / (stem + suffix)).unlink(missing_ok=True)
+            self.counters["evictions"] += 1
+        self._total = total
+
+    def load_parsed(self, url: str, digest: str, parser: str) -> List[Dict[str, object]] | None:
+        path = self._path(url, ".parsed.json")
+        if not path.exists():
+            return None
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if stored.get("digest") != digest or stored.get("parser") != parser:
+            return None
+        return stored["rows"]
+
+    def store_parsed(self, url: str, digest: str, parser: str, rows: List[Dict[str, object]]) -> None:
+        payload = {"digest": digest, "parser": parser, "rows": rows}
+        self._path(url, ".parsed.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+class CachingSession:
+    """Wraps a ``requests.Session`` so plain GETs are revalidated against ``HttpCache``.
+
+    Responses gain ``from_cache`` (served from disk after a 304), ``body_digest``
+    and ``cache`` attributes so callers can skip re-parsing an unchanged body.
+    A ``stream=True`` GET is revalidated too: a 304 replays the cached body
+    through ``iter_content``, and a 200 body is stored once it has been read to
+    the end (a reader that stops early leaves the cache unchanged, and
+    ``body_digest`` stays ``None``). Everything else is delegated to the
+    wrapped session.
+    """
+
+    def __init__(self, session: "requests.Session", cache: HttpCache) -> None:
+        self.session = session
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.session, name)
+
+    def get(self, url: str, **kwargs: object) -> "requests.Response":
+        if kwargs.get("params"):
+            return self.session.get(url, **kwargs)
+        entry = self.cache.lookup(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        resp = self.session.get(url, headers=headers, **kwargs)
+        if resp.status_code == 304 and entry is not None:
+            body = self.cache.body(url)
+            if body is not None:
+                self.cache.count("hits")
+                return self._from_cache(url, entry, body)
+            # Evicted since the lookup: ask for the body again, unconditionally.
+            resp.close()
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            resp = self.session.get(url, headers=headers, **kwargs)
+        resp.from_cache = False
+        resp.cache = self.cache
+        resp.cache_key = url
+        resp.body_digest = None
+        if resp.status_code == 200:
+            if not (resp.headers.get("ETag") or resp.headers.get("Last-Modified")):
+                self.cache.count("uncacheable")
+            elif kwargs.get("stream"):
+                self.cache.count("misses")
+                self._store_when_read(url, resp)
+            else:
+                self.cache.count("misses")
+                resp.body_digest = self.cache.store(url, resp.content, resp.headers, resp.encoding).digest
+        return resp
+
+    def _store_when_read(self, url: str, resp: "requests.Response") -> None:
+        """Store a streamed body once ``iter_content`` (or ``content``) has yielded all of it."""
+        read = resp.iter_content
+
+        def iter_content(chunk_size: int | None = 1, decode_unicode: bool = False) -> Iterator[bytes]:
+            parts = []
+            for chunk in read(chunk_size, decode_unicode):
+                parts.append(chunk)
+                yield chunk
+            if not decode_unicode:
+                resp.body_digest = self.cache.store(url, b"".join(parts), resp.headers, resp.encoding).digest
+
+        resp.iter_content = iter_content
+
+    def _from_cache(self, url: str, entry: CacheEntry, body: bytes) -> "requests.Response":
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp._content = body
+        # Lets iter_content replay the body and close() skip the missing connection.
+        resp._content_consumed = True
+        resp.headers = CaseInsensitiveDict({"Content-Type": entry.content_type or ""})
+        resp.encoding = entry.encoding
+        resp.from_cache = True
+        resp.cache = self.cache
+        resp.cache_key = url
+        resp.body_digest = entry.digest
+        return resp
+
+
+def _encode_item(item: object) -> Dict[str, object]:
+    return {
+        key: {"$datetime": value.isoformat()} if isinstance(value, datetime) else value
+        for key, value in asdict(item).items()
+    }
+
+
+def _decode_item(item_type: Type[T], row: Mapping[str, object]) -> T:
+    values = {
+        key: datetime.fromisoformat(value["$datetime"]) if isinstance(value, dict) else value
+        for key, value in row.items()
+    }
+    return item_type(**values)
+
+
+def reuse_parsed(
+    resp: "requests.Response",
+    parser: str,
+    parse: Callable[[], List[T]],
+    item_type: Type[T],
+) -> List[T]:
+    """Run ``parse`` unless items parsed from this exact body are already cached.
+
+    ``parser`` names the parsing routine (bump it when the parser changes) so items
+    produced by an older parser are never reused.
+    """
+    cache: HttpCache | None = getattr(resp, "cache", None)
+    digest: str | None = getattr(resp, "body_digest", None)
+    if cache is None or digest is None:
+        return parse()
+    rows = cache.load_parsed(resp.cache_key, digest, parser)
+    if rows is not None:
+        return [_decode_item(item_type, row) for row in rows]
+    items = parse()
+    cache.store_parsed(resp.cache_key, digest, parser, [_encode_item(item) for item in items])
+    return items
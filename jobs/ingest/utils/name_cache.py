@@ -0,0 +1,96 @@
+"""Persistent symbol-name cache backed by a local SQLite file."""
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Set
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MISSING_TTL_SECONDS = 7 * 24 * 3600
+
+
+class SymbolNameCache:
+    """code -> company name with a time-to-live, kept outside the Prisma database."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        missing_ttl_seconds: float = DEFAULT_MISSING_TTL_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.missing_ttl_seconds = missing_ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS symbol_names ("
+                "code TEXT PRIMARY KEY, name TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            # Codes a lookup could not resolve (years, times, delisted codes).
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS missing_codes (code TEXT PRIMARY KEY, checked_at REAL NOT NULL)"
+            )
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def _select(self, sql: str, codes: Iterable[str], ttl_seconds: float) -> list:
+        wanted = list(dict.fromkeys(codes))
+        cutoff = time.time() - ttl_seconds
+        rows: list = []
+        with closing(self._connect()) as conn:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start : start + 500]
+                placeholders = ",".join(["?"] * len(chunk))
+                rows.extend(conn.execute(sql.format(placeholders=placeholders), (*chunk, cutoff)))
+        return rows
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, str]:
+        """Return the non-expired names among ``codes``."""
+        return dict(
+            self._select(
+                "SELECT code, name FROM symbol_names WHERE code IN ({placeholders}) AND fetched_at >= ?",
+                codes,
+                self.ttl_seconds,
+            )
+        )
+
+    def all_names(self) -> Dict[str, str]:
+        """Every non-expired name."""
+        cutoff = time.time() - self.ttl_seconds
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT code, name FROM symbol_names WHERE fetched_at >= ?", (cutoff,)))
+
+    def get_missing(self, codes: Iterable[str]) -> Set[str]:
+        """Codes among ``codes`` that failed a lookup within the missing-code TTL."""
+        rows = self._select(
+            "SELECT code FROM missing_codes WHERE code IN ({placeholders}) AND checked_at >= ?",
+            codes,
+            self.missing_ttl_seconds,
+        )
+        return {row[0] for row in rows}
+
+    def put_missing(self, codes: Iterable[str]) -> None:
+        now = time.time()
+        rows = [(code, now) for code in dict.fromkeys(codes)]
+        if not rows:
+            return
+        with closing(self._connect()) as conn:
+            conn.executemany("REPLACE INTO missing_codes (code, checked_at) VALUES (?, ?)", rows)
+            conn.commit()
+
+    def put_many(self, names: Mapping[str, str]) -> None:
+        if not names:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "REPLACE INTO symbol_names (code, name, fetched_at) VALUES (?, ?, ?)",
+                [(code, name, now) for code, name in names.items()],
+            )
+            conn.commit()
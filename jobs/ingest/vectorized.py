@@ -0,0 +1,67 @@
+"""Columnar NumPy kernels for feature computation."""
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .features import FEATURE_NAMES, LONG_WINDOW, SHORT_WINDOW
+
+
+def as_price_arrays(
+    opens: Sequence[float],
+    closes: Sequence[float],
+    volumes: Sequence[int],
+    vwaps: Sequence[float | None],
+) -> Dict[str, np.ndarray]:
+    """Pack per-bar values into float64 columns (NaN for a missing VWAP)."""
+    return {
+        "open": np.asarray(opens, dtype=np.float64),
+        "close": np.asarray(closes, dtype=np.float64),
+        "volume": np.asarray(volumes, dtype=np.float64),
+        "vwap": np.array([np.nan if v is None else v for v in vwaps], dtype=np.float64),
+    }
+
+
+def compute_feature_arrays(
+    opens: np.ndarray,
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    vwaps: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Compute every feature for one code's full history.
+
+    Each output array is aligned with the input bars; NaN marks bars where the
+    scalar implementation emits no record (e.g. before the 20-bar warm-up).
+    """
+    n = len(closes)
+    out = {name: np.full(n, np.nan) for name in FEATURE_NAMES}
+    if n == 0:
+        return out
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if n >= LONG_WINDOW:
+            win20 = sliding_window_view(volumes, LONG_WINDOW)
+            mean20 = win20.mean(axis=1)
+            std20 = win20.std(axis=1)
+            current = volumes[LONG_WINDOW - 1 :]
+            out["volume_z"][LONG_WINDOW - 1 :] = np.where(std20 == 0, 0.0, (current - mean20) / std20)
+
+            mean5 = sliding_window_view(volumes, SHORT_WINDOW).mean(axis=1)[LONG_WINDOW - SHORT_WINDOW :]
+            out["supply_demand_proxy"][LONG_WINDOW - 1 :] = np.where(mean20 == 0, np.nan, mean5 / mean20)
+
+        if n >= 2:
+            prev_close = closes[:-1]
+            out["gap_pct"][1:] = (opens[1:] - prev_close) / prev_close
+
+        valid_vwap = ~np.isnan(vwaps) & (vwaps != 0)
+        out["vwap_dev_pct"] = np.where(valid_vwap, (closes - vwaps) / vwaps, np.nan)
+
+        high20 = np.empty(n)
+        head = min(n, LONG_WINDOW - 1)
+        high20[:head] = np.maximum.accumulate(closes[:head])
+        if n >= LONG_WINDOW:
+            high20[LONG_WINDOW - 1 :] = sliding_window_view(closes, LONG_WINDOW).max(axis=1)
+        out["high20d_dist_pct"] = np.where(high20 != 0, closes / high20 - 1, 0.0)
+    return out
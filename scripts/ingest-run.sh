@@ -10,12 +10,23 @@ if [ ! -d .venv ]; then
   python3 -m venv .venv
 fi
 . .venv/bin/activate
-python -m pip -q install -U pip
-python -m pip -q install -r jobs/ingest/requirements.txt
+# Reinstall only when the requirements change (pip resolution dominates short runs)
+REQ_HASH="$(sha256sum jobs/ingest/requirements.txt | cut -d' ' -f1)"
+if [ "$(cat .venv/.requirements.sha256 2>/dev/null)" != "$REQ_HASH" ]; then
+  python -m pip -q install -U pip
+  python -m pip -q install -r jobs/ingest/requirements.txt
+  echo "$REQ_HASH" > .venv/.requirements.sha256
+fi
 
 # Load env (for DATABASE_URL and feed URLs)
 set -a; source .env; set +a
 
+# Resident mode: keeps state in memory and schedules news polls and the EOD run itself
+# (it picks today's TDNET list page on every poll when TDNET_RSS_URL is unset)
+if [ "${1:-}" = "--daemon" ]; then
+  PYTHONPATH=. exec python -m jobs.ingest.daemon
+fi
+
 # Use today's TDNET list page if not explicitly provided
 export TDNET_RSS_URL="${TDNET_RSS_URL:-https://www.release.tdnet.info/inbs/I_list_001_$(date -u +%Y%m%d).html}"
 
@@ -0,0 +1,38 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from jobs.ingest.adapters.price_adapter import PriceBar
+
+
+def _synthetic_bars(code: str, days: int, seed: int) -> list[PriceBar]:
+    rng = random.Random(seed)
+    bars = []
+    close = 1000.0
+    start = date(2023, 1, 2)
+    for idx in range(days):
+        open_ = close * (1 + rng.uniform(-0.02, 0.02))
+        close = open_ * (1 + rng.uniform(-0.03, 0.03))
+        # Flat volume stretches exercise the zero-stdev branch
+        volume = 1_000_000 if idx < 25 else rng.randint(500_000, 5_000_000)
+        vwap = None if idx % 7 == 0 else (0.0 if idx % 11 == 0 else (open_ + close) / 2)
+        bars.append(
+            PriceBar(
+                trading_date=start + timedelta(days=idx),
+                code=code,
+                open=open_,
+                high=max(open_, close),
+                low=min(open_, close),
+                close=close,
+                volume=volume,
+                vwap=vwap,
+            )
+        )
+    return bars
+
+
+@pytest.fixture
+def synthetic_bars():
+    """``(code, days, seed) -> bars``: a seeded random walk with flat-volume and missing-vwap stretches."""
+    return _synthetic_bars
@@ -0,0 +1,38 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from jobs.ingest.bench import CASES, regressions, run_suite
+
+BASELINE = os.environ.get("INGEST_BENCH_BASELINE")
+
+
+def test_suite_records_every_case_and_gates_slowdowns():
+    current = run_suite(["20x60", "40x30"], repeat=1, budget=0)
+    json.dumps(current)
+
+    assert set(current["results"]) == {f"{case.name}[{size}]" for case in CASES for size in ("20x60", "40x30")}
+    picks = current["results"]["build_daily_picks[20x60]"]
+    assert picks["items"] == 20 and picks["items_per_s"] > 0 and "peak_mb" in picks
+    assert current["results"]["replace_many[40x30]"]["items"] == 1200
+
+    assert regressions(current, current, 25) == []
+    baseline, slowed = json.loads(json.dumps(current)), json.loads(json.dumps(current))
+    for key in current["results"]:
+        baseline["results"][key]["seconds"] = 0.001 if key.startswith("detect_news") else 0.01
+        slowed["results"][key]["seconds"] = baseline["results"][key]["seconds"] * 2
+    # Doubling a 1 ms case stays under MIN_GATED_SECONDS and is not reported.
+    slower = regressions(baseline, slowed, 25)
+    assert len(slower) == len(current["results"]) - 2 and all(line.endswith("(+100%)") for line in slower)
+    assert not any(line.startswith("detect_news") for line in slower)
+
+
+@pytest.mark.skipif(not BASELINE, reason="set INGEST_BENCH_BASELINE to a saved bench JSON to enable the gate")
+def test_hot_paths_within_baseline():
+    baseline = json.loads(Path(BASELINE).read_text(encoding="utf-8"))
+    sizes = os.environ.get("INGEST_BENCH_SIZES", "").split() or baseline["meta"]["sizes"]
+    current = run_suite(sizes, memory=False)
+    slower = regressions(baseline, current, float(os.environ.get("INGEST_BENCH_MAX_SLOWDOWN", "25")))
+    assert not slower, "\n".join(slower)
@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+from jobs.ingest import daemon as daemon_module
+from jobs.ingest.backfill import _fresh_database
+from jobs.ingest.daemon import IngestDaemon, WeightsCache, next_eod
+from jobs.ingest.main import build_daily_picks, pick_epoch_ms, pick_rows
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_weights_cache_reloads_only_when_mtime_changes(tmp_path):
+    path = tmp_path / "weights.json"
+    data = json.loads((ROOT / "config" / "weights.json").read_text(encoding="utf-8"))
+    path.write_text(json.dumps(data), encoding="utf-8")
+    cache = WeightsCache({"WEIGHT_CONFIG_PATH": str(path)})
+
+    assert cache.refresh() is True
+    assert cache.refresh() is False
+    first = cache.current
+
+    data["minScore"] = 42
+    path.write_text(json.dumps(data), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.refresh() is True
+    assert cache.current.minScore == 42 and cache.current is not first
+
+
+def test_next_eod_skips_weekends():
+    at = time(15, 30)
+    assert next_eod(datetime(2024, 2, 6, 9, 0), at) == datetime(2024, 2, 6, 15, 30)
+    # Friday after the close -> Monday.
+    assert next_eod(datetime(2024, 2, 9, 15, 30), at) == datetime(2024, 2, 12, 15, 30)
+
+
+class _Stop(Exception):
+    pass
+
+
+def test_failed_eod_run_stays_due_until_it_succeeds(monkeypatch):
+    now = [datetime(2024, 2, 6, 15, 0)]
+    calls = []
+    daemon = IngestDaemon({"HTTP_CACHE_ENABLED": "0"})
+
+    def run_eod(today=None):
+        calls.append(("eod", now[0]))
+        if len(calls) == 2:
+            raise RuntimeError("feed down")
+
+    def sleep(seconds):
+        if len(calls) >= 5:
+            raise _Stop
+        now[0] += timedelta(seconds=seconds)
+
+    monkeypatch.setattr(daemon, "run_eod", run_eod)
+    monkeypatch.setattr(daemon, "refresh_news", lambda today=None: calls.append(("news", now[0])))
+    with pytest.raises(_Stop):
+        daemon.serve(news_interval=3600, eod_at=time(15, 30), clock=lambda: now[0], sleep=sleep)
+    # Start-up run, the 15:30 run fails, 16:30 retries it, then news polls resume.
+    assert calls == [
+        ("eod", datetime(2024, 2, 6, 15, 0)),
+        ("eod", datetime(2024, 2, 6, 15, 30)),
+        ("eod", datetime(2024, 2, 6, 16, 30)),
+        ("news", datetime(2024, 2, 6, 17, 30)),
+        ("news", datetime(2024, 2, 6, 18, 30)),
+    ]
+
+
+def test_refresh_news_writes_new_events_and_rescored_picks(tmp_path, monkeypatch):
+    weights = tmp_path / "weights.json"
+    weights.write_text((ROOT / "config" / "weights.json").read_text(encoding="utf-8"), encoding="utf-8")
+    env = {
+        "DATABASE_URL": _fresh_database(str(tmp_path), "daemon.db"),
+        "INGEST_OFFLINE": "1",
+        "HTTP_CACHE_ENABLED": "0",
+        "MIN_SCORE": "0",
+        "WEIGHT_CONFIG_PATH": str(weights),
+        "SYMBOL_CACHE_PATH": str(tmp_path / "names.sqlite"),
+        "SYMBOL_MASTER_PATH": str(tmp_path / "symbols_master.csv"),
+        "TDNET_SEEN_PATH": str(tmp_path / "tdnet_seen.json"),
+    }
+    daemon = IngestDaemon(env)
+    daemon.run_eod(date(2024, 2, 6))
+    latest = daemon.latest
+    known = daemon.events[0]
+    fresh = replace(
+        known, date=datetime.combine(latest, time(9, 0)), type="NEWS", tag="NEWS_POS", source="daemon-test"
+    )
+    feed = [known, fresh, fresh]
+    monkeypatch.setattr(daemon_module, "fetch_events", lambda *args, **kwargs: list(feed))
+
+    def stored():
+        conn = sqlite3.connect(env["DATABASE_URL"].removeprefix("file:"))
+        events = conn.execute('SELECT COUNT(*) FROM "CorporateEvent"').fetchone()[0]
+        picks = conn.execute(
+            'SELECT date, code, scoreFinal, reasons, stats FROM "Pick" WHERE date = ? ORDER BY code',
+            (pick_epoch_ms(latest.isoformat()),),
+        ).fetchall()
+        conn.close()
+        return events, picks
+
+    def expected_picks():
+        picks = build_daily_picks(env, daemon.last_bars, daemon.features, daemon.events, [latest])
+        return sorted(pick_rows(picks), key=lambda row: row[1])
+
+    before, _ = stored()
+    # Only the unseen event is written, once.
+    assert daemon.refresh_news(date(2024, 2, 6)) == 1
+    events, picks = stored()
+    assert events == before + 1
+    assert picks and picks == expected_picks()
+    assert daemon.refresh_news(date(2024, 2, 6)) == 0
+
+    # A weights change alone rewrites the picks under the new weights.
+    data = json.loads(weights.read_text(encoding="utf-8"))
+    data["event"]["NEWS_POS"] = 0.0
+    weights.write_text(json.dumps(data), encoding="utf-8")
+    stat = weights.stat()
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert daemon.refresh_news(date(2024, 2, 6)) == 0
+    assert stored() == (events, expected_picks()) != (events, picks)
@@ -0,0 +1,55 @@
+import sqlite3
+
+from jobs.ingest.utils.db import upsert_many
+
+
+def _conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        'CREATE TABLE "DailyPrice" (code TEXT NOT NULL, date DATETIME NOT NULL, close NUMERIC NOT NULL, '
+        "vwap NUMERIC, PRIMARY KEY (code, date))"
+    )
+    conn.execute("CREATE TABLE writes (date TEXT)")
+    conn.execute('CREATE TRIGGER log_update AFTER UPDATE ON "DailyPrice" BEGIN INSERT INTO writes VALUES (new.date); END')
+    return conn
+
+
+def test_upsert_many_counts_and_skips_identical_rows():
+    conn = _conn()
+    columns = ("code", "date", "close", "vwap")
+    keys = ("code", "date")
+    first = upsert_many(conn, "DailyPrice", columns, keys, [("7203", "2024-01-04", "2290.80", None)] * 2)
+    assert (first.inserted, first.updated, first.unchanged) == (1, 0, 0)
+
+    rows = [("7203", "2024-01-04", "2290.80", None), ("7203", "2024-01-05", "2286.22", "2286.22")]
+    second = upsert_many(conn, "DailyPrice", columns, keys, rows, chunk_size=1)
+    assert (second.inserted, second.updated, second.unchanged) == (1, 0, 1)
+    assert conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0] == 0
+
+    third = upsert_many(conn, "DailyPrice", columns, keys, [("7203", "2024-01-04", "2300.00", None)])
+    assert (third.inserted, third.updated, third.unchanged) == (0, 1, 0)
+    assert conn.execute("SELECT close FROM DailyPrice WHERE date = '2024-01-04'").fetchone()[0] == 2300.0
+
+
+def test_bulk_load_rebuilds_dropped_indexes_and_rolls_back_on_failure():
+    from jobs.ingest.backfill import bulk_load
+
+    conn = _conn()
+    conn.execute('CREATE INDEX "DailyPrice_date_idx" ON "DailyPrice" ("date")')
+    conn.commit()
+    indexes = "SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'DailyPrice_date_idx'"
+
+    with bulk_load(conn, drop_indexes=True):
+        assert conn.execute(indexes).fetchone() is None
+        conn.execute("INSERT INTO DailyPrice VALUES ('7203', '2024-01-04', 2290.8, NULL)")
+    assert conn.execute(indexes).fetchone() is not None
+
+    try:
+        with bulk_load(conn, drop_indexes=True):
+            conn.execute("INSERT INTO DailyPrice VALUES ('7203', '2024-01-05', 2286.2, NULL)")
+            raise RuntimeError("load failed")
+    except RuntimeError:
+        pass
+    assert conn.execute(indexes).fetchone() is not None
+    assert conn.execute("SELECT COUNT(*) FROM DailyPrice").fetchone()[0] == 1
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
@@ -0,0 +1,168 @@
+import math
+import random
+from statistics import mean, pstdev
+
+import pytest
+
+from jobs.ingest.adapters.price_adapter import PriceAdapter, PriceBar
+from jobs.ingest.features import FeatureCalculator, FeatureFrame, FeatureRecord, FeatureStream
+from jobs.ingest.rolling import RollingMax
+
+
+def _naive_features(code: str, bars: list[PriceBar]) -> list[FeatureRecord]:
+    """Straightforward window-slicing implementation used as the oracle."""
+    records = []
+    for idx, bar in enumerate(bars):
+        day = bar.trading_date.isoformat()
+        volumes = [b.volume for b in bars[max(0, idx - 19) : idx + 1]]
+        closes = [b.close for b in bars[max(0, idx - 19) : idx + 1]]
+        if len(volumes) == 20:
+            std = pstdev(volumes)
+            z = 0.0 if std == 0 else (volumes[-1] - mean(volumes)) / std
+            records.append(FeatureRecord(code, day, "volume_z", z))
+        if idx >= 1:
+            prev = bars[idx - 1].close
+            records.append(FeatureRecord(code, day, "gap_pct", (bar.open - prev) / prev))
+        if bar.vwap:
+            records.append(FeatureRecord(code, day, "vwap_dev_pct", (bar.close - bar.vwap) / bar.vwap))
+        if len(volumes) == 20 and mean(volumes) != 0:
+            records.append(FeatureRecord(code, day, "supply_demand_proxy", mean(volumes[-5:]) / mean(volumes)))
+        records.append(FeatureRecord(code, day, "high20d_dist_pct", bar.close / max(closes) - 1))
+    return records
+
+
+def _assert_same(reference, candidate):
+    reference = list(reference.records()) if isinstance(reference, FeatureFrame) else reference
+    candidate = list(candidate.records()) if isinstance(candidate, FeatureFrame) else candidate
+    assert len(reference) == len(candidate)
+    for ref, got in zip(reference, candidate):
+        assert (ref.code, ref.date, ref.name) == (got.code, got.date, got.name)
+        assert math.isclose(ref.value, got.value, rel_tol=1e-9, abs_tol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["reference", "streaming", "vectorized"])
+def test_engines_match_naive_windows(engine, synthetic_bars):
+    if engine == "vectorized":
+        pytest.importorskip("numpy")
+    bars = synthetic_bars("1301", 80, seed=4)
+    calc = FeatureCalculator(PriceAdapter(), engine=engine)
+    _assert_same(_naive_features("1301", bars), calc.compute({"1301": bars}))
+
+
+def test_stream_preview_does_not_advance_state(synthetic_bars):
+    bars = synthetic_bars("1301", 30, seed=5)
+    stream = FeatureStream()
+    for bar in bars[:-1]:
+        stream.update(bar)
+    previewed = stream.preview(bars[-1])
+    assert stream.preview(bars[-1]) == previewed
+    assert stream.update(bars[-1]) == previewed
+
+
+def test_engines_agree_on_sample():
+    pytest.importorskip("numpy")
+    adapter = PriceAdapter()
+    prices = adapter.fetch()
+    reference = FeatureCalculator(adapter, engine="streaming").compute(prices)
+    candidate = FeatureCalculator(adapter, engine="vectorized").compute(prices)
+    _assert_same(reference, candidate)
+
+
+def test_engines_agree_on_synthetic_history(synthetic_bars):
+    pytest.importorskip("numpy")
+    prices = {
+        "1301": synthetic_bars("1301", 120, seed=1),
+        "1332": synthetic_bars("1332", 7, seed=2),
+        "1333": [],
+    }
+    adapter = PriceAdapter()
+    reference = FeatureCalculator(adapter, engine="streaming").compute(prices)
+    candidate = FeatureCalculator(adapter, engine="vectorized").compute(prices)
+    _assert_same(reference, candidate)
+
+
+@pytest.mark.parametrize("engine", ["reference", "streaming", "vectorized"])
+def test_warmup_bars_seed_windows_without_emitting_records(engine, synthetic_bars):
+    if engine == "vectorized":
+        pytest.importorskip("numpy")
+    bars = synthetic_bars("1301", 60, seed=3)
+    calc = FeatureCalculator(PriceAdapter(), engine=engine)
+    full = [
+        record for record in calc.compute({"1301": bars}).records() if record.date > bars[-4].trading_date.isoformat()
+    ]
+    incremental = calc.compute({"1301": bars[-3:]}, warmup={"1301": bars[-23:-3]})
+    _assert_same(full, incremental)
+
+
+def test_rolling_max_push_and_peek_match_window_max():
+    rng = random.Random(6)
+    values = [rng.randint(0, 50) for _ in range(300)]
+    acc = RollingMax(7)
+    for idx, value in enumerate(values):
+        assert acc.peek(value) == max(values[max(0, idx - 6) : idx + 1])
+        acc.push(value)
+        assert acc.max == max(values[max(0, idx - 6) : idx + 1])
+
+
+def test_sharded_pool_matches_serial_features_and_spikes(synthetic_bars):
+    pytest.importorskip("numpy")
+    from jobs.ingest.parallel import compute_sharded
+    from jobs.ingest.rules import detect_volume_spike
+
+    prices = {f"{1300 + idx}": synthetic_bars(f"{1300 + idx}", 40 + idx * 9, seed=idx) for idx in range(9)}
+    calc = FeatureCalculator(PriceAdapter(), engine="vectorized")
+    serial = calc.compute(prices)
+    features, spikes = compute_sharded(prices, workers=2, spike_thresholds=(1.5, 2.0, 3.0))
+    _assert_same(serial, features)
+    assert spikes == detect_volume_spike(serial, (1.5, 2.0, 3.0))
+
+    warmup = {code: bars[:-5] for code, bars in prices.items()}
+    recent = {code: bars[-5:] for code, bars in prices.items()}
+    features, _ = compute_sharded(recent, workers=2, warmup=warmup)
+    _assert_same(calc.compute(recent, warmup=warmup), features)
+    # In-process path, and a code without bars.
+    features, spikes = compute_sharded({**prices, "1399": []}, workers=1, spike_thresholds=(1.5, 2.0, 3.0))
+    _assert_same(serial, features)
+    assert spikes == detect_volume_spike(serial, (1.5, 2.0, 3.0))
+
+
+def test_parallel_ingest_rejects_scalar_engines():
+    from jobs.ingest.main import run_ingest
+
+    for engine in ("streaming", "reference"):
+        with pytest.raises(ValueError, match="FEATURE_ENGINE=vectorized"):
+            run_ingest({"INGEST_PARALLEL": "true", "FEATURE_ENGINE": engine, "INGEST_OFFLINE": "1"}, None)
+
+
+def test_feature_frame_lookups(synthetic_bars):
+    bars = synthetic_bars("1301", 25, seed=7)
+    frame = FeatureCalculator(PriceAdapter(), engine="streaming").compute({"1301": bars, "1332": bars[:3]})
+    day = bars[-1].trading_date.isoformat()
+    assert frame.get("1301", day) == {
+        record.name: record.value for record in frame.records() if record.code == "1301" and record.date == day
+    }
+    assert "volume_z" in frame.get("1301", day)
+    assert frame.get("1332", day) == {}
+    assert frame.row("9999", day) is None
+    assert set(frame.on_date(bars[1].trading_date.isoformat())) == {"1301", "1332"}
+    assert FeatureFrame.from_records(frame.records()).get("1301", day) == frame.get("1301", day)
+
+
+def test_volume_spike_levels_and_stored_dates():
+    pytest.importorskip("numpy")
+    from jobs.ingest.rules import detect_volume_spike
+
+    frame = FeatureFrame()
+    days = ["2024-02-01", "2024-02-02", "2024-02-05", "2024-02-06"]
+    frame.append_code("1301", days, {"volume_z": [float("nan"), 2.5, 1.0, 4.0]})
+    frame.append_code("1302", days, {"volume_z": [3.1, 0.0, 2.0, float("nan")]})
+
+    events = detect_volume_spike(frame, (2.0, 3.0))
+    assert [(ev.code, ev.date.date().isoformat(), ev.summary) for ev in events] == [
+        ("1301", "2024-02-02", "volume_z=2.50"),
+        ("1301", "2024-02-06", "volume_z=4.00 level=2"),
+        ("1302", "2024-02-01", "volume_z=3.10 level=2"),
+        ("1302", "2024-02-05", "volume_z=2.00"),
+    ]
+    stored = {("1301", "2024-02-02"), ("1302", "2024-02-05")}
+    assert detect_volume_spike(frame, (2.0, 3.0), stored=stored) == [events[1], events[2]]
@@ -0,0 +1,73 @@
+import threading
+from types import SimpleNamespace
+
+from jobs.ingest.fetch_stage import FALLBACK, LIVE, TIMED_OUT, FetchSource, run_fetch_stage
+from jobs.ingest.utils.http import LazySession
+
+
+def test_sources_are_fetched_concurrently_and_fall_back_independently():
+    # Every live fetcher waits for the other three, so a serial stage would time them out.
+    running = threading.Barrier(4, timeout=5)
+    release = threading.Event()
+
+    def live(items):
+        def fetch():
+            running.wait()
+            return items
+
+        return fetch
+
+    def slow():
+        running.wait()
+        release.wait(5)
+        return ["late"]
+
+    def broken():
+        running.wait()
+        raise RuntimeError("boom")
+
+    try:
+        outcomes = run_fetch_stage(
+            [
+                FetchSource("fast", live(["live"]), lambda: ["sample"]),
+                FetchSource("slow", slow, lambda: ["sample"]),
+                FetchSource("broken", broken, lambda: ["sample"]),
+                FetchSource("empty", live([]), lambda: ["sample"]),
+                FetchSource("offline", None, lambda: ["sample"]),
+            ],
+            deadline=5.0,
+            source_timeout=1.0,
+        )
+    finally:
+        release.set()
+    assert not running.broken
+    assert [(name, outcome.status, outcome.items) for name, outcome in outcomes.items()] == [
+        ("fast", LIVE, ["live"]),
+        ("slow", TIMED_OUT, ["sample"]),
+        ("broken", FALLBACK, ["sample"]),
+        ("empty", FALLBACK, ["sample"]),
+        ("offline", FALLBACK, ["sample"]),
+    ]
+
+
+def test_lazy_session_builds_one_session_per_thread():
+    built = []
+
+    def factory():
+        built.append(SimpleNamespace(owner=threading.get_ident()))
+        return built[-1]
+
+    session = LazySession(factory)
+    assert not session.started
+    owners = []
+
+    def use():
+        owners.extend([session.owner, session.owner])
+
+    threads = [threading.Thread(target=use) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert session.started
+    assert len(built) == 3 and sorted(owners) == sorted(item.owner for item in built for _ in range(2))
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from jobs.ingest.utils.html import news_rows, page_title
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+TRICKY = """<html><head><title> 任天堂【7974】 &amp; 株価 </title></head><body>
+<table class="s_news_list"><tr><th>時刻</th><th>コード</th><th>見出し</th></tr>
+<tr><td><time>24/02/06</time><time datetime="2024-02-06T15:00:00">x</time></td>
+    <td class="oncodetip_code-data1"> <span>79</span><br/>74 </td>
+    <td><a href="/n/1"><b>任天堂</b>、今期 <br>上方修正 &amp; 増配</a><a href="/n/2">次</a></td></tr>
+<tr><td class="oncodetip_code-data1" data-code="6758">6758</td><td>リンクなし</td></tr>
+<tr><td class="oncodetip_code-data1"> </td><td><a href="/n/3">コードなし</a></td></tr>
+<tr><td class="oncodetip_code-data1" data-code="9984">9984</td><td><a href="/n/4">ソフトバンクG</a>
+</table>
+<table class="s_news_list"><tr><td class="oncodetip_code-data1">7203</td><td><a>two tables</a></td></tr></table>
+<table><tr><td class="oncodetip_code-data1">6501</td><td><a>not a news list</a></td></tr></table>
+</body></html>
+<table class="s_news_list"><tr><td class="oncodetip_code-data1">8306</td><td><a>after body</a></td></tr></table>"""
+
+
+@pytest.mark.parametrize("name", ["kabutan_news.html", "kabutan_profile.html"])
+def test_stream_backend_matches_beautifulsoup_on_saved_pages(name):
+    pytest.importorskip("bs4")
+    html = (FIXTURES / name).read_text(encoding="utf-8")
+
+    assert page_title(html, "stream") == page_title(html, "bs4")
+    assert news_rows(html, "stream") == news_rows(html, "bs4")
+
+
+def test_stream_backend_edge_cases():
+    rows = news_rows(TRICKY, "stream")
+    assert page_title(TRICKY, "stream") == " 任天堂【7974】 & 株価 "
+    assert [(row.code, row.title, row.published) for row in rows] == [
+        ("7974", "任天堂、今期上方修正 & 増配", None),
+        ("9984", "ソフトバンクG", None),
+        ("7203", "two tables", None),
+        ("8306", "after body", None),
+    ]
+    # Every s_news_list table is read, as the BeautifulSoup selector does.
+    pytest.importorskip("bs4")
+    assert news_rows(TRICKY, "bs4") == rows
+
+
+def test_news_adapter_uses_the_backend_it_is_given(monkeypatch):
+    from jobs.ingest.adapters.news_adapter import NewsAdapter
+
+    # The process environment is not consulted; only the adapter's setting is.
+    monkeypatch.setenv("HTML_PARSER_BACKEND", "bs4")
+    assert [item.code for item in NewsAdapter()._parse_html(TRICKY)] == ["7974", "9984", "7203", "8306"]
+    with pytest.raises(ValueError, match="Unknown HTML parser backend"):
+        NewsAdapter(html_backend="lxml")._parse_html(TRICKY)
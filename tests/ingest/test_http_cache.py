@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from jobs.ingest.adapters.earnings_adapter import EarningsAdapter
+from jobs.ingest.utils.http import CachingSession, HttpCache
+
+BODY = json.dumps([{"code": "7203", "title": "第3四半期決算短信", "summary": "", "date": "2024-02-02"}]).encode()
+# One dated and one undated news row.
+NEWS_HTML = (
+    '<html><body><table class="s_news_list">'
+    '<tr><td><time datetime="2024-02-06T15:00:00"></time></td><td class="oncodetip_code-data1">7974</td>'
+    '<td><a href="/n/1">dated</a></td></tr>'
+    '<tr><td class="oncodetip_code-data1">9984</td><td><a href="/n/2">undated</a></td></tr>'
+    "</table></body></html>"
+).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).full_responses += 1
+        news = self.path.endswith(".html")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8" if news else "application/json; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(NEWS_HTML if news else BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/earnings.json"
+    httpd.shutdown()
+
+
+def test_conditional_get_serves_unchanged_body_from_cache(server, tmp_path):
+    cache = HttpCache(tmp_path)
+    session = CachingSession(requests.Session(), cache)
+    adapter = EarningsAdapter(feed_url=server, session=session)
+
+    full_responses = _Handler.full_responses
+    first = adapter.fetch_live()
+    second = adapter.fetch_live()
+
+    assert first == second and first[0].code == "7203"
+    assert _Handler.full_responses == full_responses + 1
+    assert cache.counters["misses"] == 1 and cache.counters["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used_bodies(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=10)
+    cache.store("http://a/1", b"123456", {"ETag": "a"}, None)
+    older = cache._path("http://a/1", ".body")
+    os.utime(older, (1, 1))
+    cache.store("http://a/2", b"123456", {"ETag": "b"}, None)
+    assert cache.lookup("http://a/1") is None
+    assert cache.lookup("http://a/2") is not None
+    assert cache.counters["evictions"] == 1
+
+
+def test_cache_lists_the_directory_only_when_over_the_limit(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path, max_bytes=20)
+    scans = []
+    real_glob = type(tmp_path).glob
+    monkeypatch.setattr(type(tmp_path), "glob", lambda self, pattern: scans.append(pattern) or real_glob(self, pattern))
+    for idx in range(3):
+        cache.store(f"http://a/{idx}", b"123456", {"ETag": "a"}, None)
+    # Re-storing a URL replaces its size in the running total.
+    cache.store("http://a/0", b"1234567", {"ETag": "b"}, None)
+    assert len(scans) == 1 and cache.counters["evictions"] == 0
+
+    cache.store("http://a/3", b"123456", {"ETag": "c"}, None)
+    assert len(scans) == 2 and cache.counters["evictions"] == 1
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.body")) <= 20
+
+
+def test_streamed_get_is_stored_once_read_and_replayed_after_304(server, tmp_path):
+    cache = HttpCache(tmp_path)
+    session = CachingSession(requests.Session(), cache)
+
+    # A reader that stops partway leaves nothing behind.
+    with session.get(server, stream=True) as resp:
+        next(resp.iter_content(8))
+    assert cache.lookup(server) is None and resp.body_digest is None
+
+    with session.get(server, stream=True) as resp:
+        assert b"".join(resp.iter_content(8)) == BODY
+    assert cache.lookup(server).digest == resp.body_digest
+
+    with session.get(server, stream=True) as resp:
+        assert resp.from_cache and b"".join(resp.iter_content(8)) == BODY
+    assert cache.counters["misses"] == 2 and cache.counters["hits"] == 1
+
+
+def test_undated_news_rows_are_dated_on_every_fetch(server, tmp_path, monkeypatch):
+    from jobs.ingest.adapters import news_adapter
+
+    class _Clock(datetime):
+        current = datetime(2024, 2, 7, 9, 0)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(news_adapter, "datetime", _Clock)
+    cache = HttpCache(tmp_path)
+    adapter = news_adapter.NewsAdapter(
+        feed_url=server.replace("earnings.json", "news.html"), session=CachingSession(requests.Session(), cache)
+    )
+
+    first = adapter.fetch_live()
+    _Clock.current = datetime(2024, 2, 8, 9, 0)
+    second = adapter.fetch_live()
+
+    assert cache.counters["hits"] == 1
+    assert [item.published_at for item in first] == [datetime(2024, 2, 6, 15, 0), datetime(2024, 2, 7, 9, 0)]
+    # The cached rows keep no fetch time; the replay is dated by the second fetch.
+    assert [item.published_at for item in second] == [datetime(2024, 2, 6, 15, 0), datetime(2024, 2, 8, 9, 0)]
+
+
+def test_body_evicted_after_lookup_is_fetched_again(server, tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path)
+    session = CachingSession(requests.Session(), cache)
+    session.get(server)
+    real_lookup = cache.lookup
+
+    def lookup_then_evict(url):
+        entry = real_lookup(url)
+        # Another thread's store evicts the body between lookup() and body().
+        cache._path(url, ".body").unlink()
+        return entry
+
+    monkeypatch.setattr(cache, "lookup", lookup_then_evict)
+    resp = session.get(server)
+
+    assert not resp.from_cache and resp.content == BODY
+    assert cache.body(server) == BODY and cache.counters["hits"] == 0
+
+
+def test_concurrent_stores_and_reads_never_see_a_missing_body(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=64)
+    errors = []
+
+    def work(worker):
+        try:
+            for idx in range(200):
+                url = f"http://a/{(worker + idx) % 12}"
+                if cache.lookup(url) is not None:
+                    cache.body(url)
+                cache.store(url, b"x" * 16, {"ETag": str(idx)}, None)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.body")) <= 64
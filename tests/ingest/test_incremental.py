@@ -0,0 +1,103 @@
+import sqlite3
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from jobs.ingest.backfill import _fresh_database
+from jobs.ingest.incremental import WARMUP_BARS, split_new_bars
+from jobs.ingest.main import PICK_LOOKBACK_DAYS, run_ingest
+from jobs.ingest.synthetic import generate, write_market
+
+
+def _env(tmp_path, database_url, directory, **extra):
+    return {
+        "DATABASE_URL": database_url,
+        "SAMPLE_DATA_DIR": str(directory),
+        "INGEST_OFFLINE": "1",
+        "HTTP_CACHE_ENABLED": "0",
+        "SYMBOL_CACHE_PATH": str(tmp_path / "names.sqlite"),
+        "SYMBOL_MASTER_PATH": str(tmp_path / "symbols_master.csv"),
+        **extra,
+    }
+
+
+def _rows(database_url, sql):
+    conn = sqlite3.connect(database_url.removeprefix("file:"))
+    rows = conn.execute(sql).fetchall()
+    conn.close()
+    return rows
+
+
+def test_incremental_runs_store_the_same_rows_as_a_full_run(tmp_path):
+    market = generate(30, 80, seed=5)
+    cut = market.prices["1301"][59].trading_date
+    earlier = replace(
+        market,
+        prices={code: [bar for bar in bars if bar.trading_date <= cut] for code, bars in market.prices.items()},
+        tdnet=[item for item in market.tdnet if item.announced_at.date() <= cut],
+        earnings=[item for item in market.earnings if item.announced_at.date() <= cut],
+        news=[item for item in market.news if item.published_at.date() <= cut],
+    )
+    full_dir = write_market(market, tmp_path / "full")
+    earlier_dir = write_market(earlier, tmp_path / "earlier")
+
+    full = _fresh_database(str(tmp_path), "full.db")
+    run_ingest(_env(tmp_path, full, full_dir), None)
+    incremental = _fresh_database(str(tmp_path), "incremental.db")
+    run_ingest(_env(tmp_path, incremental, earlier_dir, INGEST_INCREMENTAL="1"), None)
+    _, _, _, written = run_ingest(_env(tmp_path, incremental, full_dir, INGEST_INCREMENTAL="1"), None)
+    assert written["DailyPrice"].inserted == 30 * 20
+
+    for sql in (
+        'SELECT code, date, name, value FROM "Feature" ORDER BY code, date, name',
+        'SELECT * FROM "CorporateEvent" ORDER BY id',
+    ):
+        assert _rows(incremental, sql) == _rows(full, sql)
+    assert any(row[3] == "VOL_SPIKE" for row in _rows(full, 'SELECT * FROM "CorporateEvent"'))
+    latest = 'SELECT * FROM "Pick" WHERE date = (SELECT MAX(date) FROM "Pick") ORDER BY code'
+    assert _rows(incremental, latest) == _rows(full, latest)
+
+    # One grouped query finds the new bars; the warm-up comes from the bars in memory.
+    conn = sqlite3.connect(incremental.removeprefix("file:"))
+    statements = []
+    conn.set_trace_callback(statements.append)
+    prices = {
+        code: bars + [replace(bars[-1], trading_date=bars[-1].trading_date + timedelta(days=1))]
+        for code, bars in market.prices.items()
+    }
+    new_bars, warmup = split_new_bars(conn, prices)
+    conn.close()
+    assert len(statements) == 1
+    assert all(len(bars) == 1 for bars in new_bars.values()) and len(new_bars) == 30
+    assert all(warmup[code] == prices[code][-1 - WARMUP_BARS : -1] for code in prices)
+
+
+def test_incremental_run_redetects_stored_spikes_when_thresholds_change(tmp_path):
+    market = generate(30, 80, seed=5)
+    directory = write_market(market, tmp_path / "market")
+    since = datetime.combine(market.last_date - timedelta(days=PICK_LOOKBACK_DAYS), datetime.min.time())
+    window = (
+        "SELECT * FROM \"CorporateEvent\" WHERE type = 'VOL_SPIKE' "
+        f"AND date >= {int(since.timestamp() * 1000)} ORDER BY id"
+    )
+
+    full = _fresh_database(str(tmp_path), "full.db")
+    run_ingest(_env(tmp_path, full, directory, VOL_SPIKE_THRESHOLDS="2.5,3.5"), None)
+    incremental = _fresh_database(str(tmp_path), "incremental.db")
+    run_ingest(_env(tmp_path, incremental, directory, INGEST_INCREMENTAL="1"), None)
+    assert _rows(incremental, window) != _rows(full, window)
+
+    # No new bars, but the stored window was detected with the default threshold.
+    _, _, _, written = run_ingest(
+        _env(tmp_path, incremental, directory, INGEST_INCREMENTAL="1", VOL_SPIKE_THRESHOLDS="2.5,3.5"), None
+    )
+    assert written["DailyPrice"].inserted == 0 and written["CorporateEvent"].deleted > 0
+    assert _rows(incremental, window) == _rows(full, window)
+    assert any("level=2" in row[5] for row in _rows(full, window))
+    latest = 'SELECT * FROM "Pick" WHERE date = (SELECT MAX(date) FROM "Pick") ORDER BY code'
+    assert _rows(incremental, latest) == _rows(full, latest)
+
+    # Same thresholds again: the stored spikes are reused and nothing is rewritten.
+    _, _, _, written = run_ingest(
+        _env(tmp_path, incremental, directory, INGEST_INCREMENTAL="1", VOL_SPIKE_THRESHOLDS="2.5,3.5"), None
+    )
+    assert written["CorporateEvent"].deleted == 0 and written["CorporateEvent"].updated == 0
@@ -0,0 +1,246 @@
+import sqlite3
+from dataclasses import replace
+from datetime import date, datetime
+
+from jobs.ingest.main import replace_picks
+from jobs.ingest.scoring import ScoreComponents
+
+
+def _pick(day: str, code: str, score: float) -> dict:
+    return {
+        "date": day,
+        "code": code,
+        "score": ScoreComponents(raw=score / 100, normalized=score, passed_filters=True, reasons=[]),
+        "metrics": {},
+    }
+
+
+def test_replace_picks_only_touches_rebuilt_dates():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        'CREATE TABLE "Pick" (date DATETIME NOT NULL, code TEXT NOT NULL, scoreFinal REAL NOT NULL, '
+        "reasons TEXT NOT NULL, stats TEXT NOT NULL, PRIMARY KEY (date, code))"
+    )
+    first = [_pick("2024-02-05", "7203", 70.0), _pick("2024-02-06", "7203", 65.0), _pick("2024-02-06", "9984", 61.0)]
+    replace_picks(conn, first, [date(2024, 2, 5), date(2024, 2, 6)])
+
+    stats = replace_picks(conn, [_pick("2024-02-06", "9984", 62.5)], [date(2024, 2, 6)])
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 1, 1)
+    rows = conn.execute('SELECT date, code, scoreFinal FROM "Pick" ORDER BY date, code').fetchall()
+    assert rows == [(1707091200000, "7203", 70.0), (1707177600000, "9984", 62.5)]
+
+
+def test_replace_picks_commits_earlier_writes_with_the_picks(tmp_path):
+    path = tmp_path / "picks.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        'CREATE TABLE "Pick" (date DATETIME NOT NULL, code TEXT NOT NULL, scoreFinal REAL NOT NULL, '
+        "reasons TEXT NOT NULL, stats TEXT NOT NULL, PRIMARY KEY (date, code));"
+        'CREATE TABLE "Symbol" (code TEXT PRIMARY KEY, name TEXT NOT NULL);'
+    )
+    conn.execute('INSERT INTO "Symbol" VALUES (?, ?)', ("7203", "トヨタ自動車"))
+    reader = sqlite3.connect(path)
+    assert reader.execute('SELECT COUNT(*) FROM "Symbol"').fetchone() == (0,)
+
+    replace_picks(conn, [_pick("2024-02-05", "7203", 70.0)], [date(2024, 2, 5)])
+    assert not conn.in_transaction
+    assert reader.execute('SELECT COUNT(*) FROM "Symbol"').fetchone() == (1,)
+    assert reader.execute('SELECT COUNT(*) FROM "Pick"').fetchone() == (1,)
+
+
+def _history_inputs(synthetic_bars):
+    import random
+    from datetime import datetime, timedelta
+
+    from jobs.ingest.features import FeatureCalculator
+    from jobs.ingest.rules import DetectedEvent
+
+    prices = {code: synthetic_bars(code, 60, seed) for seed, code in enumerate(("6758", "7203", "9984"))}
+    rng = random.Random(3)
+    tags = ["GUIDE_UP", "EARNINGS_POSITIVE", "NEWS_POS", "NEWS_NEG", "TDNET", "VOL_SPIKE"]
+    events = []
+    for idx in range(40):
+        tag = rng.choice(tags)
+        day = date(2023, 1, 2) + timedelta(days=rng.randint(-5, 70))
+        events.append(
+            DetectedEvent(
+                code=rng.choice(["6758", "7203", "9984", "1301"]),
+                date=datetime.combine(day, datetime.min.time()),
+                type=tag,
+                tag=tag,
+                title="業績予想の下方修正" if tag == "TDNET" and idx % 3 == 0 else f"event {idx}",
+                summary="",
+                source="test",
+                score_raw=rng.choice([None, 0.4, 0.9, 1.5]),
+            )
+        )
+    return prices, FeatureCalculator(None).compute(prices), events
+
+
+def test_pick_history_matches_daily_picks_on_every_date(synthetic_bars):
+    from jobs.ingest.main import build_daily_picks, pick_dates
+    from jobs.ingest.pick_backfill import build_pick_history
+
+    prices, features, events = _history_inputs(synthetic_bars)
+    env = {"MIN_SCORE": "20", "PICK_DATE_FROM": "2022-12-01"}
+    dates = pick_dates(env, prices, events)
+
+    expected = build_daily_picks(env, prices, features, events, dates)
+    assert len(expected) > 20
+    assert build_pick_history(env, prices, features, events, dates) == expected
+
+
+def test_weight_sweep_matches_pick_history_per_variant(synthetic_bars):
+    from jobs.ingest.pick_backfill import build_pick_history
+    from jobs.ingest.scoring import load_weights
+    from jobs.ingest.sweep import apply_overrides, build_components, expand_grid, run_sweep
+
+    prices, features, events = _history_inputs(synthetic_bars)
+    overrides = expand_grid({"minScore": [20, 45], "event.GUIDE_UP": [0.0, 1.0], "tape.gap_pct": [0.3]})
+    variants = [apply_overrides(load_weights({}), item) for item in overrides]
+    results = run_sweep(build_components(prices, features, events), variants, overrides)
+
+    for item, result in zip(overrides, results):
+        env = {"MIN_SCORE": str(item["minScore"]), "WEIGHT_EVENT_GUIDE_UP": str(item["event.GUIDE_UP"])}
+        expected = [pick for pick in build_pick_history(env, prices, features, events) if pick["score"].normalized > 0]
+        assert [(day.isoformat(), code) for day, code, _ in result.picks] == [(p["date"], p["code"]) for p in expected]
+        for (_, _, score), pick in zip(result.picks, expected):
+            assert abs(score - pick["score"].normalized) < 1e-9
+    assert len({len(result.picks) for result in results}) > 1
+
+
+def test_pick_maintainer_pushes_match_full_rebuild(synthetic_bars):
+    from jobs.ingest.main import build_daily_picks
+    from jobs.ingest.pick_maintainer import PickMaintainer
+    from jobs.ingest.rules import EventIndex
+    from jobs.ingest.scoring import load_weights
+
+    prices, features, events = _history_inputs(synthetic_bars)
+    env = {"MIN_SCORE": "20"}
+    weights = load_weights(env)
+    pick_date = date(2023, 2, 10)
+    maintainer = PickMaintainer(weights, prices, features, EventIndex(events[:10]), pick_date)
+
+    rescored = 0
+    for pos in range(10, len(events)):
+        event = events[pos]
+        changes = maintainer.push_events([event])
+        rescored += maintainer.affects(event)
+        assert set(changes) <= {event.code}
+        expected = build_daily_picks(env, prices, features, events[: pos + 1], [pick_date])
+        assert sorted(maintainer.picks.values(), key=lambda pick: pick["code"]) == [
+            pick for pick in expected if pick["score"].normalized > 0
+        ]
+    assert 0 < rescored < len(events) - 10
+
+    # Events published after the pick date cannot change its scores.
+    after = datetime(2023, 2, 11)
+    later = replace(events[0], date=after, type="NEWS_NEG", tag="NEWS_NEG")
+    downward = next(event for event in events if event.tag == "TDNET" and "下方" in event.title)
+    assert not maintainer.affects(later)
+    assert not maintainer.affects(replace(downward, date=after))
+    assert maintainer.push_events([later]) == {}
+
+
+def test_pick_maintainer_feature_swap_matches_full_rebuild(synthetic_bars):
+    from jobs.ingest.features import FeatureCalculator
+    from jobs.ingest.main import build_daily_picks
+    from jobs.ingest.pick_maintainer import PickMaintainer
+    from jobs.ingest.rules import EventIndex
+    from jobs.ingest.scoring import load_weights
+
+    prices, features, events = _history_inputs(synthetic_bars)
+    env = {"MIN_SCORE": "20"}
+    pick_date = date(2023, 2, 10)
+    maintainer = PickMaintainer(load_weights(env), prices, features, EventIndex(events), pick_date)
+
+    # A corrected pick-date bar for one code: only that code is rescored.
+    revised = {code: list(bars) for code, bars in prices.items()}
+    pos = next(idx for idx, bar in enumerate(revised["7203"]) if bar.trading_date == pick_date)
+    bar = revised["7203"][pos]
+    revised["7203"][pos] = replace(bar, close=bar.close * 1.08, volume=bar.volume * 6)
+    swapped = FeatureCalculator(None).compute(revised)
+
+    changes = maintainer.push_features(swapped, {"7203": revised["7203"][pos]})
+    assert list(changes) == ["7203"]
+    expected = build_daily_picks(env, revised, swapped, events, [pick_date])
+    assert sorted(maintainer.picks.values(), key=lambda pick: pick["code"]) == [
+        pick for pick in expected if pick["score"].normalized > 0
+    ]
+    assert maintainer.push_features(swapped) == {}
+
+
+def test_score_batch_is_bit_identical_to_calculate_score():
+    import math
+    import random
+    from datetime import datetime
+
+    from jobs.ingest.rules import DetectedEvent
+    from jobs.ingest.scoring import WeightConfig, calculate_score, score_batch
+
+    rng = random.Random(11)
+    weights = WeightConfig(
+        event={"GUIDE_UP": 1.0, "NEWS_POS": 0.4, "NEWS_NEG": 0.0, "VOL_SPIKE": 0.6},
+        tape={"volume_z": 0.4, "gap_pct": 0.3, "supply_demand_proxy": 0.0},
+        minScore=40,
+    )
+
+    def maybe(value: float) -> float | None:
+        return None if rng.random() < 0.2 else value
+
+    cases = []
+    for _ in range(500):
+        tags = list(weights.event) + ["TDNET"]
+        events = [
+            DetectedEvent("7203", datetime(2024, 2, 1), "", rng.choice(tags), "", "", "", rng.choice([None, -0.5, 0.77, 2.0]))
+            for _ in range(rng.randint(0, 4))
+        ]
+        metrics = {
+            "volume_z": maybe(rng.uniform(-2, 8)),
+            "gap_pct": maybe(rng.uniform(-0.1, 0.1)),
+            "supply_demand_proxy": maybe(rng.uniform(0, 3)),
+        }
+        filters = {"high20d_dist_pct": maybe(rng.uniform(-0.3, 0.0)), "close": maybe(rng.uniform(50, 5000))}
+        cases.append((events, metrics, filters, rng.choice([0.0, 0.2, 0.3])))
+
+    def column(rows, name):
+        return [math.nan if row[name] is None else row[name] for row in rows]
+
+    metrics = {name: column([case[1] for case in cases], name) for name in cases[0][1]}
+    filters = {name: column([case[2] for case in cases], name) for name in cases[0][2]}
+    batch = score_batch(weights, [case[0] for case in cases], metrics, filters, [case[3] for case in cases])
+    passing = []
+    for pos, (events, case_metrics, case_filters, penalty) in enumerate(cases):
+        expected = calculate_score(weights, events, case_metrics, case_filters, {"recent_negative": penalty})
+        assert (batch.raw[pos], batch.normalized[pos], bool(batch.passed_filters[pos])) == (
+            expected.raw,
+            expected.normalized,
+            expected.passed_filters,
+        )
+        if expected.normalized >= weights.minScore:
+            passing.append(pos)
+    assert passing and batch.passing(weights.minScore) == passing
+
+
+def test_penalties_ignore_events_published_after_the_pick_date():
+    from datetime import datetime
+
+    import numpy as np
+
+    from jobs.ingest.pick_backfill import penalty_by_day
+    from jobs.ingest.rules import DetectedEvent, EventIndex
+
+    def event(day: date, tag: str, title: str = "") -> DetectedEvent:
+        return DetectedEvent("7203", datetime.combine(day, datetime.min.time()), tag, tag, title, "", "test", 0.5)
+
+    index = EventIndex([event(date(2024, 3, 1), "NEWS_NEG"), event(date(2024, 2, 1), "TDNET", "業績予想の下方修正")])
+    assert index.negative_penalty("7203", date(2024, 1, 10)) == 0.0
+    assert index.negative_penalty("7203", date(2023, 6, 1)) == 0.0
+    assert index.negative_penalty("7203", date(2024, 2, 1)) == 0.3
+
+    days = [date(2023, 6, 1), date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 6)]
+    ords = np.array([day.toordinal() for day in days], dtype=np.int64)
+    assert penalty_by_day(index, "7203", ords).tolist() == [index.negative_penalty("7203", day) for day in days]
+    assert penalty_by_day(EventIndex([event(date(2024, 3, 1), "NEWS_NEG")]), "7203", ords).tolist() == [
+        0.0, 0.0, 0.0, 0.0, 0.2, 0.2
+    ]
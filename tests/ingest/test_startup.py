@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+# Cumulative `import jobs.ingest.main` budget in ms; only checked when set, since
+# timings depend on the machine.
+IMPORT_BUDGET_MS = os.environ.get("INGEST_IMPORT_BUDGET_MS")
+HTTP_MODULES = ("requests", "bs4", "dotenv", "urllib3")
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def _import_times(stderr: str) -> dict:
+    """Parse ``-X importtime`` output into ``{module: cumulative microseconds}``."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_ingest_import_skips_http_modules_and_stays_within_budget():
+    # Best of three to ride out scheduler noise.
+    runs = [_import_times(_run("import jobs.ingest.main", "-X", "importtime").stderr) for _ in range(3)]
+    times = min(runs, key=lambda run: run["jobs.ingest.main"])
+    own = {name: us for name, us in times.items() if not name.startswith(("site", "encodings"))}
+    report = "\n".join(
+        f"{us / 1000:8.1f} ms  {name}" for name, us in sorted(own.items(), key=lambda item: -item[1])[:15]
+    )
+
+    assert not [name for name in HTTP_MODULES if name in times], report
+    if IMPORT_BUDGET_MS:
+        assert times["jobs.ingest.main"] / 1000 <= float(IMPORT_BUDGET_MS), report
+
+
+def test_offline_fetch_never_imports_http_modules():
+    code = (
+        "import sys\n"
+        "from jobs.ingest.main import fetch_events, open_session\n"
+        "env = {'INGEST_OFFLINE': 'true', 'HTTP_CACHE_ENABLED': 'false', 'TDNET_RSS_URL': 'https://example.com/x'}\n"
+        "session, _ = open_session(env)\n"
+        "assert fetch_events(env, session)\n"
+        "print('loaded=' + ','.join(name for name in %r if name in sys.modules))\n" % (HTTP_MODULES,)
+    )
+    assert _run(code).stdout.splitlines()[-1] == "loaded="
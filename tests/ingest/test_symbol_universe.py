@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from jobs.ingest.main import fetch_events, open_session
+from jobs.ingest.symbol_universe import SymbolUniverse, extract_codes, load_universe
+from jobs.ingest.utils.name_cache import SymbolNameCache
+
+# Years, times and page numbers around two real codes.
+PAGE = "2024年02月06日 09:30 7203 トヨタ自動車 決算 6758 ソニーグループ 開示 1/0012 ページ".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    profile_requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stock/":
+            code = parse_qs(url.query)["code"][0]
+            type(self).profile_requests.append(code)
+            if code != "6758":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = "<title>ソニーグループ【6758】</title>".encode()
+        else:
+            body = PAGE
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_universe_admits_known_codes_and_batches_unknown_ones():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "Symbol" (code TEXT PRIMARY KEY, name TEXT)')
+    conn.execute("INSERT INTO \"Symbol\" VALUES ('7203', 'トヨタ自動車')")
+    universe = load_universe(conn, cached_names={"9984": "ソフトバンクグループ", "0930": "x"})
+
+    assert extract_codes("09:30 0930 12345 2024 7203") == ["2024", "7203"]
+    assert universe.admit(["7203", "9984", "2024", "0930", "6758", "2024"]) == ["7203", "9984"]
+    assert list(universe.pending) == ["2024", "6758"]
+
+    calls = []
+    found = universe.resolve_pending(lambda codes: calls.append(list(codes)) or {"6758": "ソニーグループ"})
+    assert calls == [["2024", "6758"]] and found == {"6758": "ソニーグループ"}
+    assert "6758" in universe and "2024" not in universe and not universe.pending
+    assert universe.resolve_pending(lambda codes: pytest.fail("nothing is pending")) == {}
+
+
+def test_placeholder_symbol_rows_are_not_trusted():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "Symbol" (code TEXT PRIMARY KEY, name TEXT)')
+    # A year scraped by an earlier run and an intraday placeholder, next to real rows.
+    conn.executemany(
+        'INSERT INTO "Symbol" VALUES (?, ?)',
+        [("2024", "2024"), ("6758", "6758"), ("7203", "トヨタ自動車"), ("0930", "x")],
+    )
+    universe = load_universe(conn)
+
+    assert "2024" not in universe and "6758" not in universe and len(universe) == 1
+    assert universe.admit(["2024", "6758", "7203"]) == ["7203"]
+    assert universe.resolve_pending(lambda codes: {"6758": "ソニーグループ"}) == {"6758": "ソニーグループ"}
+    assert "6758" in universe and "2024" not in universe
+
+
+def test_fetch_events_drops_junk_codes_before_lookups(server, tmp_path):
+    env = {
+        "HTTP_CACHE_ENABLED": "false",
+        "TDNET_RSS_URL": f"{server}/I_list_001_20240206.html",
+        "SYMBOL_PROFILE_URL_TEMPLATE": f"{server}/stock/?code={{code}}",
+    }
+    cache = SymbolNameCache(tmp_path / "names.sqlite")
+    session, _ = open_session(env)
+    _Handler.profile_requests = []
+
+    events = fetch_events(env, session, feeds=("tdnet",), universe=SymbolUniverse({"7203": "トヨタ自動車"}), cache=cache)
+    assert sorted(event.code for event in events) == ["6758", "7203"]
+    assert sorted(_Handler.profile_requests) == ["2024", "6758"]
+
+    # The next run knows 6758 from the name cache and 2024 as missing: no lookups.
+    _Handler.profile_requests = []
+    universe = SymbolUniverse({"7203": "トヨタ自動車", **cache.all_names()})
+    events = fetch_events(env, session, feeds=("tdnet",), universe=universe, cache=cache)
+    assert sorted(event.code for event in events) == ["6758", "7203"]
+    assert _Handler.profile_requests == []
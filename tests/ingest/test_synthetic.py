@@ -0,0 +1,64 @@
+from jobs.ingest.adapters.earnings_adapter import EarningsAdapter
+from jobs.ingest.adapters.news_adapter import NewsAdapter
+from jobs.ingest.adapters.price_adapter import PriceAdapter
+from jobs.ingest.adapters.tdnet_rss_adapter import TdnetRssAdapter
+from jobs.ingest.feed_server import FeedData, FeedServer
+from jobs.ingest.features import FeatureCalculator
+from jobs.ingest.main import read_symbols_local
+from jobs.ingest.rules import detect_tdnet, detect_volume_spike
+from jobs.ingest.synthetic import generate, write_market
+from jobs.ingest.utils.http import new_session
+
+
+def test_generated_market_is_seeded_and_reads_back_through_the_sample_adapters(tmp_path):
+    market = generate(40, 120, seed=3)
+    again = generate(40, 120, seed=3)
+    assert market.prices == again.prices and market.tdnet == again.tdnet and market.news == again.news
+    assert generate(40, 120, seed=4).prices != market.prices
+
+    directory = write_market(market, tmp_path / "market")
+    prices = PriceAdapter(str(directory / "daily_prices.csv")).fetch()
+    assert list(prices) == list(market.prices) and len(prices["1301"]) == 120
+    assert prices["1301"][-1].close == round(market.prices["1301"][-1].close, 2)
+    events = str(directory / "events.csv")
+    assert len(TdnetRssAdapter(sample_path=events).read_sample()) == len(market.tdnet)
+    assert len(EarningsAdapter(sample_path=events).read_sample()) == len(market.earnings)
+    assert [item.polarity for item in NewsAdapter(str(directory / "news.json")).read_sample()] == [
+        item.polarity for item in market.news
+    ]
+    assert len(read_symbols_local({"SAMPLE_DATA_DIR": str(directory)})) == 40
+
+    # Regime switches and announcement bursts show up as volume spikes.
+    spikes = detect_volume_spike(FeatureCalculator(PriceAdapter()).compute(prices))
+    assert len(spikes) > 40
+    assert "GUIDE_UP" in {event.tag for event in detect_tdnet(market.tdnet)}
+
+
+def test_feed_server_serves_the_market_to_the_live_adapters(tmp_path):
+    market = generate(200, 40, seed=3)
+    data = FeedData(write_market(market, tmp_path / "market"))
+    day = max(data.tdnet, key=lambda key: len(data.tdnet[key]))
+    expected = [item for item in market.tdnet if f"{item.announced_at:%Y%m%d}" == day]
+    assert len(expected) >= 3
+
+    with FeedServer(data, pages=3) as server:
+        env = server.env(day)
+        session = new_session()
+        adapter = TdnetRssAdapter(rss_url=env["TDNET_RSS_URL"], session=session)
+        items = adapter.fetch_live()
+        assert adapter.pages_fetched == 3
+        assert sorted((item.code, item.announced_at, item.title) for item in items) == sorted(
+            (item.code, item.announced_at, item.title) for item in expected
+        )
+        news = NewsAdapter(feed_url=env["NEWS_FEED_URL"], session=session).fetch_live()
+        html = NewsAdapter(feed_url=f"{server.url}/news.html", session=session).fetch_live()
+        assert len(news) == len(html) == len(market.news)
+        assert [item.title for item in html] == [item.title for item in news]
+        earnings = EarningsAdapter(feed_url=env["EARNINGS_FEED_URL"], session=session).fetch_live()
+        assert sorted(item.announced_at for item in earnings) == [item.announced_at for item in market.earnings]
+
+    with FeedServer(data, error_rate=1.0) as failing:
+        events = str(tmp_path / "market" / "events.csv")
+        adapter = EarningsAdapter(sample_path=events, feed_url=failing.env()["EARNINGS_FEED_URL"])
+        assert len(adapter.fetch()) == len(market.earnings)
+        assert failing.errors["/earnings.json"] == 1
@@ -0,0 +1,106 @@
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from jobs.ingest.adapters.tdnet_rss_adapter import TdnetRssAdapter
+from jobs.ingest.rules import detect_tdnet
+from jobs.ingest.utils.http import new_session
+
+DAY = "20240206"
+
+
+def _page(rows, page, pages):
+    cells = "".join(
+        f'<tr><td class="oddnew-L kjTime" noWrap>{hhmm}</td><td class="oddnew-M kjCode">{code}0</td>'
+        f'<td class="oddnew-M kjName">{name}</td><td class="oddnew-M kjTitle" align="left">'
+        f'<a href="{pdf}.pdf" target="_blank">{title}</a></td><td class="oddnew-M kjXbrl"></td></tr>\n'
+        for hhmm, code, name, title, pdf in rows
+    )
+    pager = "".join(
+        f"<div class=\"pager-M\" onclick=\"pagerLink('I_list_{num:03d}_{DAY}.html')\">{num}</div>"
+        for num in range(1, pages + 1)
+        if num != page
+    )
+    return f'<html><body>{pager}<table id="main-list-table">{cells}</table></body></html>'.encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pages = {}
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        body = type(self).pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def _publish(rows, per_page=2):
+    chunks = [rows[start : start + per_page] for start in range(0, len(rows), per_page)]
+    _Handler.pages = {
+        f"/I_list_{num:03d}_{DAY}.html": _page(chunk, num, len(chunks)) for num, chunk in enumerate(chunks, 1)
+    }
+    _Handler.requests = []
+
+
+def test_list_pages_are_walked_until_rows_seen_in_an_earlier_run(server, tmp_path):
+    rows = [
+        ("15:30", "7203", "トヨタ自動車", "業績予想の修正に関するお知らせ", "140120240206000005"),
+        ("15:00", "6758", "ソニーグループ", "2024年3月期 第3四半期決算短信", "140120240206000004"),
+        ("14:00", "9984", "ソフトバンクグループ", "自己株式の取得状況", "140120240206000003"),
+        ("13:00", "7203", "トヨタ自動車", "役員の異動", "140120240206000002"),
+        ("12:00", "6758", "ソニーグループ", "増配に関するお知らせ", "140120240206000001"),
+    ]
+    _publish(rows)
+    url = f"{server}/I_list_001_{DAY}.html"
+    adapter = TdnetRssAdapter(rss_url=url, session=new_session(), seen_path=tmp_path / "seen.json")
+
+    items = adapter.fetch_live()
+    assert [(item.code, item.announced_at, item.title) for item in items[:2]] == [
+        ("7203", datetime(2024, 2, 6, 15, 30), rows[0][3]),
+        ("6758", datetime(2024, 2, 6, 15, 0), rows[1][3]),
+    ]
+    assert len(items) == 5 and adapter.pages_fetched == 3
+    assert items[0].url == f"{server}/140120240206000005.pdf" and items[0].company == "トヨタ自動車"
+    assert [event.tag for event in detect_tdnet(items)] == ["GUIDE_UP", "TDNET", "TDNET", "TDNET", "GUIDE_UP"]
+
+    # A new disclosure pushes the old rows down; page 1 reaches a seen row.
+    newer = [("16:00", "9984", "ソフトバンクグループ", "上方修正", "140120240206000006")]
+    _publish(newer + rows)
+    again = adapter.fetch_live()
+    assert adapter.pages_fetched == 1 and _Handler.requests == [f"/I_list_001_{DAY}.html"]
+    assert [item.title for item in again] == [row[3] for row in newer + rows]
+
+    # Without the state file every page is walked again.
+    fresh = TdnetRssAdapter(rss_url=url, session=new_session()).fetch_live()
+    assert [item.title for item in fresh] == [item.title for item in again]
+    assert sorted(_Handler.requests[1:]) == [f"/I_list_00{num}_{DAY}.html" for num in range(1, 4)]
+
+
+def test_empty_list_page_yields_no_items(server):
+    # Before the day's first disclosure: the list table with no rows, and a year on the page.
+    _Handler.pages = {f"/I_list_001_{DAY}.html": _page([], 1, 1).replace(b"<body>", "<body>2024年".encode())}
+    _Handler.requests = []
+    adapter = TdnetRssAdapter(rss_url=f"{server}/I_list_001_{DAY}.html", session=new_session())
+    assert adapter.fetch_live() == []
+    assert len(_Handler.requests) == 1
@@ -24,3 +24,71 @@ def test_detect_tdnet_defaults_to_tdnet_tag():
     )
     events = detect_tdnet([item])
     assert events[0].tag == "TDNET"
+
+
+def test_event_index_range_queries_keep_input_order():
+    from datetime import date
+
+    from jobs.ingest.rules import DetectedEvent, EventIndex
+
+    def event(day: int, tag: str, title: str = "") -> DetectedEvent:
+        return DetectedEvent("7203", datetime(2024, 2, day, 15), tag, tag, title, "", "test", 0.5)
+
+    late, early, negative, downward = event(9, "NEWS_POS"), event(2, "GUIDE_UP"), event(8, "NEWS_NEG"), event(1, "TDNET")
+    index = EventIndex([late, early, negative])
+    assert index.between("7203", date(2024, 2, 2), date(2024, 2, 8)) == [early, negative]
+    assert index.between("7203", date(2024, 2, 3), date(2024, 2, 7)) == []
+    assert index.negative_penalty("7203", date(2024, 2, 13)) == 0.2
+    assert index.negative_penalty("7203", date(2024, 2, 14)) == 0.0
+    # Events published after the pick date do not count.
+    assert index.negative_penalty("7203", date(2024, 2, 7)) == 0.0
+
+    index.extend([DetectedEvent("7203", datetime(2024, 1, 5), "TDNET", "TDNET", "業績予想の下方修正", "", "test", 0.5), downward])
+    assert index.negative_penalty("7203", date(2024, 2, 14)) == 0.3
+    assert index.negative_penalty("7203", date(2024, 1, 5)) == 0.3
+    assert index.negative_penalty("7203", date(2024, 1, 4)) == 0.0
+    assert index.events("7203")[:3] == [late, early, negative]
+
+
+def test_rule_set_picks_highest_priority_match_in_one_batch():
+    from jobs.ingest.rule_engine import Rule, RuleSet
+
+    rules = RuleSet(
+        [
+            Rule("pos", priority=1, keywords=("上方", "増配")),
+            Rule("guide", priority=5, keywords=("上方修正",), patterns=(r"業績予想.*修正",)),
+            Rule("neg", priority=3, keywords=("方修",)),
+        ],
+        default=Rule("neu"),
+    )
+    titles = ["上方修正のお知らせ", "増配", "業績予想の修正", "方修と増配", "IR資料", "", "業績予想\n修正"]
+    assert [rule.tag for rule in rules.classify(titles)] == ["guide", "pos", "guide", "neg", "neu", "neu", "neu"]
+    assert rules.match("上方") == rules.classify(["上方"])[0]
+
+
+def test_default_rules_match_previous_classification():
+    import re
+
+    from jobs.ingest.adapters.earnings_adapter import EarningsItem
+    from jobs.ingest.rules import detect_earnings
+
+    titles = [
+        "2024年3月期業績予想の修正に関するお知らせ",
+        "増配のお知らせ",
+        "第3四半期決算短信",
+        "4四半期の業績",
+        "通期見通し",
+        "利益予想を上方へ",
+        "IR説明会資料",
+        "下期の減益見込み",
+    ]
+    guide = [re.compile(p) for p in (r"上方修正", r"増配", r"業績予想.*修正", r"利益予想.*上方")]
+    earnings = [re.compile(p) for p in (r"第?\d四半期", r"通期", r"上期", r"下期")]
+    items = [TdnetItem(code="7203", title=title, summary="", announced_at=datetime(2024, 2, 1)) for title in titles]
+    assert [ev.tag for ev in detect_tdnet(items)] == [
+        "GUIDE_UP" if any(p.search(title) for p in guide) else "TDNET" for title in titles
+    ]
+    items = [EarningsItem(code="7203", title=title, summary="", announced_at=datetime(2024, 2, 1)) for title in titles]
+    assert [ev.score_raw for ev in detect_earnings(items)] == [
+        0.8 if any(p.search(title) for p in earnings) else 0.6 for title in titles
+    ]